@@ -0,0 +1,5 @@
+"""Reproducible benchmarks for the hot paths the cogs rely on.
+
+Each module is runnable from the repository root, e.g.
+`python -m benchmarks.calculator`, and prints its measurements.
+"""
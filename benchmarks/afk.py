@@ -0,0 +1,51 @@
+# benchmarks/afk.py
+"""Per-message cost of the AFK listener with a large registry.
+
+    python -m benchmarks.afk
+"""
+import asyncio
+import datetime
+import time
+from types import SimpleNamespace
+
+from cogs.general import General
+
+MESSAGES = 200000
+AFK_USERS = 100000
+
+
+async def per_message(label, handler, message):
+    start = time.perf_counter()
+    for _ in range(MESSAGES):
+        await handler(message)
+    print(f'{label}: {(time.perf_counter() - start) / MESSAGES * 1e9:.0f} ns/message')
+
+
+async def run():
+    cog = General(None)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    guild = SimpleNamespace(id=1)
+    channel = SimpleNamespace(id=2)
+    author = SimpleNamespace(id=5, bot=False)
+    plain = SimpleNamespace(guild=guild, author=author, mentions=[], channel=channel, created_at=now)
+    mentions = [SimpleNamespace(id=user_id, display_name='member') for user_id in range(100, 103)]
+    mentioning = SimpleNamespace(guild=guild, author=author, mentions=mentions, channel=channel, created_at=now)
+
+    async def noop(message):
+        pass
+
+    await per_message('empty coroutine', noop, plain)
+    cog.afk_users.clear()
+    await per_message('empty registry', cog.on_message, plain)
+    for user_id in range(AFK_USERS):
+        cog.afk_users[(guild.id, 10_000_000 + user_id)] = ('away', 0)
+    await per_message(f'{AFK_USERS} AFK users, no mentions', cog.on_message, plain)
+    await per_message(f'{AFK_USERS} AFK users, 3 non-AFK mentions', cog.on_message, mentioning)
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# benchmarks/calculator.py
+"""Fuzz the calculator and measure event-loop lag while it runs.
+
+    python -m benchmarks.calculator
+"""
+import asyncio
+import random
+import signal
+import time
+
+import cogs.utility as utility
+from utils.calculator import CalculationError, evaluate, format_result
+from utils.offload import shutdown_pools
+
+FUZZ_SEED = 7
+FUZZ_ROUNDS = 30000
+FUZZ_TOKENS = [
+    '1', '2', '9', '99', '9999999', '0', '0.5', '1e300', 'pi', 'x',
+    '+', '-', '*', '/', '//', '%', '**', '^', '(', ')',
+    'sqrt(', 'factorial(', 'lcm(', ',', '=', ';', 'max(',
+]
+SAMPLES = [
+    '2^3+1', 'r = 3; pi * r^2', '9**9**9', '10**3000', 'factorial(1000)', 'factorial(5000)',
+    'sqrt(-1)', '(-8)**(1/3)', '1/0', 'lcm(10**2999, 10**2999+1)', '__import__("os")',
+    '(1).__class__', 'x', 'log(8,2)', '2**-1000000', '1e308*10', '"a"*10',
+]
+HOSTILE_BATCH = ['9**9**9', 'factorial(1000)*factorial(999)', 'lcm(10**2999,3)', '2^3+1', 'sqrt(2)'] * 40
+
+
+def stall(source, timeout):
+    """Stand-in for C-level work that ignores the worker's own alarm."""
+    signal.pthread_sigmask(signal.SIG_BLOCK, [signal.SIGALRM])
+    time.sleep(30)
+
+
+def samples():
+    for source in SAMPLES:
+        try:
+            print(f'{source} => {format_result(evaluate(source))[:60]}')
+        except (CalculationError, ZeroDivisionError) as e:
+            print(f'{source} !! {type(e).__name__}: {e}')
+
+
+def fuzz():
+    """Random token soup must only ever raise CalculationError or ZeroDivisionError."""
+    rng = random.Random(FUZZ_SEED)
+    worst = 0.0
+    unexpected = 0
+    for _ in range(FUZZ_ROUNDS):
+        source = ''.join(rng.choices(FUZZ_TOKENS, k=rng.randint(1, 14)))
+        start = time.perf_counter()
+        try:
+            evaluate(source)
+        except (CalculationError, ZeroDivisionError):
+            pass
+        except Exception as e:
+            unexpected += 1
+            print(f'UNEXPECTED {source!r}: {type(e).__name__}: {e}')
+        worst = max(worst, time.perf_counter() - start)
+    print(f'fuzz: {FUZZ_ROUNDS} expressions, {unexpected} unexpected errors, worst {worst * 1000:.1f}ms')
+    return unexpected
+
+
+def cached_eval(rounds=100000):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        evaluate('sqrt(2)*pi + 3^2')
+    print(f'cached evaluate: {(time.perf_counter() - start) / rounds * 1e6:.2f}us per call')
+
+
+async def loop_lag():
+    """Run a hostile batch through the pool while a heartbeat measures loop lag."""
+    cog = utility.Utility(None)
+    lag = 0.0
+
+    async def beat():
+        nonlocal lag
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lag = max(lag, time.perf_counter() - start - 0.01)
+
+    async def one(source):
+        try:
+            return await cog.calculate(source)
+        except (CalculationError, ZeroDivisionError) as e:
+            return e
+
+    # Warm the pool so worker start-up is not counted
+    await asyncio.gather(*(cog.calculate('1') for _ in range(4)))
+    heartbeat = asyncio.create_task(beat())
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(one(source) for source in HOSTILE_BATCH))
+        print(f'pool: {len(HOSTILE_BATCH)} calculations in {time.perf_counter() - start:.2f}s, '
+              f'max loop lag {lag * 1000:.1f}ms')
+
+        # Force the hard-kill path with a worker that ignores the time limit
+        original_timeout, original_evaluate = utility.MATH_TIMEOUT, utility.evaluate_limited
+        utility.MATH_TIMEOUT, utility.evaluate_limited = 0.2, stall
+        lag = 0.0
+        start = time.perf_counter()
+        try:
+            await cog.calculate('1+2')
+            print('hard limit: worker was not stopped')
+        except CalculationError as e:
+            print(f'hard limit: {e} after {time.perf_counter() - start:.2f}s, max loop lag {lag * 1000:.1f}ms')
+        finally:
+            utility.MATH_TIMEOUT, utility.evaluate_limited = original_timeout, original_evaluate
+        print(f'after restart: 2^10 = {await cog.calculate("2^10")}')
+    finally:
+        heartbeat.cancel()
+        shutdown_pools()
+
+
+def main():
+    samples()
+    unexpected = fuzz()
+    cached_eval()
+    asyncio.run(loop_lag())
+    raise SystemExit(1 if unexpected else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/router.py
+"""Compare InteractionRouter with bot.wait_for for many open reaction prompts.
+
+    python -m benchmarks.router
+"""
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+
+import discord
+from discord.ext import commands
+
+from utils.router import InteractionRouter
+
+SEED = 1
+PROMPTS = 10000
+EVENTS = 20000
+EMOJIS = ('✅', '❌')
+
+
+def reaction_events(rng):
+    """Reactions on random messages; about one in ten lands on a prompt's message."""
+    events = []
+    for _ in range(EVENTS):
+        message_id = rng.randint(1, PROMPTS * 10)
+        reaction = SimpleNamespace(emoji='✅', message=SimpleNamespace(id=message_id))
+        events.append((reaction, SimpleNamespace(id=message_id)))
+    return events
+
+
+def timer_handles():
+    # Cancelled handles stay in the loop's heap until they reach the top
+    return sum(not handle.cancelled() for handle in asyncio.get_running_loop()._scheduled)
+
+
+async def cancel_all(tasks):
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def with_wait_for(events):
+    bot = commands.Bot(command_prefix='!', intents=discord.Intents.default())
+    await bot._async_setup_hook()
+
+    def prompt(message_id):
+        def check(reaction, user):
+            return user.id == message_id and str(reaction.emoji) in EMOJIS and reaction.message.id == message_id
+        return asyncio.ensure_future(bot.wait_for('reaction_add', timeout=600, check=check))
+
+    tasks = [prompt(message_id) for message_id in range(1, PROMPTS + 1)]
+    await asyncio.sleep(0)
+    handles = timer_handles()
+    start = time.perf_counter()
+    for reaction, user in events:
+        bot.dispatch('reaction_add', reaction, user)
+    per_event = (time.perf_counter() - start) / EVENTS * 1e6
+    for _ in range(3):
+        await asyncio.sleep(0)
+    resolved = sum(task.done() for task in tasks)
+    await cancel_all(tasks)
+    print(f'wait_for: {per_event:.1f}us per event, {handles} timer handles, {resolved} prompts answered')
+
+
+async def with_router(events):
+    router = InteractionRouter()
+    router.bot_user_id = 0
+    start = time.perf_counter()
+    tasks = [
+        asyncio.ensure_future(router.wait_reaction(message_id, user_id=message_id, emojis=EMOJIS, timeout=600))
+        for message_id in range(1, PROMPTS + 1)
+    ]
+    await asyncio.sleep(0)
+    register = (time.perf_counter() - start) / PROMPTS * 1e6
+    handles = timer_handles()
+    start = time.perf_counter()
+    for reaction, user in events:
+        router.dispatch_reaction(reaction.message.id, user.id, str(reaction.emoji))
+    await asyncio.sleep(0)
+    per_event = (time.perf_counter() - start) / EVENTS * 1e6
+    print(f'router: {per_event:.2f}us per event, {handles} timer handles, {router.dispatched} prompts answered, '
+          f'registering {register:.1f}us per prompt')
+    await cancel_all(tasks)
+
+
+async def router_timeouts():
+    """Staggered short deadlines must all fire through the router's single timer."""
+    router = InteractionRouter()
+    before = timer_handles()
+    tasks = [
+        asyncio.ensure_future(router.wait_reaction(message_id, timeout=0.05 + (message_id % 100) / 1000))
+        for message_id in range(1, PROMPTS + 1)
+    ]
+    await asyncio.sleep(0)
+    handles = timer_handles() - before
+    start = time.perf_counter()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    timed_out = sum(isinstance(result, asyncio.TimeoutError) for result in results)
+    print(f'timeouts: {timed_out}/{PROMPTS} fired in {elapsed:.3f}s with {handles} timer handle(s); '
+          f'{len(router)} prompts and {len(router._deadlines)} heap entries left')
+
+
+async def run():
+    events = reaction_events(random.Random(SEED))
+    await with_wait_for(events)
+    await with_router(events)
+    await router_timeouts()
+
+
+def main():
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/sessions.py
+"""Compare the session timer wheel with a sleeping task per session.
+
+    python -m benchmarks.sessions
+"""
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from cogs.games import GuessSession, HangmanSession
+from utils.sessions import SessionManager
+
+SESSIONS = 50000
+IDLE_TICKS = 100
+
+
+def make_session(i):
+    """Half guess, half hangman, 25 channels per guild."""
+    if i % 2:
+        return GuessSession(i // 25, i, i, 50)
+    return HangmanSession(i // 25, i, i, 'hurricane')
+
+
+async def traced(build):
+    """Bytes per session still allocated after `build()` has run."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = await build()
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return used / SESSIONS, kept
+
+
+def wheel_manager():
+    fired = 0
+
+    async def on_expire(session):
+        nonlocal fired
+        fired += 1
+        manager.end(session)
+
+    manager = SessionManager(on_expire, max_per_guild=SESSIONS, timeout=1)
+    return manager, lambda: fired
+
+
+async def wheel():
+    manager, fired = wheel_manager()
+    start = time.perf_counter()
+    for i in range(SESSIONS):
+        manager.start(make_session(i), timeout=3600)
+    started = (time.perf_counter() - start) / SESSIONS * 1e6
+
+    sessions = list(manager._sessions.values())
+    start = time.perf_counter()
+    for session in sessions:
+        manager.touch(session, 3600)
+    touched = (time.perf_counter() - start) / SESSIONS * 1e6
+
+    # Ticks with nothing due; each re-arms the timer, so put the real handle back afterwards
+    wheel = manager._wheel
+    loop = asyncio.get_running_loop()
+    handle, next_at = wheel._handle, wheel._next_at
+    start = time.perf_counter()
+    for _ in range(IDLE_TICKS):
+        wheel._advance(loop)
+        wheel._handle.cancel()
+    tick = (time.perf_counter() - start) / IDLE_TICKS * 1e6
+    wheel._handle, wheel._next_at = handle, next_at
+
+    for session in sessions:
+        manager.touch(session, 1)
+    start = time.perf_counter()
+    while len(manager):
+        await asyncio.sleep(0.05)
+    expired = time.perf_counter() - start
+    manager.close()
+
+    async def build():
+        manager, _ = wheel_manager()
+        for i in range(SESSIONS):
+            manager.start(make_session(i), timeout=3600)
+        return manager
+
+    per_session, manager = await traced(build)
+    manager.close()
+    print(f'wheel: start {started:.2f}us, touch {touched:.2f}us, {per_session:.0f} B/session '
+          f'({per_session * SESSIONS / 1e6:.0f} MB), idle tick {tick:.0f}us, '
+          f'{fired()} sessions with a 1s timeout ended within {expired:.2f}s')
+
+
+async def task_per_session():
+    async def timer(session, delay):
+        await asyncio.sleep(delay)
+
+    def build_sync():
+        timers = {}
+        for i in range(SESSIONS):
+            session = make_session(i)
+            timers[i] = (session, asyncio.ensure_future(timer(session, 3600)))
+        return timers
+
+    start = time.perf_counter()
+    timers = build_sync()
+    await asyncio.sleep(0)
+    started = (time.perf_counter() - start) / SESSIONS * 1e6
+
+    start = time.perf_counter()
+    for i, (session, task) in list(timers.items()):
+        task.cancel()
+        timers[i] = (session, asyncio.ensure_future(timer(session, 3600)))
+    await asyncio.sleep(0)
+    touched = (time.perf_counter() - start) / SESSIONS * 1e6
+    for _, task in timers.values():
+        task.cancel()
+    await asyncio.sleep(0)
+
+    async def build():
+        timers = build_sync()
+        await asyncio.sleep(0)  # Let each task start sleeping so its timer handle exists
+        return timers
+
+    per_session, timers = await traced(build)
+    for _, task in timers.values():
+        task.cancel()
+    await asyncio.sleep(0)
+    print(f'task per session: start {started:.2f}us, touch {touched:.2f}us, {per_session:.0f} B/session '
+          f'({per_session * SESSIONS / 1e6:.0f} MB)')
+
+
+def main():
+    asyncio.run(wheel())
+    asyncio.run(task_per_session())
+
+
+if __name__ == '__main__':
+    main()
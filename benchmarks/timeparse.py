@@ -0,0 +1,68 @@
+# benchmarks/timeparse.py
+"""Time the shared time parser against the strptime loop it replaced.
+
+    python -m benchmarks.timeparse
+"""
+import datetime
+import time
+import zoneinfo
+
+from utils.timeparse import TimeParseError, _duration_seconds, _parse_spec, parse_time
+
+ROUNDS = 20000
+ZONE = zoneinfo.ZoneInfo('Europe/London')
+# Inputs the old parser understands too
+COMMON = ['2025-07-06 14:30:00', '2025-07-06 14:30', '2025-07-06', '14:30:00', '14:30']
+MIXED = ['in 2h30m', 'tomorrow 9am', 'July 6 9pm', '2025-07-06T14:30:00+02:00', '5m ago', 'at 5pm on july 10', 'noon']
+INVALID = ['bogus text', 'hello', '99:99']
+
+
+def strptime_loop(text):
+    """The timestamp command's parser before utils/timeparse.py."""
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d', '%H:%M:%S', '%H:%M'):
+        try:
+            if fmt.startswith('%H'):
+                return datetime.datetime.combine(datetime.date.today(), datetime.datetime.strptime(text, fmt).time())
+            return datetime.datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+
+
+def warm(text):
+    return parse_time(text, ZONE)
+
+
+def cold(text):
+    _parse_spec.cache_clear()
+    _duration_seconds.cache_clear()
+    return parse_time(text, ZONE)
+
+
+def invalid(text):
+    try:
+        parse_time(text, ZONE)
+    except TimeParseError:
+        pass
+
+
+def per_call(parse, inputs):
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        parse(inputs[i % len(inputs)])
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main():
+    for label, parse, inputs in (
+        ('old strptime loop', strptime_loop, COMMON),
+        ('warm cache', warm, COMMON),
+        ('cold (no cache)', cold, COMMON),
+        ('mixed, warm', warm, MIXED),
+        ('mixed, cold', cold, MIXED),
+        ('invalid input', invalid, INVALID),
+    ):
+        print(f'{label:<20}{per_call(parse, inputs):.2f}us')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,11 @@ import logging
 from dotenv import load_dotenv
 from discord import app_commands
 
+from utils.components import get_components
+from utils.http import close_client, start_client
+from utils.offload import shutdown_pools
+from utils.router import get_router
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -29,6 +34,7 @@ logger = logging.getLogger(__name__)
 class PerformanceTracker:
     def __init__(self):
         self.command_stats = {}
+        self.service_stats = {}
         self.start_time = time.time()
     
     def track_command(self, command_name, execution_time):
@@ -43,7 +49,22 @@ class PerformanceTracker:
         stats['count'] += 1
         stats['total_time'] += execution_time
         stats['avg_time'] = stats['total_time'] / stats['count']
-    
+
+    def track_service(self, service_name, event, elapsed=None):
+        """Count an event (e.g. cache 'hit'/'miss') for a backing service, with optional latency."""
+        if service_name not in self.service_stats:
+            self.service_stats[service_name] = {}
+
+        stats = self.service_stats[service_name].setdefault(event, {
+            'count': 0,
+            'total_time': 0,
+            'max_time': 0
+        })
+        stats['count'] += 1
+        if elapsed is not None:
+            stats['total_time'] += elapsed
+            stats['max_time'] = max(stats['max_time'], elapsed)
+
     def get_uptime(self):
         return time.time() - self.start_time
     
@@ -127,8 +148,23 @@ intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
 
+class Bot(commands.Bot):
+    """Owns the shared outbound HTTP client (`utils/http.py`), the prompt router (`utils/router.py`)
+    and the persistent button registry (`utils/components.py`)."""
+
+    async def setup_hook(self):
+        self.web_client = await start_client()
+        self.router = get_router()
+        self.router.install(self)
+        get_components().install(self)
+
+    async def close(self):
+        # Cogs are unloaded first, so anything they flush on unload can still reach the network
+        await super().close()
+        await close_client()
+
 # Initialize the bot with hybrid commands support
-bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
+bot = Bot(command_prefix="!", intents=intents, help_command=None)
 
 # Global check to restrict bot usage to allowed users only
 @bot.check
@@ -355,14 +391,11 @@ async def dmall_server_command(ctx, *, message: str):
         await confirm_msg.add_reaction("✅")
         await confirm_msg.add_reaction("❌")
         
-        def check(reaction, user):
-            return (user == ctx.author and 
-                   str(reaction.emoji) in ["✅", "❌"] and 
-                   reaction.message.id == confirm_msg.id)
-        
         try:
-            reaction, user = await bot.wait_for('reaction_add', timeout=30.0, check=check)
-            if str(reaction.emoji) == "❌":
+            emoji, _ = await get_router().wait_reaction(
+                confirm_msg.id, user_id=ctx.author.id, emojis=["✅", "❌"], timeout=30.0
+            )
+            if emoji == "❌":
                 await confirm_msg.edit(content="DM operation cancelled.")
                 return
         except asyncio.TimeoutError:
@@ -448,7 +481,11 @@ async def help_command(ctx, *, command_name: str = None):
             "Games": ("🎮", "Interactive games and activities"),
             "Info": ("📊", "Bot statistics and system information"),
             "Misc": ("🔗", "Utility tools and converters"),
-            "Utility": ("⚙️", "Advanced utilities and tools")
+            "Utility": ("⚙️", "Advanced utilities and tools"),
+            "Search": ("🔍", "Opt-in message search index"),
+            "Automod": ("🚫", "Automatic banned-term filtering"),
+            "Antispam": ("🧯", "Flood and spam protection"),
+            "Raid": ("🚨", "Join raid detection and lockdown")
         }
         
         # Group commands by cog with enhanced presentation
@@ -491,7 +528,8 @@ async def load_extensions():
     """Load all cog extensions."""
     cog_files = [
         "admin", "moderation", "general", "fun", 
-        "games", "info", "misc", "utility"
+        "games", "info", "misc", "utility", "search",
+        "automod", "antispam", "raid"
     ]
     
     for cog_name in cog_files:
@@ -646,4 +684,5 @@ if __name__ == "__main__":
     except Exception as e:
         logger.error(f"❌ Failed to start bot: {e}")
     finally:
+        shutdown_pools()
         logger.info("👋 Bot shutdown complete")
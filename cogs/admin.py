@@ -3,9 +3,15 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import os
+import re
 import sys
+import asyncio
 import logging
 
+from utils.http import get_client
+from utils.offload import POOLS, get_pool
+from utils.trivia import PACK_DIR, TriviaError, TriviaPack, build_pack, pack_path, trivia_bank
+
 logger = logging.getLogger(__name__)
 
 class Admin(commands.Cog):
@@ -227,9 +233,110 @@ class Admin(commands.Cog):
                 value="\n".join(command_list) or "No commands executed yet",
                 inline=False
             )
+
+        # Cache and upstream stats for services such as weather
+        for service_name, events in sorted(getattr(tracker, 'service_stats', {}).items()):
+            counts = {event: stats['count'] for event, stats in events.items()}
+            lines = []
+            lookups = counts.get('hit', 0) + counts.get('miss', 0)
+            if lookups:
+                hit_rate = counts.get('hit', 0) / lookups * 100
+                lines.append(f"Cache: {counts.get('hit', 0)} hits / {counts.get('miss', 0)} misses ({hit_rate:.0f}%)")
+            if counts.get('coalesced'):
+                lines.append(f"Coalesced: {counts['coalesced']}")
+            upstream = events.get('upstream')
+            if upstream:
+                avg_ms = upstream['total_time'] / upstream['count'] * 1000
+                lines.append(
+                    f"Upstream: {upstream['count']} calls, {avg_ms:.0f}ms avg, "
+                    f"{upstream['max_time'] * 1000:.0f}ms max, {counts.get('error', 0)} errors"
+                )
+            embed.add_field(name=f"Service: {service_name}", value="\n".join(lines) or "No activity", inline=False)
+
+        http = get_client().stats
+        if http.requests:
+            embed.add_field(
+                name="Outbound HTTP",
+                value=(
+                    f"Requests: {http.requests} ({http.avg_time * 1000:.0f}ms avg, {http.max_time * 1000:.0f}ms max)\n"
+                    f"Connection reuse: {http.reuse_rate:.0%} ({http.connections_reused} reused / {http.connections_created} new)\n"
+                    f"Retries: {http.retries} • Failures: {http.failures} • 304 hits: {http.cache_hits} • Waiting: {http.waiting}"
+                ),
+                inline=False
+            )
+
+        await ctx.send(embed=embed, ephemeral=True)
+
+    @commands.hybrid_command(name='pools', description='Shows worker pool statistics.')
+    async def pools(self, ctx):
+        """Shows queue, run time and outcome counters for each worker pool."""
+        embed = discord.Embed(
+            title="⚙️ Worker Pools",
+            color=discord.Color.green()
+        )
+        
+        for pool in POOLS.values():
+            stats = pool.stats
+            pooled = stats.submitted - stats.inline
+            finished = stats.completed + stats.failed + stats.timeouts
+            avg_queue = stats.queue_time / finished * 1000 if finished else 0.0
+            avg_run = stats.run_time / finished * 1000 if finished else 0.0
+            
+            embed.add_field(
+                name=f"{pool.name} ({pool.kind}, {pool.workers} workers, limit {pool.concurrency})",
+                value=(
+                    f"Jobs: {stats.submitted} ({stats.inline} inline, {pooled} pooled)\n"
+                    f"Active: {pool.active} • Waiting: {pool.waiting}\n"
+                    f"Failed: {stats.failed} • Timeouts: {stats.timeouts} • Restarts: {stats.restarts}\n"
+                    f"Queue: {avg_queue:.1f}ms avg / {stats.max_queue_time * 1000:.1f}ms max\n"
+                    f"Run: {avg_run:.1f}ms avg / {stats.max_run_time * 1000:.1f}ms max"
+                ),
+                inline=False
+            )
         
         await ctx.send(embed=embed, ephemeral=True)
 
+    @commands.hybrid_command(name='trivia_load', description='Loads a trivia pack (JSON lines upload or a pack name).')
+    @commands.is_owner()
+    async def trivia_load(self, ctx, file: discord.Attachment = None, *, name: str = None):
+        """Compile and switch to a trivia pack: attach a `.jsonl` file, or name one in `data/trivia/`."""
+        if file is not None:
+            name = file.filename.rsplit('.', 1)[0]
+        if not name or not re.fullmatch(r'[\w-]{1,64}', name):
+            await ctx.send("Attach a `.jsonl` question file or give a pack name (letters, digits, `-` and `_`).", ephemeral=True)
+            return
+        
+        await ctx.defer(ephemeral=True)
+        source = os.path.join(PACK_DIR, f"{name}.jsonl")
+        destination = pack_path(name)
+        try:
+            if file is not None:
+                data = await file.read()
+                await asyncio.to_thread(_write_file, source, data)
+            if file is not None or not os.path.exists(destination):
+                if not os.path.exists(source):
+                    await ctx.send(f"No pack or source named `{name}` in `{PACK_DIR}`.", ephemeral=True)
+                    return
+                # Compiling 100k questions takes about a second of pure Python
+                await get_pool('processes').run(build_pack, source, destination, timeout=300)
+            pack = await asyncio.to_thread(TriviaPack, destination)
+        except (TriviaError, OSError, TimeoutError) as e:
+            await ctx.send(f"Failed to load trivia pack: {e}", ephemeral=True)
+            return
+        
+        trivia_bank.swap(pack)
+        logger.info(f"Trivia pack switched to {pack.name} ({len(pack)} questions)")
+        await ctx.send(
+            f"🧠 Loaded trivia pack `{pack.name}`: {len(pack):,} questions in {len(pack.categories)} categories.",
+            ephemeral=True
+        )
+
+
+def _write_file(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
 async def setup(bot):
     """Adds the Admin cog to the bot."""
     await bot.add_cog(Admin(bot))
@@ -0,0 +1,368 @@
+# cogs/antispam.py
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+
+from utils.storage import data_path, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+ANTISPAM_FILE = data_path("antispam.json")
+MAX_TRACKED = 200000  # Hard cap on tracked users/channels, whatever the idle timeout
+IDLE_TIMEOUT = 300  # Seconds without messages before a user or channel is forgotten
+ACTIONS = ('delete', 'warn', 'timeout')
+
+# setting -> (default, minimum, maximum)
+SETTINGS = {
+    "window": (7, 1, 120),
+    "max_messages": (6, 2, 50),
+    "max_mentions": (8, 1, 100),
+    "max_duplicates": (4, 2, 50),
+    "channel_max_messages": (40, 5, 500),
+    "timeout_minutes": (10, 1, 40320),
+    "slowmode": (5, 0, 21600),
+}
+
+
+class RateWindow:
+    """Ring of the last `size` event timestamps.
+
+    The window is exceeded when the oldest of those `size` events is still
+    inside it, which makes every check a single comparison.
+    """
+
+    __slots__ = ('stamps', 'index')
+
+    def __init__(self, size):
+        self.stamps = [float('-inf')] * size
+        self.index = 0
+
+    def hit(self, now, window):
+        """Record an event; return True if `size` events fell within `window` seconds."""
+        stamps = self.stamps
+        stamps[self.index] = now
+        self.index = (self.index + 1) % len(stamps)
+        return now - stamps[self.index] <= window
+
+
+class WeightedWindow:
+    """Weighted event total over the last `window` seconds, holding at most `size` events."""
+
+    __slots__ = ('events', 'total')
+
+    def __init__(self, size):
+        self.events = deque(maxlen=size)
+        self.total = 0
+
+    def add(self, now, window, weight):
+        """Record an event and return the total weight inside the window."""
+        events = self.events
+        cutoff = now - window
+        while events and events[0][0] < cutoff:
+            self.total -= events.popleft()[1]
+        if len(events) == events.maxlen:
+            # About to be pushed out by append(); every event weighs at least 1,
+            # so a full buffer is already at the limit and nothing is missed
+            self.total -= events[0][1]
+        events.append((now, weight))
+        self.total += weight
+        return self.total
+
+
+class UserState:
+    """Per-(guild, user) spam counters. Each update is O(1)."""
+
+    __slots__ = ('messages', 'mentions', 'last_hash', 'last_hash_at', 'duplicates', 'last_seen', 'flagged_until')
+
+    def __init__(self, settings):
+        self.messages = RateWindow(settings["max_messages"])
+        self.mentions = None  # Created on the first mention; most users never need it
+        self.last_hash = None
+        self.last_hash_at = 0.0
+        self.duplicates = 0
+        self.last_seen = 0.0
+        self.flagged_until = 0.0
+
+
+class ChannelState:
+    """Per-channel message rate."""
+
+    __slots__ = ('messages', 'last_seen', 'flagged_until')
+
+    def __init__(self, settings):
+        self.messages = RateWindow(settings["channel_max_messages"])
+        self.last_seen = 0.0
+        self.flagged_until = 0.0
+
+
+def touch(states, key, factory, now):
+    """Fetch or create an LRU-ordered state and evict idle or excess entries."""
+    state = states.get(key)
+    if state is None:
+        state = states[key] = factory()
+    else:
+        states.move_to_end(key)
+    state.last_seen = now
+
+    # The oldest entries sit at the front, so eviction stops at the first active one
+    cutoff = now - IDLE_TIMEOUT
+    while states:
+        oldest_key, oldest = next(iter(states.items()))
+        if oldest.last_seen >= cutoff and len(states) <= MAX_TRACKED:
+            break
+        del states[oldest_key]
+    return state
+
+
+class Antispam(commands.Cog):
+    """Message flood, mention spam and repeated-content detection."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # guild_id -> settings dict; only enabled guilds are scanned
+        self.config = {}
+        self.users = OrderedDict()
+        self.channels = OrderedDict()
+        # Running slowmode updates, referenced so they are not garbage-collected mid-run
+        self.flood_tasks = set()
+
+    async def cog_load(self):
+        stored = await asyncio.to_thread(load_json, ANTISPAM_FILE, {})
+        self.config = {int(guild_id): settings for guild_id, settings in stored.items()}
+        for guild_id in self.config:
+            self.guild_config(guild_id)  # Fill in settings added since the file was written
+
+    async def cog_unload(self):
+        for task in self.flood_tasks:
+            task.cancel()
+
+    async def save_config(self):
+        data = {str(guild_id): settings for guild_id, settings in self.config.items()}
+        await asyncio.to_thread(save_json, ANTISPAM_FILE, data)
+
+    def guild_config(self, guild_id):
+        settings = self.config.setdefault(guild_id, {"enabled": False, "action": "delete"})
+        for name, (default, _, _) in SETTINGS.items():
+            settings.setdefault(name, default)
+        return settings
+
+    def check_message(self, message, settings, now):
+        """Update the counters for a message and return a violation reason, if any."""
+        window = settings["window"]
+        user = touch(
+            self.users, (message.guild.id, message.author.id),
+            lambda: UserState(settings), now
+        )
+        channel = touch(
+            self.channels, message.channel.id,
+            lambda: ChannelState(settings), now
+        )
+
+        if channel.messages.hit(now, window) and settings["slowmode"] and now >= channel.flagged_until:
+            channel.flagged_until = now + window
+            task = asyncio.create_task(self.handle_channel_flood(message.channel, settings))
+            self.flood_tasks.add(task)
+            task.add_done_callback(self.flood_task_done)
+
+        if user.messages.hit(now, window):
+            return "Message flood"
+
+        mention_count = len(message.raw_mentions) + len(message.raw_role_mentions) + message.mention_everyone
+        if mention_count:
+            if user.mentions is None:
+                user.mentions = WeightedWindow(settings["max_mentions"])
+            if user.mentions.add(now, window, mention_count) >= settings["max_mentions"]:
+                return "Mention spam"
+
+        content_hash = hash(message.content.casefold().strip())
+        repeated = content_hash == user.last_hash and now - user.last_hash_at <= window * 4
+        user.last_hash = content_hash
+        user.last_hash_at = now
+        user.duplicates = user.duplicates + 1 if repeated else 1
+        if user.duplicates >= settings["max_duplicates"]:
+            return "Repeated messages"
+        return None
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.guild is None or message.author.bot:
+            return
+        settings = self.config.get(message.guild.id)
+        if settings is None or not settings["enabled"]:
+            return
+
+        now = time.monotonic()
+        reason = self.check_message(message, settings, now)
+        if reason is None:
+            return
+        if isinstance(message.author, discord.Member) and message.author.guild_permissions.manage_messages:
+            return
+
+        user = self.users.get((message.guild.id, message.author.id))
+        # Act once per window; keep deleting the flood in between
+        first_hit = user is not None and now >= user.flagged_until
+        if user is not None and first_hit:
+            user.flagged_until = now + settings["window"]
+        await self.take_action(message, reason, settings, escalate=first_hit)
+
+    async def take_action(self, message, reason, settings, escalate):
+        """Delete the offending message and, once per window, apply the configured action."""
+        member = message.author
+        action = settings["action"]
+        moderation = self.bot.get_cog('Moderation')
+
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+        except discord.Forbidden:
+            logger.warning(f"Antispam cannot delete messages in #{message.channel} ({message.guild.id})")
+            return
+
+        if not escalate:
+            return
+
+        full_reason = f"Antispam: {reason}"
+        try:
+            if action == 'warn' and moderation:
+                await moderation.warn_member(member, full_reason, self.bot.user, message.channel)
+            elif action == 'timeout' and moderation:
+                minutes = settings["timeout_minutes"]
+                await moderation.apply_timeout(
+                    member, timedelta(minutes=minutes), f"{minutes} minutes", full_reason, self.bot.user, message.channel
+                )
+        except discord.Forbidden:
+            logger.warning(f"Antispam lacks permission to {action} {member} in {message.guild.id}")
+        except Exception as e:
+            logger.error(f"Antispam failed to {action} {member}: {e}")
+
+        if moderation:
+            log_embed = discord.Embed(
+                title=f"Antispam: {reason}",
+                description=f"Spam from {member.mention} removed in {message.channel.mention}",
+                color=discord.Color.orange()
+            )
+            log_embed.add_field(name="Action", value=action.title(), inline=True)
+            log_embed.add_field(name="Member ID", value=str(member.id), inline=True)
+            log_embed.timestamp = datetime.utcnow()
+            await moderation.send_mod_log(log_embed)
+
+        logger.info(f"Antispam: {reason} by {member} in {message.guild}, action {action}")
+
+    def flood_task_done(self, task):
+        self.flood_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Antispam slowmode update failed: {task.exception()}")
+
+    async def handle_channel_flood(self, channel, settings):
+        """Raise slowmode on a flooded channel through the Moderation cog."""
+        seconds = settings["slowmode"]
+        moderation = self.bot.get_cog('Moderation')
+        if moderation is None or channel.slowmode_delay >= seconds:
+            return
+        try:
+            await moderation.apply_slowmode(channel, seconds, self.bot.user)
+        except discord.Forbidden:
+            logger.warning(f"Antispam cannot set slowmode in #{channel} ({channel.guild.id})")
+            return
+
+        log_embed = discord.Embed(
+            title="Antispam: Channel Flood",
+            description=f"Slowmode set to {seconds} seconds in {channel.mention}",
+            color=discord.Color.orange()
+        )
+        log_embed.timestamp = datetime.utcnow()
+        await moderation.send_mod_log(log_embed)
+
+    # --- Commands ---
+
+    @commands.hybrid_command(name='antispam_enable', description='Enables spam detection for this server.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def antispam_enable(self, ctx):
+        """Enables spam detection for this server."""
+        self.guild_config(ctx.guild.id)["enabled"] = True
+        await self.save_config()
+        await ctx.send("Antispam enabled. Use `!antispam_status` to review the limits.", ephemeral=True)
+        logger.info(f"{ctx.author} enabled antispam in {ctx.guild}")
+
+    @commands.hybrid_command(name='antispam_disable', description='Disables spam detection for this server.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def antispam_disable(self, ctx):
+        """Disables spam detection for this server."""
+        self.guild_config(ctx.guild.id)["enabled"] = False
+        await self.save_config()
+        await ctx.send("Antispam disabled.", ephemeral=True)
+        logger.info(f"{ctx.author} disabled antispam in {ctx.guild}")
+
+    @commands.hybrid_command(name='antispam_set', description='Changes an antispam limit or the action taken.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def antispam_set(self, ctx, setting: str, value: str):
+        """Changes an antispam limit (see antispam_status) or sets `action` to delete, warn or timeout."""
+        setting = setting.lower()
+        settings = self.guild_config(ctx.guild.id)
+
+        if setting == 'action':
+            value = value.lower()
+            if value not in ACTIONS:
+                await ctx.send(f"Action must be one of: {', '.join(ACTIONS)}", ephemeral=True)
+                return
+            settings["action"] = value
+        elif setting in SETTINGS:
+            _, minimum, maximum = SETTINGS[setting]
+            try:
+                number = int(value)
+            except ValueError:
+                number = None
+            if number is None or number < minimum or number > maximum:
+                await ctx.send(f"`{setting}` must be a whole number between {minimum} and {maximum}.", ephemeral=True)
+                return
+            settings[setting] = number
+        else:
+            await ctx.send(f"Unknown setting. Choose from: action, {', '.join(SETTINGS)}", ephemeral=True)
+            return
+
+        # Window sizes are baked into existing counters; start this guild's users afresh
+        for key in [key for key in self.users if key[0] == ctx.guild.id]:
+            del self.users[key]
+        for channel in ctx.guild.channels:
+            self.channels.pop(channel.id, None)
+
+        await self.save_config()
+        await ctx.send(f"Antispam `{setting}` set to **{value}**.", ephemeral=True)
+
+    @commands.hybrid_command(name='antispam_status', description='Shows the antispam settings for this server.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def antispam_status(self, ctx):
+        """Shows the antispam settings and how many users are being tracked."""
+        settings = self.guild_config(ctx.guild.id)
+        window = settings["window"]
+
+        embed = discord.Embed(
+            title="🛡️ Antispam Settings",
+            color=discord.Color.green() if settings["enabled"] else discord.Color.red()
+        )
+        embed.add_field(name="Enabled", value="Yes" if settings["enabled"] else "No", inline=True)
+        embed.add_field(name="Action", value=settings["action"].title(), inline=True)
+        embed.add_field(name="Window", value=f"{window}s", inline=True)
+        embed.add_field(name="Messages per User", value=f"{settings['max_messages']} / {window}s", inline=True)
+        embed.add_field(name="Mentions per User", value=f"{settings['max_mentions']} / {window}s", inline=True)
+        embed.add_field(name="Repeated Messages", value=settings["max_duplicates"], inline=True)
+        embed.add_field(name="Messages per Channel", value=f"{settings['channel_max_messages']} / {window}s", inline=True)
+        embed.add_field(name="Flood Slowmode", value=f"{settings['slowmode']}s", inline=True)
+        embed.add_field(name="Timeout", value=f"{settings['timeout_minutes']} minutes", inline=True)
+        embed.set_footer(text=f"Tracking {len(self.users)} users and {len(self.channels)} channels across all servers")
+
+        await ctx.send(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    """Adds the Antispam cog to the bot."""
+    await bot.add_cog(Antispam(bot))
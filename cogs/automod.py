@@ -0,0 +1,339 @@
+# cogs/automod.py
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+
+from utils.storage import data_path, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+AUTOMOD_FILE = data_path("automod.json")
+MAX_TERMS = 100000  # Per guild
+MAX_TERM_LENGTH = 100
+ACTIONS = ('delete', 'warn', 'timeout')
+
+
+def parse_term(raw):
+    """Split a banned term into (pattern, needs_word_start, needs_word_end).
+
+    `word` matches the whole word only, `word*` any word starting with it,
+    `*word` any word ending with it and `*word*` anywhere in the text.
+    """
+    pattern = raw.strip().casefold()
+    needs_start = not pattern.startswith('*')
+    needs_end = not pattern.endswith('*')
+    return pattern.strip('*'), needs_start, needs_end
+
+
+def is_word_char(ch):
+    return ch.isalnum() or ch == '_'
+
+
+class TermMatcher:
+    """Aho-Corasick automaton over one guild's banned terms.
+
+    Every message is scanned in a single pass over its characters, however
+    many terms the guild has. Word-boundary rules are checked only at the
+    positions where a term actually ends.
+    """
+
+    def __init__(self, terms):
+        goto = [{}]
+        own_outputs = [()]
+
+        for raw in terms:
+            pattern, needs_start, needs_end = parse_term(raw)
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                next_state = goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][ch] = next_state
+                    goto.append({})
+                    own_outputs.append(())
+                state = next_state
+            own_outputs[state] += ((raw, len(pattern), needs_start, needs_end),)
+
+        # Breadth-first pass computing failure links; each state's outputs are
+        # merged with those of its failure state so scanning never walks the chain
+        fail = [0] * len(goto)
+        outputs = list(own_outputs)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(ch, 0)
+                fail[next_state] = target if target != next_state else 0
+                outputs[next_state] = own_outputs[next_state] + outputs[fail[next_state]]
+
+        self.goto = goto
+        self.fail = fail
+        self.outputs = outputs
+
+    def __len__(self):
+        return len(self.goto)
+
+    def find(self, text):
+        """Return the first banned term found in `text`, or None."""
+        text = text.casefold()
+        goto = self.goto
+        fail = self.fail
+        outputs = self.outputs
+        length = len(text)
+        state = 0
+
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                for raw, size, needs_start, needs_end in outputs[state]:
+                    start = i - size + 1
+                    if needs_start and start > 0 and is_word_char(text[start - 1]):
+                        continue
+                    if needs_end and i + 1 < length and is_word_char(text[i + 1]):
+                        continue
+                    return raw
+        return None
+
+
+class Automod(commands.Cog):
+    """Automatic moderation using per-server banned-term lists."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        # guild_id -> {"terms": [...], "action": str, "timeout_minutes": int}
+        self.config = {}
+        # guild_id -> compiled TermMatcher
+        self.matchers = {}
+        # guild_id -> build generation, so only the newest rebuild is installed
+        self.generations = {}
+
+    async def cog_load(self):
+        stored = await asyncio.to_thread(load_json, AUTOMOD_FILE, {})
+        self.config = {int(guild_id): settings for guild_id, settings in stored.items()}
+        for guild_id in self.config:
+            await self.rebuild(guild_id)
+        logger.info(f"Automod loaded for {len(self.config)} guild(s)")
+
+    def guild_config(self, guild_id):
+        return self.config.setdefault(guild_id, {"terms": [], "action": "delete", "timeout_minutes": 10})
+
+    async def save_config(self):
+        data = {str(guild_id): settings for guild_id, settings in self.config.items()}
+        await asyncio.to_thread(save_json, AUTOMOD_FILE, data)
+
+    async def rebuild(self, guild_id):
+        """Compile the guild's list in a worker thread and swap it in when done.
+
+        Only the changed guild is rebuilt and messages keep being checked
+        against the previous automaton until the new one is ready.
+        """
+        generation = self.generations.get(guild_id, 0) + 1
+        self.generations[guild_id] = generation
+        terms = list(self.config.get(guild_id, {}).get("terms", ()))
+
+        matcher = await asyncio.to_thread(TermMatcher, terms) if terms else None
+        if self.generations.get(guild_id) != generation:
+            return  # A newer edit started while we were compiling
+        if matcher is None:
+            self.matchers.pop(guild_id, None)
+        else:
+            self.matchers[guild_id] = matcher
+
+    async def update_terms(self, guild_id, added=(), removed=()):
+        """Apply term additions/removals, persist them and recompile the guild's automaton."""
+        settings = self.guild_config(guild_id)
+        terms = dict.fromkeys(settings["terms"])
+        for term in removed:
+            terms.pop(term, None)
+        for term in added:
+            if len(terms) >= MAX_TERMS:
+                break
+            terms[term] = None
+        settings["terms"] = list(terms)
+        await self.save_config()
+        await self.rebuild(guild_id)
+        return len(terms)
+
+    @staticmethod
+    def clean_terms(text):
+        """Split user input on commas/newlines into normalised, de-duplicated terms."""
+        terms = {}
+        for line in text.replace(',', '\n').splitlines():
+            term = line.strip().casefold()
+            if term.strip('*') and len(term) <= MAX_TERM_LENGTH:
+                terms[term] = None
+        return list(terms)
+
+    # --- Message scanning ---
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.guild is None or message.author.bot or not message.content:
+            return
+        matcher = self.matchers.get(message.guild.id)
+        if matcher is None:
+            return
+        term = matcher.find(message.content)
+        if term is None:
+            return
+        # Moderators are exempt; checked only after a hit to keep the common path cheap
+        if isinstance(message.author, discord.Member) and message.author.guild_permissions.manage_messages:
+            return
+        await self.take_action(message, term)
+
+    @commands.Cog.listener()
+    async def on_message_edit(self, before, after):
+        if before.content != after.content:
+            await self.on_message(after)
+
+    async def take_action(self, message, term):
+        """Delete the message and apply the guild's configured follow-up action."""
+        settings = self.guild_config(message.guild.id)
+        action = settings["action"]
+        member = message.author
+        reason = f"Automod: banned term `{term}`"
+        moderation = self.bot.get_cog('Moderation')
+
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+        except discord.Forbidden:
+            logger.warning(f"Automod cannot delete messages in #{message.channel} ({message.guild.id})")
+            return
+
+        try:
+            if action == 'warn' and moderation:
+                await moderation.warn_member(member, reason, self.bot.user, message.channel)
+            elif action == 'timeout' and moderation:
+                minutes = settings["timeout_minutes"]
+                await moderation.apply_timeout(
+                    member, timedelta(minutes=minutes), f"{minutes} minutes", reason, self.bot.user, message.channel
+                )
+        except discord.Forbidden:
+            logger.warning(f"Automod lacks permission to {action} {member} in {message.guild.id}")
+        except Exception as e:
+            logger.error(f"Automod failed to {action} {member}: {e}")
+
+        if moderation:
+            log_embed = discord.Embed(
+                title="Automod: Message Deleted",
+                description=f"Message from {member.mention} deleted in {message.channel.mention}",
+                color=discord.Color.orange()
+            )
+            log_embed.add_field(name="Matched Term", value=f"`{term}`", inline=True)
+            log_embed.add_field(name="Action", value=action.title(), inline=True)
+            log_embed.add_field(name="Member ID", value=str(member.id), inline=True)
+            log_embed.add_field(name="Content", value=message.content[:1000], inline=False)
+            log_embed.timestamp = datetime.utcnow()
+            await moderation.send_mod_log(log_embed)
+
+        logger.info(f"Automod deleted a message from {member} in {message.guild} for term {term!r}")
+
+    # --- Commands ---
+
+    @commands.hybrid_command(name='automod_add', description='Adds banned terms (comma separated, * for wildcards).')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def automod_add(self, ctx, *, terms: str):
+        """Adds banned terms. `word` matches whole words, `word*`/`*word` prefixes/suffixes, `*word*` anywhere."""
+        new_terms = self.clean_terms(terms)
+        if not new_terms:
+            await ctx.send("No valid terms provided.", ephemeral=True)
+            return
+        total = await self.update_terms(ctx.guild.id, added=new_terms)
+        await ctx.send(f"Added {len(new_terms)} term(s). The list now has {total} term(s).", ephemeral=True)
+        logger.info(f"{ctx.author} added {len(new_terms)} automod term(s) in {ctx.guild}")
+
+    @commands.hybrid_command(name='automod_import', description='Adds banned terms from a text file, one per line.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def automod_import(self, ctx, file: discord.Attachment):
+        """Adds banned terms from an attached text file, one term per line."""
+        if file.size > 5 * 1024 * 1024:
+            await ctx.send("File is too large (max 5 MB).", ephemeral=True)
+            return
+        await ctx.defer(ephemeral=True)
+        data = await file.read()
+        new_terms = await asyncio.to_thread(self.clean_terms, data.decode('utf-8', errors='ignore'))
+        total = await self.update_terms(ctx.guild.id, added=new_terms)
+        await ctx.send(f"Imported {len(new_terms)} term(s). The list now has {total} term(s).", ephemeral=True)
+        logger.info(f"{ctx.author} imported {len(new_terms)} automod term(s) in {ctx.guild}")
+
+    @commands.hybrid_command(name='automod_remove', description='Removes banned terms (comma separated).')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def automod_remove(self, ctx, *, terms: str):
+        """Removes banned terms from the list."""
+        removed = self.clean_terms(terms)
+        total = await self.update_terms(ctx.guild.id, removed=removed)
+        await ctx.send(f"Removed term(s). The list now has {total} term(s).", ephemeral=True)
+
+    @commands.hybrid_command(name='automod_clear', description='Removes every banned term for this server.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def automod_clear(self, ctx):
+        """Removes every banned term for this server."""
+        self.guild_config(ctx.guild.id)["terms"] = []
+        await self.save_config()
+        await self.rebuild(ctx.guild.id)
+        await ctx.send("All banned terms removed.", ephemeral=True)
+        logger.info(f"{ctx.author} cleared the automod list in {ctx.guild}")
+
+    @commands.hybrid_command(name='automod_action', description='Sets what happens after a banned term is deleted.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def automod_action(self, ctx, action: str, timeout_minutes: int = 10):
+        """Sets the follow-up action: delete, warn or timeout."""
+        action = action.lower()
+        if action not in ACTIONS:
+            await ctx.send(f"Action must be one of: {', '.join(ACTIONS)}", ephemeral=True)
+            return
+        if timeout_minutes < 1 or timeout_minutes > 40320:  # Discord's 28-day limit
+            await ctx.send("Timeout must be between 1 minute and 28 days.", ephemeral=True)
+            return
+        settings = self.guild_config(ctx.guild.id)
+        settings["action"] = action
+        settings["timeout_minutes"] = timeout_minutes
+        await self.save_config()
+        await ctx.send(f"Automod action set to **{action}**.", ephemeral=True)
+
+    @commands.hybrid_command(name='automod_list', description='Shows the automod configuration for this server.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def automod_list(self, ctx):
+        """Shows the automod configuration and a sample of the banned terms."""
+        settings = self.guild_config(ctx.guild.id)
+        terms = settings["terms"]
+        matcher = self.matchers.get(ctx.guild.id)
+
+        embed = discord.Embed(
+            title="🛡️ Automod Settings",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Terms", value=len(terms), inline=True)
+        embed.add_field(name="Action", value=settings["action"].title(), inline=True)
+        embed.add_field(name="Automaton States", value=len(matcher) if matcher else 0, inline=True)
+        if terms:
+            sample = ", ".join(f"`{term}`" for term in terms[:30])
+            if len(terms) > 30:
+                sample += f" ... and {len(terms) - 30} more"
+            embed.add_field(name="Banned Terms", value=sample[:1024], inline=False)
+
+        await ctx.send(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    """Adds the Automod cog to the bot."""
+    await bot.add_cog(Automod(bot))
@@ -3,6 +3,15 @@ import discord
 from discord.ext import commands
 import random
 import asyncio
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.content import draw as draw_content
+from utils.dice import DiceError, dice_count, distribution as dice_distribution, parse as parse_dice, roll as roll_dice
+from utils.offload import get_pool
+
+DICE_BAR_WIDTH = 20
+DICE_PROCESS_ABOVE = 20_000  # Bigger pools and statistics runs go to the process pool
+DICE_TIMEOUT = 10.0  # Seconds before a roll's worker is killed
 
 class Fun(commands.Cog):
     """Fun commands for entertainment."""
@@ -10,26 +19,100 @@ class Fun(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
-    @commands.hybrid_command(name='roll', description='Rolls a dice.')
-    async def roll(self, ctx, sides: int = 6):
-        """Rolls a dice with specified number of sides (default 6)."""
-        if sides < 2:
-            await ctx.send("Dice must have at least 2 sides!", ephemeral=True)
+    @commands.hybrid_command(name='roll', description='Rolls dice, e.g. 8d6+3, 4d6kh3, 3d6! or stats 4d6kh3.')
+    async def roll(self, ctx, *, expression: str = "1d6"):
+        """Rolls dice in standard notation (`8d6+3`, `4d6kh3`, `10d6!`, `d%`).
+
+        A plain number rolls one die with that many sides. Start with `stats`
+        to simulate the roll many times instead, and end with `seed=N` for
+        repeatable results.
+        """
+        words = expression.split()
+        stats = bool(words) and words[0].lower() == 'stats'
+        if stats:
+            words.pop(0)
+        seed = None
+        if words and words[-1].lower().startswith(('seed=', 'seed:')):
+            seed_text = words.pop()[5:]
+            if not seed_text.isdigit():
+                await ctx.send("The seed must be a whole number, e.g. `seed=42`.", ephemeral=True)
+                return
+            seed = int(seed_text)
+        expression = ''.join(words) or "1d6"
+        if expression.isdigit():
+            expression = f"1d{expression}"
+        
+        try:
+            size = dice_count(parse_dice(expression))
+            # Threads cannot be stopped, so anything big runs where a slow roll can be killed
+            if stats:
+                summary = await get_pool('processes').run(dice_distribution, expression, seed, timeout=DICE_TIMEOUT)
+            elif size > DICE_PROCESS_ABOVE:
+                total, results = await get_pool('processes').run(roll_dice, expression, seed, timeout=DICE_TIMEOUT)
+            else:
+                total, results = await get_pool('threads').run(roll_dice, expression, seed, size=size)
+        except DiceError as e:
+            await ctx.send(f"❌ {e}", ephemeral=True)
             return
-        
-        if sides > 100:
-            await ctx.send("Dice cannot have more than 100 sides!", ephemeral=True)
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            await ctx.send("❌ That roll took too long, try fewer dice.", ephemeral=True)
             return
         
-        result = random.randint(1, sides)
+        if stats:
+            embed = self.dice_stats_embed(expression, summary)
+        else:
+            embed = discord.Embed(
+                title="🎲 Dice Roll",
+                description=f"`{expression}` → **{total:,}**",
+                color=discord.Color.blue()
+            )
+            lines = [self.format_dice_term(result) for result in results if result.term.sides]
+            if lines and (len(results) > 1 or results[0].term.count > 1):
+                embed.add_field(name="Rolls", value="\n".join(lines)[:1024], inline=False)
+        if seed is not None:
+            footer = embed.footer.text
+            embed.set_footer(text=f"{footer} · Seed {seed}" if footer else f"Seed {seed}")
         
+        await ctx.send(embed=embed)
+
+    def format_dice_term(self, result):
+        term = result.term
+        notation = f"{term.count}d{term.sides}{'!' if term.explode else ''}"
+        if term.keep is not None:
+            notation += f"{'kh' if term.keep[0] else 'kl'}{term.keep[1]}"
+        sign = "-" if term.sign < 0 else ""
+        if result.rolls is None:
+            return f"{sign}{notation}: {term.count:,} dice = **{abs(result.total):,}**"
+        shown = ", ".join(map(str, result.rolls))
+        if result.dropped:
+            shown += ", " + ", ".join(f"~~{value}~~" for value in result.dropped)
+        return f"{sign}{notation}: [{shown}] = **{abs(result.total):,}**"
+
+    def dice_stats_embed(self, expression, summary):
         embed = discord.Embed(
-            title="🎲 Dice Roll",
-            description=f"You rolled a **{result}** on a {sides}-sided dice!",
+            title="🎲 Dice Statistics",
+            description=f"`{expression}`",
             color=discord.Color.blue()
         )
+        embed.add_field(name="Mean", value=f"{summary['mean']:,.2f} ± {summary['stdev']:,.2f}", inline=True)
+        embed.add_field(name="Range", value=f"{summary['min']:,} – {summary['max']:,}", inline=True)
+        percentiles = summary['percentiles']
+        embed.add_field(
+            name="Percentiles",
+            value=f"5%: {percentiles[5]:,}\n50%: {percentiles[50]:,}\n95%: {percentiles[95]:,}",
+            inline=True
+        )
         
-        await ctx.send(embed=embed)
+        histogram = summary['histogram']
+        peak = max(count for _, count in histogram) or 1
+        label_width = max(len(label) for label, _ in histogram)
+        rows = [
+            f"{label:>{label_width}} {'█' * round(DICE_BAR_WIDTH * count / peak):<{DICE_BAR_WIDTH}} {count * 100 / summary['trials']:4.1f}%"
+            for label, count in histogram
+        ]
+        embed.add_field(name="Distribution", value="```\n" + "\n".join(rows) + "\n```", inline=False)
+        embed.set_footer(text=f"{summary['trials']:,} simulated rolls")
+        return embed
 
     @commands.hybrid_command(name='coinflip', description='Flips a coin.')
     async def coinflip(self, ctx):
@@ -48,17 +131,7 @@ class Fun(commands.Cog):
     @commands.hybrid_command(name='8ball', description='Ask the magic 8-ball a question.')
     async def eightball(self, ctx, *, question: str):
         """Ask the magic 8-ball a question."""
-        responses = [
-            "It is certain.", "Reply hazy, try again.", "Don't count on it.",
-            "It is decidedly so.", "Ask again later.", "My reply is no.",
-            "Without a doubt.", "Better not tell you now.", "My sources say no.",
-            "Yes definitely.", "Cannot predict now.", "Outlook not so good.",
-            "You may rely on it.", "Concentrate and ask again.", "Very doubtful.",
-            "As I see it, yes.", "Most likely.", "Outlook good.",
-            "Yes.", "Signs point to yes."
-        ]
-        
-        response = random.choice(responses)
+        response = draw_content('8ball', ctx.guild.id if ctx.guild else ctx.channel.id)
         
         embed = discord.Embed(
             title="🎱 Magic 8-Ball",
@@ -72,20 +145,7 @@ class Fun(commands.Cog):
     @commands.hybrid_command(name='joke', description='Tells a random joke.')
     async def joke(self, ctx):
         """Tells a random joke."""
-        jokes = [
-            "Why don't scientists trust atoms? Because they make up everything!",
-            "Why did the scarecrow win an award? He was outstanding in his field!",
-            "Why don't programmers like nature? It has too many bugs.",
-            "How do you organize a space party? You planet!",
-            "Why did the math book look so sad? Because it had too many problems!",
-            "What do you call a fake noodle? An impasta!",
-            "Why did the bicycle fall over? Because it was two tired!",
-            "What do you call a bear with no teeth? A gummy bear!",
-            "Why don't eggs tell jokes? They'd crack each other up!",
-            "What's the best thing about Switzerland? I don't know, but the flag is a big plus."
-        ]
-        
-        joke = random.choice(jokes)
+        joke = draw_content('jokes', ctx.guild.id if ctx.guild else ctx.channel.id)
         
         embed = discord.Embed(
             title="😂 Random Joke",
@@ -133,20 +193,7 @@ class Fun(commands.Cog):
     @commands.hybrid_command(name='fact', description='Shares a random fun fact.')
     async def fact(self, ctx):
         """Shares a random fun fact."""
-        facts = [
-            "Honey never spoils. Archaeologists have found pots of honey in ancient Egyptian tombs that are over 3,000 years old and still edible.",
-            "Octopuses have three hearts and blue blood.",
-            "Bananas are berries, but strawberries aren't.",
-            "A group of flamingos is called a 'flamboyance'.",
-            "The shortest war in history lasted only 38-45 minutes.",
-            "Dolphins have names for each other.",
-            "A day on Venus is longer than its year.",
-            "Wombat poop is cube-shaped.",
-            "Penguins can jump 6 feet in the air.",
-            "The human brain uses about 20% of the body's total energy."
-        ]
-        
-        fact = random.choice(facts)
+        fact = draw_content('facts', ctx.guild.id if ctx.guild else ctx.channel.id)
         
         embed = discord.Embed(
             title="🧠 Fun Fact",
@@ -1,14 +1,136 @@
 # cogs/games.py
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+import logging
 import random
 import asyncio
+import time
+import typing
+
+from utils.coins import MAX_FLIPS, RUN_BUCKETS, expected_longest_streak, flip_summary
+from utils.offload import offloaded
+from utils.sessions import SessionError, SessionManager
+from utils.components import disabled_copy, get_components, stateless_view
+from utils.content import draw as draw_content
+from utils.ledger import BEST_STREAK, LOSSES, POINTS, STREAK, TIES, WINS, GameLedger
+from utils.trivia import DIFFICULTIES, LETTERS, open_default_pack, trivia_bank
+
+logger = logging.getLogger(__name__)
+
+
+@offloaded('processes', size=lambda times: times)
+def flip_coins(times):
+    """Return the flip_summary() of `times` coin flips."""
+    return flip_summary(times)
+
+
+FLIP_BAR_WIDTH = 20
+
+TRIVIA_ANSWER_TIME = 30  # Seconds to answer a trivia question
+TRIVIA_LABELS = ["🅰️", "🅱️", "©️", "🇩"]
+LEDGER_FLUSH_INTERVAL = 5  # Seconds between writing changed game results to disk
+LEDGER_GAMES = {
+    'rps': "Rock Paper Scissors", 'guess': "Number Guessing", 'slots': "Slot Machine",
+    'hangman': "Hangman", 'trivia': "Trivia Rounds",
+}
+RPS_POINTS = {'win': 10, 'tie': 2, 'loss': 0}
+SLOTS_POINTS = {"💎": 500, "⭐": 200}  # Three of a kind; any other triple pays SLOTS_TRIPLE_POINTS
+SLOTS_TRIPLE_POINTS = 100
+SLOTS_PAIR_POINTS = 10
+GUESS_ATTEMPTS = 7  # Enough to always win by halving the range
+GUESS_POINTS = 100
+GUESS_ATTEMPT_PENALTY = 10
+HANGMAN_LIVES = 6
+HANGMAN_POINTS = 50
+HANGMAN_MISS_PENALTY = 5
+TRIVIA_ROUND_TIME = 20  # Seconds per question in a trivia round
+TRIVIA_ROUND_POINTS = 10  # Per correct answer
+MAX_TRIVIA_ROUNDS = 20
+
+
+class GuessSession:
+    __slots__ = ('guild_id', 'channel_id', 'owner_id', 'secret', 'low', 'high', 'attempts')
+
+    def __init__(self, guild_id, channel_id, owner_id, secret):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.owner_id = owner_id
+        self.secret = secret
+        self.low = 1
+        self.high = 100
+        self.attempts = 0
+
+
+def letter_bit(letter):
+    """Hangman's bit for a letter (bit 0 = 'a'), or 0 for anything outside a-z."""
+    return 1 << (ord(letter) - ord('a')) if 'a' <= letter <= 'z' else 0
+
+
+class HangmanSession:
+    __slots__ = ('guild_id', 'channel_id', 'owner_id', 'word', 'letters', 'guessed', 'misses')
+
+    def __init__(self, guild_id, channel_id, owner_id, word):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.owner_id = owner_id
+        self.word = word
+        # Letters as bitmasks; spaces, hyphens and accented letters are shown from the start
+        self.letters = 0
+        for letter in set(word):
+            self.letters |= letter_bit(letter)
+        self.guessed = 0
+        self.misses = 0
+
+
+class TriviaRound:
+    __slots__ = ('guild_id', 'channel_id', 'owner_id', 'rounds', 'round', 'question', 'message_id', 'answered', 'scores')
+
+    def __init__(self, guild_id, channel_id, owner_id, rounds):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.owner_id = owner_id
+        self.rounds = rounds
+        self.round = 0
+        self.question = None  # The open question, or None between questions
+        self.message_id = None
+        self.answered = set()  # Users who answered the open question
+        self.scores = {}
+
 
 class Games(commands.Cog):
     """Simple games to play in Discord."""
 
     def __init__(self, bot):
         self.bot = bot
+        self.ledger = GameLedger()
+        self.sessions = SessionManager(self.session_expired)
+
+    async def cog_load(self):
+        if trivia_bank.pack is None:
+            trivia_bank.swap(await asyncio.to_thread(open_default_pack))
+        await asyncio.to_thread(self.ledger.open)
+        # Version 2 dropped the answer from the custom_id
+        get_components().register('trivia', self.trivia_answer, version=2)
+        get_components().register('trivia_round', self.trivia_round_answer)
+        self.ledger_loop.start()
+
+    async def cog_unload(self):
+        get_components().unregister('trivia')
+        get_components().unregister('trivia_round')
+        self.sessions.close()
+        self.ledger_loop.cancel()
+        await self.ledger.flush()
+        self.ledger.close()
+
+    @tasks.loop(seconds=LEDGER_FLUSH_INTERVAL)
+    async def ledger_loop(self):
+        await self.ledger.flush()
+
+    def record_result(self, guild, user_id, game, outcome, points):
+        """Adds a result to the ledger and returns a footer line describing it."""
+        row = self.ledger.record(guild.id if guild else 0, user_id, game, outcome, points)
+        streak = f" · 🔥 {row[STREAK]} win streak" if row[STREAK] > 1 else ""
+        return f"+{points} points · {row[POINTS]:,} total in {LEDGER_GAMES[game]}{streak}"
 
     @commands.hybrid_command(name='rps', description='Play Rock Paper Scissors against the bot.')
     async def rock_paper_scissors(self, ctx, choice: str):
@@ -30,14 +152,17 @@ class Games(commands.Cog):
         # Determine winner
         if choice == bot_choice:
             result = "It's a tie!"
+            outcome = 'tie'
             color = discord.Color.yellow()
         elif (choice == 'rock' and bot_choice == 'scissors') or \
              (choice == 'paper' and bot_choice == 'rock') or \
              (choice == 'scissors' and bot_choice == 'paper'):
             result = "You win! 🎉"
+            outcome = 'win'
             color = discord.Color.green()
         else:
             result = "I win! 😄"
+            outcome = 'loss'
             color = discord.Color.red()
         
         # Emojis for choices
@@ -50,82 +175,172 @@ class Games(commands.Cog):
         embed.add_field(name="Your choice", value=f"{emoji_map[choice]} {choice.title()}", inline=True)
         embed.add_field(name="My choice", value=f"{emoji_map[bot_choice]} {bot_choice.title()}", inline=True)
         embed.add_field(name="Result", value=result, inline=False)
+        embed.set_footer(text=self.record_result(ctx.guild, ctx.author.id, 'rps', outcome, RPS_POINTS[outcome]))
         
         await ctx.send(embed=embed)
 
-    @commands.hybrid_command(name='guess', description='Guess a number between 1 and 100.')
-    async def guess_number(self, ctx, number: int):
-        """Guess a number between 1 and 100."""
-        if number < 1 or number > 100:
+    @commands.hybrid_command(name='guess', description='Guess my number between 1 and 100 with higher/lower hints.')
+    @commands.guild_only()
+    async def guess_number(self, ctx, number: int = None):
+        """Starts a number guessing game in this channel, or makes a guess in the running one."""
+        session = self.sessions.get(ctx.channel.id)
+        if session is not None and not isinstance(session, GuessSession):
+            await ctx.send("Another game is running in this channel! Use `endgame` to stop it.", ephemeral=True)
+            return
+        if number is not None and (number < 1 or number > 100):
             await ctx.send("Please guess a number between 1 and 100!", ephemeral=True)
             return
         
-        bot_number = random.randint(1, 100)
-        difference = abs(number - bot_number)
+        if session is None:
+            try:
+                session = self.sessions.start(GuessSession(ctx.guild.id, ctx.channel.id, ctx.author.id, random.randint(1, 100)))
+            except SessionError as e:
+                await ctx.send(str(e), ephemeral=True)
+                return
+            if number is None:
+                embed = discord.Embed(
+                    title="🔢 Number Guessing Game",
+                    description=f"I'm thinking of a number between 1 and 100. You have {GUESS_ATTEMPTS} guesses — use `guess <number>`!",
+                    color=discord.Color.blue()
+                )
+                await ctx.send(embed=embed)
+                return
+        elif number is None:
+            await ctx.send(f"A game is already running! Guess a number between {session.low} and {session.high}.", ephemeral=True)
+            return
+        
+        session.attempts += 1
+        difference = abs(number - session.secret)
+        embed = discord.Embed(title="🔢 Number Guessing Game")
+        embed.add_field(name="Your guess", value=number, inline=True)
         
         if difference == 0:
-            result = "🎯 Perfect! You guessed it exactly!"
-            color = discord.Color.gold()
-        elif difference <= 5:
-            result = "🔥 Very close! You're burning hot!"
-            color = discord.Color.red()
-        elif difference <= 10:
-            result = "🌡️ Close! You're getting warm!"
-            color = discord.Color.orange()
-        elif difference <= 20:
-            result = "❄️ Not bad, but you're getting cold..."
-            color = discord.Color.blue()
+            self.sessions.end(session)
+            points = GUESS_POINTS - GUESS_ATTEMPT_PENALTY * (session.attempts - 1)
+            embed.description = f"🎯 {ctx.author.mention} got it in {session.attempts} guess{'es' if session.attempts > 1 else ''}!"
+            embed.color = discord.Color.gold()
+            embed.set_footer(text=self.record_result(ctx.guild, ctx.author.id, 'guess', 'win', points))
+        elif session.attempts >= GUESS_ATTEMPTS:
+            self.sessions.end(session)
+            embed.description = f"💀 Out of guesses! My number was **{session.secret}**."
+            embed.color = discord.Color.dark_red()
+            embed.set_footer(text=self.record_result(ctx.guild, ctx.author.id, 'guess', 'loss', 0))
         else:
-            result = "🧊 Way off! You're freezing!"
-            color = discord.Color.dark_blue()
+            self.sessions.touch(session)
+            if number < session.secret:
+                session.low = max(session.low, number + 1)
+            else:
+                session.high = min(session.high, number - 1)
+            if difference <= 5:
+                warmth, embed.color = "🔥 You're burning hot!", discord.Color.red()
+            elif difference <= 10:
+                warmth, embed.color = "🌡️ You're getting warm!", discord.Color.orange()
+            elif difference <= 20:
+                warmth, embed.color = "❄️ You're getting cold...", discord.Color.blue()
+            else:
+                warmth, embed.color = "🧊 You're freezing!", discord.Color.dark_blue()
+            direction = "📈 Higher!" if number < session.secret else "📉 Lower!"
+            embed.description = f"{direction} {warmth}"
+            embed.add_field(name="Range", value=f"{session.low}–{session.high}", inline=True)
+            embed.add_field(name="Guesses left", value=GUESS_ATTEMPTS - session.attempts, inline=True)
         
-        embed = discord.Embed(
-            title="🔢 Number Guessing Game",
-            color=color
-        )
-        embed.add_field(name="Your guess", value=number, inline=True)
-        embed.add_field(name="My number", value=bot_number, inline=True)
-        embed.add_field(name="Result", value=result, inline=False)
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name='hangman', description='Play hangman: start a game, then guess letters or the word.')
+    @commands.guild_only()
+    async def hangman(self, ctx, guess: str = None):
+        """Starts a hangman game in this channel, or guesses a letter or the whole word."""
+        session = self.sessions.get(ctx.channel.id)
+        if session is not None and not isinstance(session, HangmanSession):
+            await ctx.send("Another game is running in this channel! Use `endgame` to stop it.", ephemeral=True)
+            return
+        
+        if session is None:
+            word = draw_content('hangman', ctx.guild.id).lower()
+            if not any(map(letter_bit, word)):
+                await ctx.send("The hangman word list needs words with letters a–z in them!", ephemeral=True)
+                return
+            try:
+                session = self.sessions.start(HangmanSession(ctx.guild.id, ctx.channel.id, ctx.author.id, word))
+            except SessionError as e:
+                await ctx.send(str(e), ephemeral=True)
+                return
+            if guess is None:
+                await ctx.send(embed=self.hangman_embed(session, "Guess a letter with `hangman <letter>`, or the word if you know it!"))
+                return
+        elif guess is None:
+            await ctx.send(embed=self.hangman_embed(session, "A game is already running!"))
+            return
+        
+        guess = guess.strip().lower()
+        if not guess or (len(guess) == 1 and not letter_bit(guess)):
+            await ctx.send("Guess a letter (a–z) or the whole word!", ephemeral=True)
+            return
+        
+        if len(guess) == 1:
+            bit = letter_bit(guess)
+            if session.guessed & bit:
+                await ctx.send(f"`{guess}` has already been guessed!", ephemeral=True)
+                return
+            session.guessed |= bit
+            correct = guess in session.word
+            message = f"✅ `{guess}` is in the word!" if correct else f"❌ No `{guess}`."
+        else:
+            correct = guess == session.word
+            if correct:
+                session.guessed |= session.letters
+            message = "🎯 That's the word!" if correct else f"❌ It's not `{guess}`."
+        if not correct:
+            session.misses += 1
+        
+        if session.guessed & session.letters == session.letters:
+            self.sessions.end(session)
+            points = HANGMAN_POINTS - HANGMAN_MISS_PENALTY * session.misses
+            embed = self.hangman_embed(session, f"{message} {ctx.author.mention} solved it!", discord.Color.gold())
+            embed.set_footer(text=self.record_result(ctx.guild, ctx.author.id, 'hangman', 'win', points))
+        elif session.misses >= HANGMAN_LIVES:
+            self.sessions.end(session)
+            embed = self.hangman_embed(session, f"{message} 💀 Out of lives! The word was **{session.word}**.", discord.Color.dark_red())
+            embed.set_footer(text=self.record_result(ctx.guild, ctx.author.id, 'hangman', 'loss', 0))
+        else:
+            self.sessions.touch(session)
+            embed = self.hangman_embed(session, message)
         
         await ctx.send(embed=embed)
 
+    def hangman_embed(self, session, message, color=None):
+        shown = " ".join(
+            "\\_" if letter_bit(letter) & ~session.guessed else letter if letter != " " else "  "
+            for letter in session.word
+        )
+        wrong = [chr(ord('a') + index) for index in range(26) if session.guessed >> index & 1 and chr(ord('a') + index) not in session.word]
+        embed = discord.Embed(
+            title="🪢 Hangman",
+            description=f"{message}\n\n**{shown}**",
+            color=color or discord.Color.blue()
+        )
+        embed.add_field(name="Lives", value="❤️" * (HANGMAN_LIVES - session.misses) + "🖤" * session.misses, inline=True)
+        if wrong:
+            embed.add_field(name="Wrong letters", value=" ".join(wrong), inline=True)
+        return embed
+
     @commands.hybrid_command(name='trivia', description='Answer a random trivia question.')
-    async def trivia(self, ctx):
-        """Answer a random trivia question."""
-        questions = [
-            {
-                "question": "What is the capital of France?",
-                "options": ["A) London", "B) Berlin", "C) Paris", "D) Madrid"],
-                "answer": "C",
-                "explanation": "Paris is the capital and largest city of France."
-            },
-            {
-                "question": "How many continents are there?",
-                "options": ["A) 5", "B) 6", "C) 7", "D) 8"],
-                "answer": "C",
-                "explanation": "There are 7 continents: Africa, Antarctica, Asia, Europe, North America, Australia/Oceania, and South America."
-            },
-            {
-                "question": "What is the largest planet in our solar system?",
-                "options": ["A) Earth", "B) Jupiter", "C) Saturn", "D) Neptune"],
-                "answer": "B",
-                "explanation": "Jupiter is the largest planet in our solar system."
-            },
-            {
-                "question": "Who painted the Mona Lisa?",
-                "options": ["A) Van Gogh", "B) Picasso", "C) Da Vinci", "D) Monet"],
-                "answer": "C",
-                "explanation": "Leonardo da Vinci painted the Mona Lisa between 1503-1519."
-            },
-            {
-                "question": "What is the smallest ocean?",
-                "options": ["A) Atlantic", "B) Pacific", "C) Indian", "D) Arctic"],
-                "answer": "D",
-                "explanation": "The Arctic Ocean is the smallest ocean."
-            }
-        ]
+    async def trivia(self, ctx, difficulty: typing.Optional[typing.Literal['easy', 'medium', 'hard']] = None,
+                     *, category: str = None):
+        """Answer a random trivia question, e.g. `trivia`, `trivia hard` or `trivia easy science`."""
+        pack = trivia_bank.pack
+        category_id = None
+        if category:
+            category_id = pack.category_id(category)
+            if category_id is None:
+                await ctx.send(f"Unknown category! Try one of: {', '.join(pack.categories)}", ephemeral=True)
+                return
         
-        question_data = random.choice(questions)
+        difficulty_id = DIFFICULTIES.index(difficulty) if difficulty else None
+        question_data, remaining = trivia_bank.draw(ctx.channel.id, category_id, difficulty_id)
+        if question_data is None:
+            await ctx.send("No questions match those filters!", ephemeral=True)
+            return
         
         embed = discord.Embed(
             title="🧠 Trivia Question",
@@ -133,83 +348,260 @@ class Games(commands.Cog):
             color=discord.Color.blue()
         )
         
-        options_text = "\n".join(question_data["options"])
+        options_text = "\n".join(f"{letter}) {option}" for letter, option in zip(LETTERS, question_data["options"]))
         embed.add_field(name="Options", value=options_text, inline=False)
-        embed.set_footer(text="React with 🅰️, 🅱️, ©️, or 🇩 to answer!")
-        
-        message = await ctx.send(embed=embed)
-        
-        # Add reaction options
-        reactions = ["🅰️", "🅱️", "©️", "🇩"]
-        for reaction in reactions:
-            await message.add_reaction(reaction)
+        embed.set_footer(
+            text=f"{question_data['category']} • {question_data['difficulty'].title()} • "
+                 f"{TRIVIA_ANSWER_TIME}s to answer ({remaining} left before repeats)"
+        )
         
-        # Wait for user reaction
-        def check(reaction, user):
-            return user == ctx.author and str(reaction.emoji) in reactions and reaction.message.id == message.id
+        # The signed custom_ids carry who may answer and until when, but not the answer,
+        # which anyone could read from the message; the handler looks it up in the pack
+        expires = int(time.time()) + TRIVIA_ANSWER_TIME
+        components = get_components()
+        buttons = [
+            discord.ui.Button(
+                emoji=TRIVIA_LABELS[choice],
+                style=discord.ButtonStyle.secondary,
+                custom_id=components.custom_id(
+                    'trivia', trivia_bank.pack.tag, question_data['id'], choice, ctx.author.id, expires
+                )
+            )
+            for choice in range(len(question_data['options']))
+        ]
+        await ctx.send(embed=embed, view=stateless_view(*buttons))
+
+    async def trivia_answer(self, interaction, fields):
+        """Handles a trivia button, from this session or from before a restart."""
+        pack_tag, question_id, choice, author_id, expires = fields
+        if interaction.user.id != author_id:
+            await interaction.response.send_message("This question belongs to someone else!", ephemeral=True)
+            return
         
-        try:
-            reaction, user = await self.bot.wait_for('reaction_add', timeout=30.0, check=check)
-            
-            # Map reactions to letters
-            reaction_map = {"🅰️": "A", "🅱️": "B", "©️": "C", "🇩": "D"}
-            user_answer = reaction_map[str(reaction.emoji)]
-            
-            # Check if correct
-            if user_answer == question_data["answer"]:
+        # Only the pack that asked the question can say what its answer is
+        pack = trivia_bank.pack
+        if pack is None or pack.tag != pack_tag or question_id >= len(pack):
+            result_embed = discord.Embed(
+                title="⏰ Question Expired",
+                description="The trivia questions were reloaded since this was asked.",
+                color=discord.Color.orange()
+            )
+            question_data = None
+        else:
+            question_data = pack.question(question_id)
+            correct = question_data["answer"]
+            answer = LETTERS[correct]
+            if time.time() > expires:
+                result_embed = discord.Embed(
+                    title="⏰ Time's Up!",
+                    description=f"You didn't answer in time. The correct answer was {answer}.",
+                    color=discord.Color.orange()
+                )
+            elif choice == correct:
                 result_embed = discord.Embed(
                     title="✅ Correct!",
-                    description=f"Great job! The answer was {question_data['answer']}.",
+                    description=f"Great job! The answer was {answer}.",
                     color=discord.Color.green()
                 )
             else:
                 result_embed = discord.Embed(
                     title="❌ Incorrect",
-                    description=f"Sorry! The correct answer was {question_data['answer']}.",
+                    description=f"Sorry! The correct answer was {answer}.",
                     color=discord.Color.red()
                 )
-            
+        
+        if question_data is not None and question_data["explanation"]:
             result_embed.add_field(name="Explanation", value=question_data["explanation"], inline=False)
-            await ctx.send(embed=result_embed)
-            
-        except asyncio.TimeoutError:
-            timeout_embed = discord.Embed(
-                title="⏰ Time's Up!",
-                description=f"You didn't answer in time. The correct answer was {question_data['answer']}.",
-                color=discord.Color.orange()
+        
+        # One response edits the question in place and disables its buttons
+        await interaction.response.edit_message(
+            embeds=[*interaction.message.embeds[:1], result_embed],
+            view=disabled_copy(interaction.message.components)
+        )
+
+    @commands.hybrid_command(name='trivia_round', description='Start a multiplayer trivia round: first correct answer scores.')
+    @commands.guild_only()
+    async def trivia_round(self, ctx, rounds: int = 5):
+        """Starts a multiplayer trivia game; everyone in the channel can answer."""
+        if not 1 <= rounds <= MAX_TRIVIA_ROUNDS:
+            await ctx.send(f"Please choose between 1 and {MAX_TRIVIA_ROUNDS} questions!", ephemeral=True)
+            return
+        
+        try:
+            session = self.sessions.start(TriviaRound(ctx.guild.id, ctx.channel.id, ctx.author.id, rounds))
+        except SessionError as e:
+            await ctx.send(str(e), ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title="🧠 Trivia Round",
+            description=(
+                f"{rounds} question{'s' if rounds > 1 else ''}, {TRIVIA_ROUND_TIME}s each. "
+                "The first correct answer scores; one answer per person per question!"
+            ),
+            color=discord.Color.blue()
+        )
+        await ctx.send(embed=embed)
+        await self.ask_trivia_round(session)
+
+    def trivia_round_view(self, round_number, option_count, disabled=False):
+        components = get_components()
+        return stateless_view(*(
+            discord.ui.Button(
+                emoji=TRIVIA_LABELS[choice], style=discord.ButtonStyle.secondary, disabled=disabled,
+                custom_id=components.custom_id('trivia_round', round_number, choice)
             )
-            timeout_embed.add_field(name="Explanation", value=question_data["explanation"], inline=False)
-            await ctx.send(embed=timeout_embed)
+            for choice in range(option_count)
+        ))
 
-    @commands.hybrid_command(name='flip', description='Flip a coin multiple times.')
-    async def multi_flip(self, ctx, times: int = 1):
-        """Flip a coin multiple times."""
-        if times < 1 or times > 20:
-            await ctx.send("Please flip between 1 and 20 times!", ephemeral=True)
+    async def ask_trivia_round(self, session):
+        """Posts the next question of a round, or the final scores after the last one."""
+        if self.sessions.get(session.channel_id) is not session:
+            return  # Ended with `endgame` in the meantime
+        if session.round >= session.rounds:
+            await self.finish_trivia_round(session)
             return
         
-        results = []
-        heads_count = 0
-        tails_count = 0
+        # Hold off the old timer while the question is being posted
+        self.sessions.touch(session, TRIVIA_ROUND_TIME)
+        question_data, _ = trivia_bank.draw(session.channel_id)
+        round_number = session.round + 1
         
-        for i in range(times):
-            result = random.choice(["Heads", "Tails"])
-            results.append(result)
-            if result == "Heads":
-                heads_count += 1
-            else:
-                tails_count += 1
+        embed = discord.Embed(
+            title=f"🧠 Question {round_number}/{session.rounds}",
+            description=question_data["question"],
+            color=discord.Color.blue()
+        )
+        options_text = "\n".join(f"{letter}) {option}" for letter, option in zip(LETTERS, question_data["options"]))
+        embed.add_field(name="Options", value=options_text, inline=False)
+        embed.set_footer(text=f"{question_data['category']} • {question_data['difficulty'].title()} • {TRIVIA_ROUND_TIME}s to answer")
+        
+        message = await self.bot.get_partial_messageable(session.channel_id).send(
+            embed=embed, view=self.trivia_round_view(round_number, len(question_data['options']))
+        )
+        session.round = round_number
+        session.question = question_data
+        session.message_id = message.id
+        session.answered = set()
+        self.sessions.touch(session, TRIVIA_ROUND_TIME)
+
+    async def trivia_round_answer(self, interaction, fields):
+        """Handles an answer button in a multiplayer trivia round."""
+        round_number, choice = fields
+        session = self.sessions.get(interaction.channel_id)
+        if not isinstance(session, TriviaRound) or session.round != round_number or session.question is None:
+            await interaction.response.send_message("This question is closed.", ephemeral=True)
+            return
+        if interaction.user.id in session.answered:
+            await interaction.response.send_message("You already answered this question!", ephemeral=True)
+            return
+        
+        session.answered.add(interaction.user.id)
+        answer = session.question['answer']
+        if choice != answer:
+            await interaction.response.send_message("❌ Not quite! You're out for this question.", ephemeral=True)
+            return
+        
+        session.scores[interaction.user.id] = session.scores.get(interaction.user.id, 0) + 1
+        result_embed = discord.Embed(
+            title="✅ Correct!",
+            description=f"{interaction.user.mention} got it: the answer was {LETTERS[answer]}.",
+            color=discord.Color.green()
+        )
+        if session.question['explanation']:
+            result_embed.add_field(name="Explanation", value=session.question['explanation'], inline=False)
+        session.question = None
+        self.sessions.touch(session, TRIVIA_ROUND_TIME)
+        await interaction.response.edit_message(
+            embeds=[*interaction.message.embeds[:1], result_embed],
+            view=disabled_copy(interaction.message.components)
+        )
+        await self.ask_trivia_round(session)
+
+    async def finish_trivia_round(self, session):
+        self.sessions.end(session)
+        guild = self.bot.get_guild(session.guild_id)
+        ranking = sorted(session.scores.items(), key=lambda item: item[1], reverse=True)
+        
+        embed = discord.Embed(title="🏁 Trivia Round Over", color=discord.Color.gold())
+        if ranking:
+            best = ranking[0][1]
+            medals = ["🥇", "🥈", "🥉"]
+            embed.description = "\n".join(
+                f"{medals[index] if index < 3 else f'`#{index + 1}`'} <@{user_id}> — **{score}**/{session.rounds}"
+                for index, (user_id, score) in enumerate(ranking[:10])
+            )
+            for user_id, score in ranking:
+                self.record_result(guild, user_id, 'trivia', 'win' if score == best else 'loss', score * TRIVIA_ROUND_POINTS)
+        else:
+            embed.description = "Nobody scored this time!"
+        
+        await self.bot.get_partial_messageable(session.channel_id).send(
+            embed=embed, allowed_mentions=discord.AllowedMentions.none()
+        )
+
+    async def session_expired(self, session):
+        """Runs when a game's timer runs out: next question for trivia rounds, otherwise the game ends."""
+        channel = self.bot.get_partial_messageable(session.channel_id)
+        if isinstance(session, TriviaRound):
+            if session.question is not None:
+                question, session.question = session.question, None
+                try:
+                    await channel.get_partial_message(session.message_id).edit(
+                        view=self.trivia_round_view(session.round, len(question['options']), disabled=True)
+                    )
+                except discord.HTTPException:
+                    pass
+                await channel.send(f"⏰ Time's up! The answer was **{LETTERS[question['answer']]}) {question['options'][question['answer']]}**.")
+            await self.ask_trivia_round(session)
+            return
+        
+        self.sessions.end(session)
+        if isinstance(session, GuessSession):
+            reveal = f"My number was **{session.secret}**."
+        else:
+            reveal = f"The word was **{session.word}**."
+        await channel.send(f"⌛ The game timed out after {self.sessions.timeout // 60} minutes without a move. {reveal}")
+
+    @commands.hybrid_command(name='endgame', description='Ends the game running in this channel.')
+    @commands.guild_only()
+    async def endgame(self, ctx):
+        """Ends this channel's game; only its starter or someone who can manage messages may."""
+        session = self.sessions.get(ctx.channel.id)
+        if session is None:
+            await ctx.send("No game is running in this channel.", ephemeral=True)
+            return
+        if ctx.author.id != session.owner_id and not ctx.channel.permissions_for(ctx.author).manage_messages:
+            await ctx.send("Only the player who started the game can end it.", ephemeral=True)
+            return
+        
+        self.sessions.end(session)
+        await ctx.send("🛑 Game ended.")
+
+    @commands.hybrid_command(name='flip', description='Flip a coin many times (up to 10 billion).')
+    async def multi_flip(self, ctx, times: int = 1):
+        """Flip a coin multiple times and summarize the results."""
+        if times < 1 or times > MAX_FLIPS:
+            await ctx.send(f"Please flip between 1 and {MAX_FLIPS:,} times!", ephemeral=True)
+            return
+        
+        summary = await flip_coins(times)
+        heads_count, tails_count = summary['heads'], summary['tails']
         
         embed = discord.Embed(
-            title=f"🪙 Coin Flip × {times}",
+            title=f"🪙 Coin Flip × {times:,}",
             color=discord.Color.gold()
         )
         
         if times <= 10:
-            results_text = " → ".join(results)
+            results_text = " → ".join("Heads" if flip else "Tails" for flip in summary['first'])
             embed.add_field(name="Results", value=results_text, inline=False)
         
-        embed.add_field(name="Summary", value=f"Heads: {heads_count}\nTails: {tails_count}", inline=True)
+        embed.add_field(
+            name="Summary",
+            value=f"Heads: {heads_count:,} ({heads_count * 100 / times:.2f}%)\nTails: {tails_count:,} ({tails_count * 100 / times:.2f}%)",
+            inline=True
+        )
         
         if heads_count > tails_count:
             embed.add_field(name="Winner", value="🏆 Heads!", inline=True)
@@ -218,8 +610,34 @@ class Games(commands.Cog):
         else:
             embed.add_field(name="Winner", value="🤝 It's a tie!", inline=True)
         
+        if times > 10:
+            # How unusual the split is, in standard deviations of the binomial distribution
+            deviation = (heads_count - times / 2) / (times ** 0.5 / 2)
+            embed.add_field(name="Deviation", value=f"{deviation:+.2f}σ from an even split", inline=True)
+            
+            if summary['longest'] is not None:
+                tails_streak, heads_streak = summary['longest']
+                streaks = f"Heads: {heads_streak:,}\nTails: {tails_streak:,}"
+            else:
+                streaks = f"≈{expected_longest_streak(times)} each (expected)"
+            embed.add_field(name="Longest Streaks", value=streaks, inline=True)
+            
+            rows = [self.flip_bar("Heads", heads_count, times), self.flip_bar("Tails", tails_count, times)]
+            if summary['runs'] is not None:
+                total_runs = sum(summary['runs'])
+                rows.append("")
+                rows.append("Run length")
+                for length, count in enumerate(summary['runs'], 1):
+                    label = f"{length}+" if length == RUN_BUCKETS else str(length)
+                    rows.append(self.flip_bar(label, count, total_runs))
+            embed.add_field(name="Histogram", value="```\n" + "\n".join(rows) + "\n```", inline=False)
+        
         await ctx.send(embed=embed)
 
+    def flip_bar(self, label, count, total):
+        filled = round(FLIP_BAR_WIDTH * count / total) if total else 0
+        return f"{label:>5} {'█' * filled:<{FLIP_BAR_WIDTH}} {count * 100 / total if total else 0:5.1f}%"
+
     @commands.hybrid_command(name='slots', description='Play a simple slot machine game.')
     @commands.cooldown(1, 5, commands.BucketType.user)
     async def slots(self, ctx):
@@ -240,11 +658,14 @@ class Games(commands.Cog):
             else:
                 win_type = "WIN! 🎉"
                 color = discord.Color.green()
+            points = SLOTS_POINTS.get(result[0], SLOTS_TRIPLE_POINTS)
         elif result[0] == result[1] or result[1] == result[2] or result[0] == result[2]:
             win_type = "Small win! 👍"
+            points = SLOTS_PAIR_POINTS
             color = discord.Color.blue()
         else:
             win_type = "Try again! 😅"
+            points = 0
             color = discord.Color.red()
         
         embed = discord.Embed(
@@ -255,9 +676,60 @@ class Games(commands.Cog):
         slots_display = f"[ {result[0]} | {result[1]} | {result[2]} ]"
         embed.add_field(name="Result", value=slots_display, inline=False)
         embed.add_field(name="Outcome", value=win_type, inline=False)
+        embed.set_footer(text=self.record_result(ctx.guild, ctx.author.id, 'slots', 'win' if points else 'loss', points))
+        
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name='gamestats', description='Shows game points, wins and streaks for a member.')
+    async def gamestats(self, ctx, member: discord.Member = None):
+        """Shows a member's points, wins, losses and streaks for each game."""
+        member = member or ctx.author
+        guild_id = ctx.guild.id if ctx.guild else 0
+        games, total, rank = self.ledger.stats(guild_id, member.id)
+        if not games:
+            await ctx.send(f"{member.display_name} hasn't played any games yet!", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title=f"🏆 Game Stats for {member.display_name}",
+            description=f"**{total:,}** points" + (f" · Rank #{rank}" if rank else ""),
+            color=discord.Color.gold()
+        )
+        for game, row in sorted(games.items()):
+            embed.add_field(
+                name=LEDGER_GAMES.get(game, game),
+                value=(
+                    f"Points: {row[POINTS]:,}\n"
+                    f"W/L/T: {row[WINS]:,}/{row[LOSSES]:,}/{row[TIES]:,}\n"
+                    f"Streak: {row[STREAK]} (best {row[BEST_STREAK]})"
+                ),
+                inline=True
+            )
         
         await ctx.send(embed=embed)
 
+    @commands.hybrid_command(name='leaderboard', description='Shows the top players, overall or for one game.')
+    async def leaderboard(self, ctx, game: typing.Optional[typing.Literal['rps', 'guess', 'slots', 'hangman', 'trivia']] = None):
+        """Shows the ten members with the most game points."""
+        guild_id = ctx.guild.id if ctx.guild else 0
+        top = self.ledger.top(guild_id, game)
+        if not top:
+            await ctx.send("Nobody has played yet!", ephemeral=True)
+            return
+        
+        medals = ["🥇", "🥈", "🥉"]
+        lines = [
+            f"{medals[index] if index < 3 else f'`#{index + 1}`'} <@{user_id}> — **{points:,}** points"
+            for index, (user_id, points) in enumerate(top)
+        ]
+        embed = discord.Embed(
+            title=f"🏆 Leaderboard — {LEDGER_GAMES[game] if game else 'All Games'}",
+            description="\n".join(lines),
+            color=discord.Color.gold()
+        )
+        
+        await ctx.send(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
 async def setup(bot):
     """Adds the Games cog to the bot."""
     await bot.add_cog(Games(bot))
@@ -1,14 +1,193 @@
 # cogs/general.py
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import asyncio
+import datetime
+import logging
 import random
+import time
+
+from utils.components import get_components, stateless_view
+from utils.polls import MAX_OPTIONS, YES_NO, Debouncer, Poll, PollStore
+from utils.snapshots import SnapshotCache
+from utils.storage import data_path, load_json, save_json
+from utils.timeparse import TimeParseError, format_duration, parse_duration
+
+logger = logging.getLogger(__name__)
+
+AFK_FILE = data_path("afk.json")
+AFK_NOTICE_COOLDOWN = 60  # Seconds before the same AFK notice repeats in a channel
+AFK_SAVE_INTERVAL = 10  # Seconds between saving a changed AFK registry
+POLL_EDIT_INTERVAL = 5  # Seconds between edits of one poll's results, however fast votes arrive
+POLL_SNAPSHOT_INTERVAL = 15  # Seconds between saving changed polls and closing expired ones
+POLL_MAX_DURATION = 30 * 86400
+POLL_OPTION_LENGTH = 80  # Discord's button label limit
+POLL_BAR_WIDTH = 12
+POLL_VOTERS_SHOWN = 10
+EMBED_DESCRIPTION_LIMIT = 4096
+EMBED_TOTAL_LIMIT = 6000  # Discord rejects embeds whose text adds up to more
 
 class General(commands.Cog):
     """General purpose commands for everyone to use."""
 
     def __init__(self, bot):
         self.bot = bot
+        # (guild_id, user_id) -> (reason, since)
+        self.afk_users = {}
+        # (channel_id, user_id) -> last time an AFK notice was sent
+        self.afk_notices = {}
+        self.afk_dirty = False
+        self.polls = PollStore()
+        # Votes only mark a poll; its message is edited at most once per interval
+        self.poll_edits = Debouncer(POLL_EDIT_INTERVAL, self.edit_poll)
+        # serverinfo/userinfo embeds, dropped by the listeners below when what they show changes
+        self.snapshots = SnapshotCache(getattr(bot, 'perf_tracker', None))
+
+    async def cog_load(self):
+        entries = await asyncio.to_thread(load_json, AFK_FILE, [])
+        self.afk_users = {(guild_id, user_id): (reason, since) for guild_id, user_id, reason, since in entries}
+        await asyncio.to_thread(self.polls.load)
+        get_components().register('poll', self.poll_vote)
+        self.save_afk_loop.start()
+        self.poll_loop.start()
+
+    async def cog_unload(self):
+        get_components().unregister('poll')
+        self.save_afk_loop.cancel()
+        self.poll_loop.cancel()
+        await self.poll_edits.flush()
+        await self.save_afk()
+        await self.save_polls()
+
+    async def save_afk(self):
+        """Write the AFK registry to disk if it changed since the last save."""
+        if not self.afk_dirty:
+            return
+        self.afk_dirty = False
+        entries = [[guild_id, user_id, reason, since] for (guild_id, user_id), (reason, since) in self.afk_users.items()]
+        try:
+            await asyncio.to_thread(save_json, AFK_FILE, entries)
+        except OSError as e:
+            self.afk_dirty = True
+            logger.error(f"Failed to save AFK registry: {e}")
+
+    async def save_polls(self):
+        """Snapshot open polls to disk if they changed since the last save."""
+        if not self.polls.dirty:
+            return
+        snapshot = self.polls.snapshot()
+        try:
+            await asyncio.to_thread(self.polls.save, snapshot)
+        except OSError as e:
+            self.polls.dirty = True
+            logger.error(f"Failed to save polls: {e}")
+
+    @tasks.loop(seconds=AFK_SAVE_INTERVAL)
+    async def save_afk_loop(self):
+        await self.save_afk()
+        # Forget notice cooldowns that have expired so the table stays small
+        cutoff = time.monotonic() - AFK_NOTICE_COOLDOWN
+        self.afk_notices = {key: sent for key, sent in self.afk_notices.items() if sent > cutoff}
+
+    @tasks.loop(seconds=POLL_SNAPSHOT_INTERVAL)
+    async def poll_loop(self):
+        now = time.time()
+        for poll in [poll for poll in self.polls.polls.values() if poll.deadline and poll.deadline <= now]:
+            await self.close_poll(poll)
+        await self.save_polls()
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Clears returning users' AFK status and tells others when they ping someone AFK."""
+        # Nobody is AFK: the common case costs a single truthiness check
+        if not self.afk_users or message.guild is None or message.author.bot:
+            return
+        
+        guild_id = message.guild.id
+        key = (guild_id, message.author.id)
+        entry = self.afk_users.get(key)
+        # Ignore the message that set the status in the first place
+        if entry is not None and message.created_at.timestamp() > entry[1]:
+            del self.afk_users[key]
+            self.afk_dirty = True
+            await message.channel.send(
+                f"👋 Welcome back {message.author.mention}, I removed your AFK status.",
+                delete_after=10
+            )
+        
+        if not message.mentions:
+            return
+        
+        now = time.monotonic()
+        notices = []
+        for user in message.mentions:
+            entry = self.afk_users.get((guild_id, user.id))
+            if entry is None:
+                continue
+            notice_key = (message.channel.id, user.id)
+            if now - self.afk_notices.get(notice_key, -AFK_NOTICE_COOLDOWN) < AFK_NOTICE_COOLDOWN:
+                continue
+            self.afk_notices[notice_key] = now
+            reason, since = entry
+            notices.append(f"💤 **{user.display_name}** is AFK: {reason} (since <t:{int(since)}:R>)")
+        
+        if notices:
+            await message.channel.send(
+                "\n".join(notices),
+                allowed_mentions=discord.AllowedMentions.none()
+            )
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Events missed while disconnected are not replayed after a fresh login
+        self.snapshots.clear()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.snapshots.forget_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before, after):
+        self.snapshots.invalidate(after.id, 'serverinfo')
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.snapshots.invalidate(member.guild.id, 'serverinfo')
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.snapshots.invalidate(member.guild.id, 'serverinfo')
+        self.snapshots.invalidate(member.guild.id, 'userinfo', member.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        self.snapshots.invalidate(after.guild.id, 'userinfo', after.id)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before, after):
+        self.snapshots.invalidate_everywhere('userinfo', after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel):
+        self.snapshots.invalidate(channel.guild.id, 'serverinfo')
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.snapshots.invalidate(channel.guild.id, 'serverinfo')
+
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        self.snapshots.invalidate(role.guild.id, 'serverinfo')
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        # A role's colour or position can change any holder's embed colour and top role
+        self.snapshots.invalidate(after.guild.id, 'userinfo')
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.snapshots.invalidate(role.guild.id, 'serverinfo')
+        self.snapshots.invalidate(role.guild.id, 'userinfo')
 
     @commands.hybrid_command(name='ping', description='Shows bot latency.')
     async def ping(self, ctx):
@@ -25,7 +204,10 @@ class General(commands.Cog):
     async def serverinfo(self, ctx):
         """Shows information about the current server."""
         guild = ctx.guild
-        
+        embed = self.snapshots.get(guild.id, 'serverinfo', guild.id, lambda: self.serverinfo_embed(guild))
+        await ctx.send(embed=embed)
+
+    def serverinfo_embed(self, guild):
         embed = discord.Embed(
             title=f"Server Info: {guild.name}",
             color=discord.Color.blue()
@@ -44,7 +226,7 @@ class General(commands.Cog):
         if guild.description:
             embed.add_field(name="Description", value=guild.description, inline=False)
         
-        await ctx.send(embed=embed)
+        return embed
 
     @commands.hybrid_command(name='userinfo', description='Shows information about a user.')
     async def userinfo(self, ctx, member: discord.Member = None):
@@ -52,6 +234,13 @@ class General(commands.Cog):
         if member is None:
             member = ctx.author
         
+        if ctx.guild is None:
+            embed = self.userinfo_embed(member)
+        else:
+            embed = self.snapshots.get(ctx.guild.id, 'userinfo', member.id, lambda: self.userinfo_embed(member))
+        await ctx.send(embed=embed)
+
+    def userinfo_embed(self, member):
         embed = discord.Embed(
             title=f"User Info: {member.display_name}",
             color=member.color if member.color != discord.Color.default() else discord.Color.blue()
@@ -70,7 +259,7 @@ class General(commands.Cog):
         if roles:
             embed.add_field(name=f"Roles ({len(roles)})", value=" ".join(roles), inline=False)
         
-        await ctx.send(embed=embed)
+        return embed
 
     @commands.hybrid_command(name='avatar', description='Shows a user\'s avatar.')
     async def avatar(self, ctx, member: discord.Member = None):
@@ -112,19 +301,179 @@ class General(commands.Cog):
         
         await ctx.send(embed=embed)
 
-    @commands.hybrid_command(name='poll', description='Creates a simple yes/no poll.')
+    @commands.hybrid_command(name='poll', description='Creates a button poll: [multi] [anon] [duration] question | option | option ...')
     async def poll(self, ctx, *, question: str):
-        """Creates a simple yes/no poll."""
+        """Creates a poll with up to 25 options.
+
+        `poll Lunch? | Pizza | Sushi | Tacos` asks a single-choice question;
+        without options it is a Yes/No poll. Leading words set it up:
+        `multi` allows several choices, `anon` hides who voted for what and
+        a duration such as `2h` closes it automatically.
+        """
+        words = question.split()
+        multiple = anonymous = False
+        duration = None
+        while len(words) > 1:
+            word = words[0].lower()
+            if word in ('multi', 'multiple'):
+                multiple = True
+            elif word in ('anon', 'anonymous'):
+                anonymous = True
+            else:
+                try:
+                    duration = parse_duration(word)
+                except TimeParseError:
+                    break
+            words.pop(0)
+        
+        question, *options = [part.strip() for part in ' '.join(words).split('|')]
+        options = [option[:POLL_OPTION_LENGTH] for option in options if option] or list(YES_NO)
+        if not question or len(options) < 2 or len(options) > MAX_OPTIONS:
+            await ctx.send(f"Use `question | option | option ...` with 2 to {MAX_OPTIONS} options.", ephemeral=True)
+            return
+        if duration is not None and not 0 < duration.total_seconds() <= POLL_MAX_DURATION:
+            await ctx.send("Polls can run for at most 30 days.", ephemeral=True)
+            return
+        
+        deadline = time.time() + duration.total_seconds() if duration is not None else None
+        poll = Poll(None, ctx.channel.id, ctx.author.id, question, options, multiple, anonymous, deadline)
+        message = await ctx.send(embed=self.poll_embed(poll), view=self.poll_view(poll))
+        poll.message_id = message.id
+        self.polls.polls[message.id] = poll
+        self.polls.dirty = True
+
+    @commands.hybrid_command(name='poll_close', description='Closes a poll and shows the final results.')
+    async def poll_close(self, ctx, message_id: str):
+        """Closes a poll early; only its creator or someone who can manage messages may."""
+        poll = self.polls.polls.get(int(message_id)) if message_id.isdigit() else None
+        if poll is None:
+            await ctx.send("No open poll with that message ID.", ephemeral=True)
+            return
+        if ctx.author.id != poll.author_id and not ctx.channel.permissions_for(ctx.author).manage_messages:
+            await ctx.send("Only the poll's creator can close it.", ephemeral=True)
+            return
+        
+        await self.close_poll(poll)
+        await ctx.send(f"📊 Closed the poll **{poll.question}**.", ephemeral=True)
+
+    def poll_embed(self, poll, final=False):
+        total = sum(poll.counts) or 1
+        lines = []
+        for index, (option, count) in enumerate(zip(poll.options, poll.counts)):
+            filled = round(POLL_BAR_WIDTH * count / total)
+            lines.append(
+                f"**{index + 1}. {option}**\n"
+                f"`{'█' * filled}{'░' * (POLL_BAR_WIDTH - filled)}` {count} ({count * 100 // total}%)"
+            )
+        if poll.deadline and not final:
+            lines.append(f"\nEnds <t:{int(poll.deadline)}:R>")
+        results = "\n".join(lines)
+        # The results always fit (25 options of 80 characters); a long question is what gets cut
+        question = poll.question[:max(0, EMBED_DESCRIPTION_LIMIT - len(results) - 2)]
+        
         embed = discord.Embed(
-            title="📊 Poll",
-            description=question,
-            color=discord.Color.blue()
+            title="📊 Poll results" if final else "📊 Poll",
+            description=f"{question}\n\n{results}"[:EMBED_DESCRIPTION_LIMIT],
+            color=discord.Color.dark_grey() if final else discord.Color.blue()
         )
-        embed.set_footer(text=f"Poll created by {ctx.author.display_name}")
         
-        message = await ctx.send(embed=embed)
-        await message.add_reaction("✅")
-        await message.add_reaction("❌")
+        details = [
+            "Multiple choice" if poll.multiple else "Single choice",
+            f"{len(poll.votes)} voter{'s' if len(poll.votes) != 1 else ''}",
+        ]
+        if poll.anonymous:
+            details.append("Anonymous")
+        if poll.deadline and not final:
+            details.append(f"Open for {format_duration(datetime.timedelta(seconds=max(0, poll.deadline - time.time())))}")
+        embed.set_footer(text=" · ".join(details))
+        
+        if final and not poll.anonymous:
+            # Voter lists share what is left of the embed's total length; later options get fewer names
+            remaining = EMBED_TOTAL_LIMIT - len(embed)
+            for index, option in enumerate(poll.options):
+                voters = poll.voters(index)
+                if not voters:
+                    continue
+                name = f"{index + 1}. {option}"[:256]
+                shown = min(len(voters), POLL_VOTERS_SHOWN)
+                value = self.voter_list(voters, shown)
+                while shown and len(name) + len(value) > remaining:
+                    shown -= 1
+                    value = self.voter_list(voters, shown)
+                if len(name) + len(value) > remaining:
+                    break
+                embed.add_field(name=name, value=value, inline=False)
+                remaining -= len(name) + len(value)
+        return embed
+
+    @staticmethod
+    def voter_list(voters, shown):
+        """Mentions of the first `shown` voters, with a count of the rest."""
+        if not shown:
+            return f"{len(voters)} voter{'s' if len(voters) != 1 else ''}"
+        mentions = ", ".join(f"<@{user_id}>" for user_id in voters[:shown])
+        return mentions + (f" and {len(voters) - shown} more" if len(voters) > shown else "")
+
+    def poll_view(self, poll, disabled=False):
+        components = get_components()
+        return stateless_view(*(
+            discord.ui.Button(
+                label=option, style=discord.ButtonStyle.secondary, disabled=disabled, row=index // 5,
+                custom_id=components.custom_id('poll', index)
+            )
+            for index, option in enumerate(poll.options)
+        ))
+
+    async def poll_vote(self, interaction, fields):
+        """Records a vote and schedules a debounced update of the results."""
+        poll = self.polls.polls.get(interaction.message.id)
+        if poll is None or (poll.deadline and poll.deadline <= time.time()):
+            await interaction.response.send_message("This poll has ended.", ephemeral=True)
+            return
+        option = fields[0]
+        if option >= len(poll.options):
+            await interaction.response.send_message("This button is not valid.", ephemeral=True)
+            return
+        if poll.channel_id is None:
+            # Yes/No polls saved before polls kept their own details
+            embed = interaction.message.embeds[0] if interaction.message.embeds else None
+            poll.channel_id = interaction.channel_id
+            poll.question = embed.description if embed is not None and embed.description else "Poll"
+        
+        choices = poll.choices(poll.vote(interaction.user.id, option))
+        self.polls.dirty = True
+        self.poll_edits.trigger(poll.message_id)
+        
+        if choices:
+            message = f"🗳️ You voted for **{'**, **'.join(choices)}**."
+        else:
+            message = "🗳️ Your vote was withdrawn."
+        await interaction.response.send_message(message, ephemeral=True)
+
+    async def edit_poll(self, message_id):
+        poll = self.polls.polls.get(message_id)
+        if poll is None:
+            return
+        message = self.bot.get_partial_messageable(poll.channel_id).get_partial_message(message_id)
+        try:
+            await message.edit(embed=self.poll_embed(poll))
+        except discord.NotFound:
+            # The poll message was deleted; stop tracking it
+            self.polls.polls.pop(message_id, None)
+            self.polls.dirty = True
+
+    async def close_poll(self, poll):
+        """Stops a poll and replaces its message with the final results."""
+        self.poll_edits.cancel(poll.message_id)
+        self.polls.polls.pop(poll.message_id, None)
+        self.polls.dirty = True
+        if poll.channel_id is None:
+            return
+        message = self.bot.get_partial_messageable(poll.channel_id).get_partial_message(poll.message_id)
+        try:
+            await message.edit(embed=self.poll_embed(poll, final=True), view=self.poll_view(poll, disabled=True))
+        except discord.HTTPException as e:
+            logger.warning(f"Could not show final results for poll {poll.message_id}: {e}")
 
     @commands.hybrid_command(name='choose', description='Randomly chooses from given options.')
     async def choose(self, ctx, *, choices: str):
@@ -147,14 +496,19 @@ class General(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.hybrid_command(name='afk', description='Sets your AFK status.')
+    @commands.guild_only()
     async def afk(self, ctx, *, reason: str = "AFK"):
-        """Sets your AFK status."""
-        # This is a simple implementation - in a real bot you'd store this in a database
+        """Sets your AFK status until you next send a message."""
+        reason = reason[:200]
+        self.afk_users[(ctx.guild.id, ctx.author.id)] = (reason, time.time())
+        self.afk_dirty = True
+        
         embed = discord.Embed(
             title="💤 AFK",
             description=f"{ctx.author.mention} is now AFK: {reason}",
             color=discord.Color.orange()
         )
+        embed.set_footer(text="Your status clears automatically when you send a message.")
         
         await ctx.send(embed=embed)
 
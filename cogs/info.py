@@ -4,12 +4,90 @@ from discord.ext import commands
 import psutil
 import platform
 import datetime
+import typing
+
+from utils.components import get_components, stateless_view
+from utils.roles import RoleIndex, sorted_page
+from utils.snapshots import SnapshotCache
+
+ROLE_MEMBERS_PAGE = 20
+# Set operations for `rolemembers <role> <mode> <other role>`
+ROLE_FILTERS = {
+    'and': ("and", lambda first, second: first & second),
+    'or': ("or", lambda first, second: first | second),
+    'not': ("but not", lambda first, second: first - second),
+}
 
 class Info(commands.Cog):
     """Information and statistics commands."""
 
     def __init__(self, bot):
         self.bot = bot
+        # channelinfo/roleinfo embeds, dropped by the listeners below when what they show changes
+        self.snapshots = SnapshotCache(getattr(bot, 'perf_tracker', None))
+        # Role -> member ids per guild, for counts and overlaps without scanning the member cache
+        self.role_index = RoleIndex()
+
+    async def cog_load(self):
+        get_components().register('rolemembers', self.rolemembers_page)
+
+    async def cog_unload(self):
+        get_components().unregister('rolemembers')
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Events missed while disconnected are not replayed after a fresh login
+        self.snapshots.clear()
+        self.role_index.clear()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.snapshots.forget_guild(guild.id)
+        self.role_index.forget_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        self.snapshots.invalidate(after.guild.id, 'channelinfo', after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.snapshots.invalidate(channel.guild.id, 'channelinfo', channel.id)
+
+    @commands.Cog.listener()
+    async def on_thread_update(self, before, after):
+        self.snapshots.invalidate(after.guild.id, 'channelinfo', after.id)
+
+    @commands.Cog.listener()
+    async def on_thread_delete(self, thread):
+        self.snapshots.invalidate(thread.guild.id, 'channelinfo', thread.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        # Creating, moving or deleting a role shifts the positions of others, each with its own update
+        self.snapshots.invalidate(after.guild.id, 'roleinfo', after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self.snapshots.invalidate(role.guild.id, 'roleinfo', role.id)
+        self.role_index.drop_role(role.guild.id, role.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        self.role_index.add(member)
+        # The only role a new member holds is @everyone, whose id is the guild's
+        self.snapshots.invalidate(member.guild.id, 'roleinfo', member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self.role_index.remove(member)
+        self.snapshots.invalidate(member.guild.id, 'roleinfo', *(role.id for role in member.roles))
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self.role_index.update(before, after)
+            changed = set(before.roles).symmetric_difference(after.roles)
+            self.snapshots.invalidate(after.guild.id, 'roleinfo', *(role.id for role in changed))
 
     @commands.hybrid_command(name='botinfo', description='Shows detailed information about the bot.')
     async def botinfo(self, ctx):
@@ -172,7 +250,13 @@ class Info(commands.Cog):
     async def channelinfo(self, ctx):
         """Shows information about the current channel."""
         channel = ctx.channel
-        
+        if ctx.guild is None:
+            embed = self.channelinfo_embed(channel)
+        else:
+            embed = self.snapshots.get(ctx.guild.id, 'channelinfo', channel.id, lambda: self.channelinfo_embed(channel))
+        await ctx.send(embed=embed)
+
+    def channelinfo_embed(self, channel):
         embed = discord.Embed(
             title=f"📝 Channel Info: #{channel.name}",
             color=discord.Color.blue()
@@ -191,12 +275,17 @@ class Info(commands.Cog):
         if hasattr(channel, 'nsfw'):
             embed.add_field(name="NSFW", value="Yes" if channel.nsfw else "No", inline=True)
         
-        await ctx.send(embed=embed)
+        return embed
 
     @commands.hybrid_command(name='roleinfo', description='Shows information about a role.')
     @commands.guild_only()
     async def roleinfo(self, ctx, *, role: discord.Role):
         """Shows information about a role."""
+        await self.role_index.load(ctx.guild)
+        embed = self.snapshots.get(ctx.guild.id, 'roleinfo', role.id, lambda: self.roleinfo_embed(role))
+        await ctx.send(embed=embed)
+
+    def roleinfo_embed(self, role):
         embed = discord.Embed(
             title=f"👥 Role Info: {role.name}",
             color=role.color if role.color != discord.Color.default() else discord.Color.blue()
@@ -206,7 +295,7 @@ class Info(commands.Cog):
         embed.add_field(name="Created", value=role.created_at.strftime("%B %d, %Y"), inline=True)
         embed.add_field(name="Position", value=role.position, inline=True)
         
-        embed.add_field(name="Members", value=len(role.members), inline=True)
+        embed.add_field(name="Members", value=self.role_index.count(role.guild, role.id), inline=True)
         embed.add_field(name="Mentionable", value="Yes" if role.mentionable else "No", inline=True)
         embed.add_field(name="Hoisted", value="Yes" if role.hoist else "No", inline=True)
         
@@ -229,7 +318,84 @@ class Info(commands.Cog):
         if key_perms:
             embed.add_field(name="Key Permissions", value=", ".join(key_perms), inline=False)
         
-        await ctx.send(embed=embed)
+        return embed
+
+    @commands.hybrid_command(name='rolemembers', description='Lists members with a role, optionally combined with another role.')
+    @commands.guild_only()
+    async def rolemembers(self, ctx, role: discord.Role,
+                          mode: typing.Optional[typing.Literal['and', 'or', 'not']] = None,
+                          other: typing.Optional[discord.Role] = None, page: int = 1):
+        """Lists members with a role, e.g. `rolemembers @Mods`, `rolemembers @Staff not @Mods 2`."""
+        if (mode is None) != (other is None):
+            await ctx.send("Give both a mode (`and`, `or`, `not`) and a second role, or neither!", ephemeral=True)
+            return
+        if page < 1:
+            await ctx.send("Pages start at 1!", ephemeral=True)
+            return
+        
+        await self.role_index.load(ctx.guild)
+        embed, view = self.rolemembers_embed(ctx.guild, role, mode, other, page)
+        await ctx.send(embed=embed, view=view, allowed_mentions=discord.AllowedMentions.none())
+
+    def rolemembers_embed(self, guild, role, mode, other, page_number):
+        members = self.role_index.members(guild, role.id)
+        if mode is None:
+            title = f"👥 Members with {role.name}"
+            selection = f"with {role.mention}"
+        else:
+            word, combine = ROLE_FILTERS[mode]
+            members = combine(members, self.role_index.members(guild, other.id))
+            title = f"👥 Members with {role.name} {word} {other.name}"
+            selection = f"with {role.mention} {word} {other.mention}"
+        
+        pages = max(1, -(-len(members) // ROLE_MEMBERS_PAGE))
+        page_number = min(page_number, pages)
+        member_ids, has_more = sorted_page(members, page_number, ROLE_MEMBERS_PAGE)
+        
+        embed = discord.Embed(
+            title=title,
+            description=f"**{len(members):,}** member{'s' if len(members) != 1 else ''} {selection}",
+            color=role.color if role.color != discord.Color.default() else discord.Color.blue()
+        )
+        if member_ids:
+            start = (page_number - 1) * ROLE_MEMBERS_PAGE
+            embed.add_field(
+                name="Members",
+                value="\n".join(f"`{number}.` <@{member_id}>" for number, member_id in enumerate(member_ids, start + 1)),
+                inline=False
+            )
+        embed.set_footer(text=f"Page {page_number}/{pages}")
+        
+        if pages == 1:
+            return embed, None
+        components = get_components()
+        fields = (role.id, list(ROLE_FILTERS).index(mode) + 1 if mode else 0, other.id if other else 0)
+        view = stateless_view(
+            discord.ui.Button(
+                emoji="◀️", style=discord.ButtonStyle.secondary, disabled=page_number == 1,
+                custom_id=components.custom_id('rolemembers', *fields, page_number - 1)
+            ),
+            discord.ui.Button(
+                emoji="▶️", style=discord.ButtonStyle.secondary, disabled=not has_more,
+                custom_id=components.custom_id('rolemembers', *fields, page_number + 1)
+            ),
+        )
+        return embed, view
+
+    async def rolemembers_page(self, interaction, fields):
+        """Handles the previous/next buttons of a role member listing."""
+        role_id, mode_index, other_id, page_number = fields
+        guild = interaction.guild
+        role = guild.get_role(role_id) if guild else None
+        other = guild.get_role(other_id) if guild and other_id else None
+        if role is None or (other_id and other is None):
+            await interaction.response.send_message("That role no longer exists.", ephemeral=True)
+            return
+        
+        mode = list(ROLE_FILTERS)[mode_index - 1] if mode_index else None
+        await self.role_index.load(guild)
+        embed, view = self.rolemembers_embed(guild, role, mode, other, max(1, page_number))
+        await interaction.response.edit_message(embed=embed, view=view, allowed_mentions=discord.AllowedMentions.none())
 
 async def setup(bot):
     """Adds the Info cog to the bot."""
@@ -1,42 +1,154 @@
 # cogs/misc.py
 import discord
-from discord.ext import commands
+from discord import app_commands
+from discord.ext import commands, tasks
+import logging
 import random
 import asyncio
 import json
 import datetime
+import io
+import os
+import re
+import string
+import typing
+import zipfile
+from collections import OrderedDict
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.colors import ColorError, color_names, extract_palette, parse_color, render_swatch, split_rgb
+from utils.offload import get_pool, offloaded
+from utils.qrcode import QRCodeError, render_png
+from utils.streams import Base64Decode, Base64Encode, send_transformed
+from utils.timeparse import TimeParseError, format_duration, parse_time, split_time, user_zones
+from utils.translate import (
+    LANGUAGES, DictionaryEngine, LibreTranslateEngine, TranslationError, Translator, resolve_language
+)
+from utils.weather import PROVIDERS, WeatherError, WeatherService, describe
+
+logger = logging.getLogger(__name__)
+
+
+QR_CACHE_SIZE = 256
+QR_MIN_SIZE = 64
+QR_MAX_SIZE = 1024
+QR_BATCH_LIMIT = 50
+QR_LEVELS = ('L', 'M', 'Q', 'H')
+# Options leading a prefix command's text, e.g. `qr size=512 ec=H hello`
+QR_OPTION = re.compile(r'(size|ec)=(\S+)(?:\s+|$)', re.IGNORECASE)
+PALETTE_MAX_BYTES = 8 * 1024 * 1024
+PALETTE_TIMEOUT = 10.0  # Seconds before a palette worker is killed
+TRANSLATION_SAVE_INTERVAL = 60  # Seconds between saving a changed translation cache
+
+
+def split_qr_options(text):
+    """Peel leading `size=N` and `ec=L|M|Q|H` options off a prefix command's text.
+
+    Returns ({'size': ..., 'ec': ...} as strings for the options given, rest of the text).
+    """
+    options = {}
+    while match := QR_OPTION.match(text):
+        options[match[1].lower()] = match[2]
+        text = text[match.end():]
+    return options, text
+
+
+@offloaded('threads', size=lambda action, text: len(text))
+def transform_base64(action, text):
+    """Base64-encode text, or decode it back to UTF-8."""
+    transform = Base64Encode() if action == 'encode' else Base64Decode()
+    return transform.run(text.encode('utf-8')).decode('utf-8')
+
+
+@offloaded('threads', size=lambda length, include_symbols: length)
+def make_password(length, include_symbols):
+    characters = string.ascii_letters + string.digits
+    if include_symbols:
+        characters += "!@#$%^&*"
+    return ''.join(random.choice(characters) for _ in range(length))
+
 
 class Misc(commands.Cog):
     """Miscellaneous utility commands."""
 
     def __init__(self, bot):
         self.bot = bot
+        # (text, size, error correction) -> PNG bytes, least recently used first
+        self.qr_cache = OrderedDict()
+        provider = PROVIDERS.get(os.getenv("WEATHER_PROVIDER", "open-meteo"), PROVIDERS["open-meteo"])
+        self.weather_service = WeatherService(provider(), getattr(bot, 'perf_tracker', None))
+        translate_url = os.getenv("TRANSLATE_URL")
+        engine = LibreTranslateEngine(translate_url, os.getenv("TRANSLATE_API_KEY")) if translate_url else DictionaryEngine()
+        self.translator = Translator(engine, getattr(bot, 'perf_tracker', None))
+        self.translate_menu = app_commands.ContextMenu(name='Translate to English', callback=self.translate_message)
+        self.bot.tree.add_command(self.translate_menu)
+
+    async def cog_load(self):
+        await asyncio.to_thread(self.translator.cache.load)
+        self.save_translations_loop.start()
+
+    async def cog_unload(self):
+        self.bot.tree.remove_command(self.translate_menu.name, type=self.translate_menu.type)
+        self.save_translations_loop.cancel()
+        await self.translator.close()
+        await self.save_translations()
+        await self.weather_service.close()
+
+    async def save_translations(self):
+        """Write the translation cache to disk if it changed since the last save."""
+        if not self.translator.cache.dirty:
+            return
+        snapshot = self.translator.cache.snapshot()
+        try:
+            await asyncio.to_thread(self.translator.cache.save, snapshot)
+        except OSError as e:
+            self.translator.cache.dirty = True
+            logger.error(f"Failed to save translation cache: {e}")
+
+    @tasks.loop(seconds=TRANSLATION_SAVE_INTERVAL)
+    async def save_translations_loop(self):
+        await self.save_translations()
+
+    async def qr_png(self, text, size, error_correction):
+        """Render a QR code in the process pool, serving repeats from the LRU cache."""
+        key = (text, size, error_correction)
+        png = self.qr_cache.get(key)
+        if png is not None:
+            self.qr_cache.move_to_end(key)
+            return png
+        
+        png = await get_pool('processes').run(render_png, text, size, error_correction)
+        self.qr_cache[key] = png
+        if len(self.qr_cache) > QR_CACHE_SIZE:
+            self.qr_cache.popitem(last=False)
+        return png
 
     @commands.hybrid_command(name='remind', description='Set a reminder for yourself.')
-    async def remind(self, ctx, time: int, unit: str, *, reminder: str):
-        """Set a reminder for yourself."""
-        unit = unit.lower()
-        
-        # Convert time to seconds
-        if unit in ['s', 'sec', 'second', 'seconds']:
-            seconds = time
-        elif unit in ['m', 'min', 'minute', 'minutes']:
-            seconds = time * 60
-        elif unit in ['h', 'hour', 'hours']:
-            seconds = time * 3600
-        elif unit in ['d', 'day', 'days']:
-            seconds = time * 86400
-        else:
-            await ctx.send("Invalid time unit! Use: seconds, minutes, hours, or days", ephemeral=True)
+    async def remind(self, ctx, when: str, *, reminder: str):
+        """Set a reminder, e.g. `in 2h30m`, `10 minutes` or `tomorrow 9am`."""
+        if ctx.interaction is None:
+            # Prefix commands split on spaces, so `10 minutes stretch` arrives as when="10"
+            when, rest = split_time(f"{when} {reminder}")
+            if when is None or not rest:
+                await ctx.send("Usage: `remind <when> <reminder>`, e.g. `remind 2h30m stretch` or `remind tomorrow 9am call mum`", ephemeral=True)
+                return
+            reminder = rest
+        
+        try:
+            remind_at = parse_time(when, user_zones.get(ctx.author.id))
+        except TimeParseError as e:
+            await ctx.send(str(e), ephemeral=True)
             return
         
+        seconds = (remind_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds()
+        
         # Limit maximum reminder time
         if seconds > 2592000:  # 30 days
             await ctx.send("Reminder time cannot exceed 30 days!", ephemeral=True)
             return
         
         if seconds < 1:
-            await ctx.send("Reminder time must be at least 1 second!", ephemeral=True)
+            await ctx.send("Reminder time must be in the future!", ephemeral=True)
             return
         
         embed = discord.Embed(
@@ -44,8 +156,8 @@ class Misc(commands.Cog):
             description=f"I'll remind you about: **{reminder}**",
             color=discord.Color.green()
         )
-        embed.add_field(name="Time", value=f"{time} {unit}", inline=True)
-        embed.add_field(name="When", value=f"<t:{int((datetime.datetime.now() + datetime.timedelta(seconds=seconds)).timestamp())}:R>", inline=True)
+        embed.add_field(name="Time", value=format_duration(datetime.timedelta(seconds=seconds)), inline=True)
+        embed.add_field(name="When", value=f"<t:{int(remind_at.timestamp())}:R>", inline=True)
         
         await ctx.send(embed=embed)
         
@@ -65,133 +177,183 @@ class Misc(commands.Cog):
             # If DM fails, send in the original channel
             await ctx.send(f"{ctx.author.mention}, reminder: **{reminder}**")
 
-    @commands.hybrid_command(name='weather', description='Get weather information (mock data).')
+    @commands.hybrid_command(name='weather', description='Get the current weather for a place.')
     async def weather(self, ctx, *, location: str):
-        """Get weather information (returns mock data for demonstration)."""
-        # This is mock data - in a real bot you'd use a weather API
-        conditions = ["Sunny", "Cloudy", "Rainy", "Snowy", "Partly Cloudy", "Stormy"]
-        temperature = random.randint(-10, 35)
-        condition = random.choice(conditions)
-        humidity = random.randint(30, 90)
-        wind_speed = random.randint(5, 30)
-        
-        # Weather emojis
-        emoji_map = {
-            "Sunny": "☀️",
-            "Cloudy": "☁️", 
-            "Rainy": "🌧️",
-            "Snowy": "❄️",
-            "Partly Cloudy": "⛅",
-            "Stormy": "⛈️"
-        }
+        """Get the current weather, e.g. `weather London` or `weather Paris, US`."""
+        await ctx.defer()
+        try:
+            place, report = await self.weather_service.current(location)
+        except WeatherError as e:
+            await ctx.send(str(e), ephemeral=True)
+            return
         
+        condition, emoji = describe(report['code'])
+        title = f"{place['name']}, {place['country']}" if place.get('country') else place['name']
         embed = discord.Embed(
-            title=f"{emoji_map.get(condition, '🌤️')} Weather in {location.title()}",
+            title=f"{emoji} Weather in {title}",
             color=discord.Color.blue()
         )
         
-        embed.add_field(name="Temperature", value=f"{temperature}°C", inline=True)
+        embed.add_field(name="Temperature", value=f"{report['temperature']:.1f}°C", inline=True)
         embed.add_field(name="Condition", value=condition, inline=True)
-        embed.add_field(name="Humidity", value=f"{humidity}%", inline=True)
-        embed.add_field(name="Wind Speed", value=f"{wind_speed} km/h", inline=True)
+        embed.add_field(name="Humidity", value=f"{report['humidity']}%", inline=True)
+        embed.add_field(name="Wind Speed", value=f"{report['wind_speed']:.1f} km/h", inline=True)
         
-        embed.set_footer(text="⚠️ This is mock weather data for demonstration purposes")
+        embed.set_footer(text=f"Data: {self.weather_service.provider.name}")
         
         await ctx.send(embed=embed)
 
-    @commands.hybrid_command(name='translate', description='Translate text (mock translation).')
-    async def translate(self, ctx, target_language: str, *, text: str):
-        """Translate text (returns mock translation for demonstration)."""
-        # This is a mock translation - in a real bot you'd use a translation API
-        mock_translations = {
-            "spanish": {
-                "hello": "hola",
-                "goodbye": "adiós", 
-                "thank you": "gracias",
-                "yes": "sí",
-                "no": "no"
-            },
-            "french": {
-                "hello": "bonjour",
-                "goodbye": "au revoir",
-                "thank you": "merci",
-                "yes": "oui", 
-                "no": "non"
-            },
-            "german": {
-                "hello": "hallo",
-                "goodbye": "auf wiedersehen",
-                "thank you": "danke",
-                "yes": "ja",
-                "no": "nein"
-            }
-        }
-        
-        target_language = target_language.lower()
-        text_lower = text.lower()
-        
-        if target_language in mock_translations and text_lower in mock_translations[target_language]:
-            translation = mock_translations[target_language][text_lower]
-        else:
-            translation = f"[Mock translation to {target_language.title()}]: {text}"
-        
+    def translation_embed(self, text, source, confidence, target, translation):
         embed = discord.Embed(
             title="🌐 Translation",
             color=discord.Color.blue()
         )
-        embed.add_field(name="Original", value=text, inline=False)
-        embed.add_field(name=f"To {target_language.title()}", value=translation, inline=False)
-        embed.set_footer(text="⚠️ This is a mock translation for demonstration purposes")
+        detected = LANGUAGES.get(source, source)
+        if confidence < 1.0:
+            detected = f"{detected} (detected, {confidence:.0%})"
+        embed.add_field(name=f"Original · {detected}", value=text[:1024], inline=False)
+        embed.add_field(name=f"To {LANGUAGES[target]}", value=translation[:1024], inline=False)
+        embed.set_footer(text=f"Engine: {self.translator.engine.name}")
+        return embed
+
+    @commands.hybrid_command(name='translate', description='Translate text into another language.')
+    async def translate(self, ctx, target_language: str, *, text: str):
+        """Translate text, e.g. `translate spanish good morning`; the source language is detected."""
+        try:
+            target = resolve_language(target_language)
+            source, confidence, translation = await self.translator.translate(text, target)
+        except TranslationError as e:
+            await ctx.send(str(e), ephemeral=True)
+            return
         
-        await ctx.send(embed=embed)
+        await ctx.send(embed=self.translation_embed(text, source, confidence, target, translation))
+
+    async def translate_message(self, interaction: discord.Interaction, message: discord.Message):
+        """Context menu: translate any message to English, visible only to the caller."""
+        # App commands bypass the global ext.commands check, so apply the same allowlist here
+        if interaction.user.id not in getattr(self.bot, 'allowed_user_ids', ()):
+            await interaction.response.send_message("You are not allowed to use this bot.", ephemeral=True)
+            return
+        if not message.content:
+            await interaction.response.send_message("That message has no text to translate.", ephemeral=True)
+            return
+        try:
+            source, confidence, translation = await self.translator.translate(message.content, 'en')
+        except TranslationError as e:
+            await interaction.response.send_message(str(e), ephemeral=True)
+            return
+        embed = self.translation_embed(message.content, source, confidence, 'en', translation)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    def qr_options(self, ctx, text, size, error_correction):
+        """Return (text, size, error_correction), reading prefix-command options from the text.
 
-    @commands.hybrid_command(name='qr', description='Generate a QR code for text (mock).')
-    async def qr_code(self, ctx, *, text: str):
-        """Generate a QR code for text (mock implementation)."""
-        # This would normally generate an actual QR code
+        Raises ValueError with a message for the user when an option is invalid.
+        """
+        if ctx.interaction is None and text:
+            # Prefix commands pass everything as text, so a number or a lone `H` is content, not an option
+            options, text = split_qr_options(text)
+            if 'size' in options:
+                if not options['size'].isdigit():
+                    raise ValueError("Size must be a whole number, e.g. `size=512`.")
+                size = int(options['size'])
+            if 'ec' in options:
+                error_correction = options['ec'].upper()
+                if error_correction not in QR_LEVELS:
+                    raise ValueError("Error correction must be L, M, Q or H, e.g. `ec=H`.")
+        if not QR_MIN_SIZE <= size <= QR_MAX_SIZE:
+            raise ValueError(f"Size must be between {QR_MIN_SIZE} and {QR_MAX_SIZE} pixels!")
+        return text, size, error_correction
+
+    @commands.hybrid_command(name='qr', description='Generate a QR code for text.')
+    async def qr_code(self, ctx, *, text: str, size: int = 256, error_correction: typing.Literal['L', 'M', 'Q', 'H'] = 'M'):
+        """Generate a QR code for text, e.g. `qr https://example.com` or `qr size=512 ec=H hello`."""
+        try:
+            text, size, error_correction = self.qr_options(ctx, text, size, error_correction)
+        except ValueError as e:
+            await ctx.send(str(e), ephemeral=True)
+            return
+        if not text:
+            await ctx.send("Give the text to encode.", ephemeral=True)
+            return
+        
+        try:
+            png = await self.qr_png(text, size, error_correction)
+        except QRCodeError as e:
+            await ctx.send(str(e), ephemeral=True)
+            return
+        
         embed = discord.Embed(
             title="📱 QR Code Generated",
-            description=f"QR code for: **{text}**",
             color=discord.Color.blue()
         )
-        embed.add_field(name="Text", value=text, inline=False)
-        embed.set_footer(text="⚠️ QR code generation is not implemented in this demo")
+        embed.add_field(name="Text", value=text[:1024], inline=False)
+        embed.set_image(url="attachment://qr.png")
+        embed.set_footer(text=f"Error correction: {error_correction}")
         
-        await ctx.send(embed=embed)
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(png), filename="qr.png"))
+
+    @commands.hybrid_command(name='qr_batch', description='Generate QR codes for each line of text or a file, as a zip.')
+    async def qr_batch(self, ctx, file: discord.Attachment = None, *, text: str = None, size: int = 256,
+                       error_correction: typing.Literal['L', 'M', 'Q', 'H'] = 'M'):
+        """Generate one QR code per line and send them as a zip archive (options as in `qr`)."""
+        try:
+            text, size, error_correction = self.qr_options(ctx, text, size, error_correction)
+        except ValueError as e:
+            await ctx.send(str(e), ephemeral=True)
+            return
+        
+        if file is not None:
+            if file.size > 256 * 1024:
+                await ctx.send("File is too large (max 256 KB).", ephemeral=True)
+                return
+            text = (await file.read()).decode('utf-8', errors='replace')
+        lines = [line.strip() for line in (text or '').splitlines() if line.strip()]
+        if not lines:
+            await ctx.send("Give one entry per line, or attach a text file.", ephemeral=True)
+            return
+        if len(lines) > QR_BATCH_LIMIT:
+            await ctx.send(f"A batch is limited to {QR_BATCH_LIMIT} codes!", ephemeral=True)
+            return
+        
+        await ctx.defer()
+        results = await asyncio.gather(
+            *(self.qr_png(line, size, error_correction) for line in lines), return_exceptions=True
+        )
+        
+        buffer = io.BytesIO()
+        index = []
+        failed = 0
+        # PNG data is already deflated, so the archive just stores it
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+            for number, (line, png) in enumerate(zip(lines, results), start=1):
+                if isinstance(png, QRCodeError):
+                    failed += 1
+                    index.append(f"-\t{line}\t({png})")
+                    continue
+                if isinstance(png, BaseException):
+                    raise png
+                name = f"qr_{number:03}.png"
+                archive.writestr(name, png)
+                index.append(f"{name}\t{line}")
+            archive.writestr("index.txt", "\n".join(index) + "\n")
+        buffer.seek(0)
+        
+        message = f"📦 Generated {len(lines) - failed} QR code(s)"
+        if failed:
+            message += f" ({failed} too long, see index.txt)"
+        await ctx.send(message, file=discord.File(buffer, filename="qr_codes.zip"))
 
     @commands.hybrid_command(name='color', description='Show information about a color.')
     async def color_info(self, ctx, *, color_input: str):
-        """Show information about a color."""
-        # Try to parse the color
-        color_input = color_input.replace("#", "").replace("0x", "")
-        
+        """Show information about a color, e.g. `#FF8800`, `rgb(255, 136, 0)` or `dusty rose`."""
         try:
-            # Convert hex to int
-            color_value = int(color_input, 16)
-            color = discord.Color(color_value)
-        except ValueError:
-            # Try named colors
-            named_colors = {
-                "red": 0xFF0000,
-                "green": 0x00FF00,
-                "blue": 0x0000FF,
-                "yellow": 0xFFFF00,
-                "purple": 0x800080,
-                "orange": 0xFFA500,
-                "pink": 0xFFC0CB,
-                "black": 0x000000,
-                "white": 0xFFFFFF,
-                "gray": 0x808080,
-                "grey": 0x808080
-            }
-            
-            color_name = color_input.lower()
-            if color_name in named_colors:
-                color_value = named_colors[color_name]
-                color = discord.Color(color_value)
-            else:
-                await ctx.send("Invalid color! Use hex format (#FF0000) or color names (red, blue, etc.)", ephemeral=True)
-                return
+            color_value = parse_color(color_input)
+        except ColorError as e:
+            await ctx.send(str(e), ephemeral=True)
+            return
+        color = discord.Color(color_value)
+        name, named_value, distance = color_names().nearest(color_value)
         
         embed = discord.Embed(
             title="🎨 Color Information",
@@ -200,37 +362,78 @@ class Misc(commands.Cog):
         
         # Convert back to hex and RGB
         hex_value = f"#{color_value:06X}"
-        r = (color_value >> 16) & 255
-        g = (color_value >> 8) & 255
-        b = color_value & 255
+        r, g, b = split_rgb(color_value)
         
         embed.add_field(name="Hex", value=hex_value, inline=True)
         embed.add_field(name="RGB", value=f"({r}, {g}, {b})", inline=True)
         embed.add_field(name="Decimal", value=str(color_value), inline=True)
+        if distance < 0.5:
+            embed.add_field(name="Name", value=name.title(), inline=True)
+        else:
+            embed.add_field(name="Closest Name", value=f"{name.title()} (#{named_value:06X})", inline=True)
         
-        # Add a color square visualization using embed color
         embed.description = f"Preview of color {hex_value}"
+        embed.set_thumbnail(url="attachment://swatch.png")
+        swatch = render_swatch((color_value,), 128, 128)
         
-        await ctx.send(embed=embed)
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(swatch), filename="swatch.png"))
 
-    @commands.hybrid_command(name='base64', description='Encode or decode base64 text.')
-    async def base64(self, ctx, action: str, *, text: str):
-        """Encode or decode base64 text."""
-        import base64
+    @commands.hybrid_command(name='palette', description='Extract the dominant colors of an image.')
+    async def palette(self, ctx, image: discord.Attachment, colors: int = 5):
+        """Extract the dominant colors of an attached image."""
+        if not 2 <= colors <= 10:
+            await ctx.send("Pick between 2 and 10 colors!", ephemeral=True)
+            return
+        if image.size > PALETTE_MAX_BYTES:
+            await ctx.send("Image is too large (max 8 MB).", ephemeral=True)
+            return
         
+        await ctx.defer()
+        data = await image.read()
+        try:
+            palette = await get_pool('processes').run(extract_palette, data, colors, timeout=PALETTE_TIMEOUT)
+        except ColorError as e:
+            await ctx.send(str(e), ephemeral=True)
+            return
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            await ctx.send("That image took too long to process, try a smaller one.", ephemeral=True)
+            return
+        
+        names = color_names()
+        embed = discord.Embed(
+            title="🎨 Image Palette",
+            color=discord.Color(palette[0][0])
+        )
+        lines = []
+        for value, share in palette:
+            name = names.nearest(value)[0]
+            lines.append(f"`#{value:06X}` {name.title()} — {share:.0%}")
+        embed.description = "\n".join(lines)
+        embed.set_image(url="attachment://palette.png")
+        swatch = render_swatch(tuple(value for value, _ in palette), 400, 80)
+        
+        await ctx.send(embed=embed, file=discord.File(io.BytesIO(swatch), filename="palette.png"))
+
+    @commands.hybrid_command(name='base64', description='Encode or decode base64 text or a file.')
+    async def base64(self, ctx, action: str, file: discord.Attachment = None, *, text: str = None):
+        """Encode or decode base64 text or an attached file."""
         action = action.lower()
         
         if action not in ['encode', 'decode']:
             await ctx.send("Action must be 'encode' or 'decode'!", ephemeral=True)
             return
         
+        if file is not None:
+            transform = Base64Encode() if action == 'encode' else Base64Decode()
+            await send_transformed(ctx, file, transform, f"base64-{action}d")
+            return
+        if not text:
+            await ctx.send("Give some text or attach a file.", ephemeral=True)
+            return
+        
         try:
-            if action == 'encode':
-                result = base64.b64encode(text.encode('utf-8')).decode('utf-8')
-                title = "🔒 Base64 Encoded"
-            else:  # decode
-                result = base64.b64decode(text.encode('utf-8')).decode('utf-8')
-                title = "🔓 Base64 Decoded"
+            result = await transform_base64(action, text)
+            title = "🔒 Base64 Encoded" if action == 'encode' else "🔓 Base64 Decoded"
             
             embed = discord.Embed(
                 title=title,
@@ -251,13 +454,7 @@ class Misc(commands.Cog):
             await ctx.send("Password length must be between 4 and 50 characters!", ephemeral=True)
             return
         
-        import string
-        
-        characters = string.ascii_letters + string.digits
-        if include_symbols:
-            characters += "!@#$%^&*"
-        
-        password = ''.join(random.choice(characters) for _ in range(length))
+        password = await make_password(length, include_symbols)
         
         embed = discord.Embed(
             title="🔐 Generated Password",
@@ -6,6 +6,8 @@ import asyncio
 import logging
 from datetime import datetime, timedelta
 
+from utils.timeparse import TimeParseError, format_duration, is_unit, parse_duration
+
 logger = logging.getLogger(__name__)
 
 class Moderation(commands.Cog):
@@ -26,6 +28,61 @@ class Moderation(commands.Cog):
             except Exception as e:
                 logger.error(f"Failed to send mod log: {e}")
 
+    async def apply_timeout(self, member, delta, duration_text, reason, moderator, channel):
+        """Times out a member and records it in the mod log. Raises discord.Forbidden on failure."""
+        await member.timeout(delta, reason=reason)
+        
+        # Create detailed embed for mod log
+        log_embed = discord.Embed(
+            title="Member Timed Out",
+            description=f"{member.mention} has been timed out",
+            color=discord.Color.orange()
+        )
+        log_embed.add_field(name="Duration", value=duration_text, inline=True)
+        log_embed.add_field(name="Reason", value=reason, inline=False)
+        log_embed.add_field(name="Moderator", value=moderator.mention, inline=True)
+        log_embed.add_field(name="Member ID", value=str(member.id), inline=True)
+        log_embed.add_field(name="Channel", value=channel.mention, inline=True)
+        log_embed.timestamp = datetime.utcnow()
+        
+        # Send only to mod log channel
+        await self.send_mod_log(log_embed)
+        
+        logger.info(f"{moderator} timed out {member} for {duration_text}: {reason}")
+
+    async def warn_member(self, member, reason, moderator, destination):
+        """Warns a member by DM and posts a notice to `destination`. Returns False if the DM failed."""
+        embed = discord.Embed(
+            title="Warning",
+            description=f"You have been warned in {member.guild.name}",
+            color=discord.Color.yellow()
+        )
+        embed.add_field(name="Reason", value=reason, inline=False)
+        embed.add_field(name="Moderator", value=moderator.name, inline=True)
+        
+        try:
+            await member.send(embed=embed)
+        except discord.Forbidden:
+            return False
+        
+        # Send confirmation in channel
+        confirm_embed = discord.Embed(
+            title="Member Warned",
+            description=f"{member.mention} has been warned",
+            color=discord.Color.yellow()
+        )
+        confirm_embed.add_field(name="Reason", value=reason, inline=False)
+        confirm_embed.add_field(name="Moderator", value=moderator.mention, inline=True)
+        await destination.send(embed=confirm_embed)
+        
+        logger.info(f"{moderator} warned {member} for: {reason}")
+        return True
+
+    async def apply_slowmode(self, channel, seconds, moderator):
+        """Sets a channel's slowmode delay. Raises discord.Forbidden on failure."""
+        await channel.edit(slowmode_delay=seconds)
+        logger.info(f"{moderator} set slowmode to {seconds} seconds in {channel}")
+
     async def cog_check(self, ctx):
         """Check if user has moderation permissions."""
         # Check if user has any moderation permissions
@@ -166,7 +223,7 @@ class Moderation(commands.Cog):
     @commands.has_permissions(moderate_members=True)
     @commands.bot_has_permissions(moderate_members=True)
     @commands.cooldown(1, 5, commands.BucketType.user)
-    async def timeout(self, ctx, member: discord.Member, duration: int, unit: str = "minutes", *, reason: str = "No reason provided."):
+    async def timeout(self, ctx, member: discord.Member, duration: str, unit: str = "minutes", *, reason: str = "No reason provided."):
         """Times out the specified member."""
         if member == ctx.author:
             await ctx.send("You cannot timeout yourself!", ephemeral=True)
@@ -176,18 +233,21 @@ class Moderation(commands.Cog):
             await ctx.send("You cannot timeout someone with a higher or equal role!", ephemeral=True)
             return
 
-        # Calculate timeout duration
-        unit = unit.lower()
-        if unit in ['s', 'sec', 'second', 'seconds']:
-            delta = timedelta(seconds=duration)
-        elif unit in ['m', 'min', 'minute', 'minutes']:
-            delta = timedelta(minutes=duration)
-        elif unit in ['h', 'hour', 'hours']:
-            delta = timedelta(hours=duration)
-        elif unit in ['d', 'day', 'days']:
-            delta = timedelta(days=duration)
-        else:
-            await ctx.send("Invalid time unit. Use: seconds, minutes, hours, or days", ephemeral=True)
+        # Accept both `10 minutes` and compact forms like `2h30m` or `1d`
+        try:
+            delta = parse_duration(f"{duration} {unit}")
+        except TimeParseError:
+            try:
+                delta = parse_duration(duration)
+            except TimeParseError:
+                await ctx.send("Invalid duration. Use e.g. `10 minutes`, `2h30m` or `1d`.", ephemeral=True)
+                return
+            if not is_unit(unit):
+                # `timeout @user 2h spamming`: the word after the duration starts the reason
+                reason = unit if reason == "No reason provided." else f"{unit} {reason}"
+
+        if delta <= timedelta(0):
+            await ctx.send("Timeout duration must be positive!", ephemeral=True)
             return
 
         # Discord timeout limit is 28 days
@@ -196,25 +256,7 @@ class Moderation(commands.Cog):
             return
 
         try:
-            await member.timeout(delta, reason=reason)
-            
-            # Create detailed embed for mod log
-            log_embed = discord.Embed(
-                title="Member Timed Out",
-                description=f"{member.mention} has been timed out",
-                color=discord.Color.orange()
-            )
-            log_embed.add_field(name="Duration", value=f"{duration} {unit}", inline=True)
-            log_embed.add_field(name="Reason", value=reason, inline=False)
-            log_embed.add_field(name="Moderator", value=ctx.author.mention, inline=True)
-            log_embed.add_field(name="Member ID", value=str(member.id), inline=True)
-            log_embed.add_field(name="Channel", value=ctx.channel.mention, inline=True)
-            log_embed.timestamp = datetime.utcnow()
-            
-            # Send only to mod log channel
-            await self.send_mod_log(log_embed)
-            
-            logger.info(f"{ctx.author} timed out {member} for {duration} {unit}: {reason}")
+            await self.apply_timeout(member, delta, format_duration(delta), reason, ctx.author, ctx.channel)
         except discord.Forbidden:
             await ctx.send("I don't have permission to timeout that member.", ephemeral=True)
         except Exception as e:
@@ -399,29 +441,8 @@ class Moderation(commands.Cog):
     async def warn(self, ctx, member: discord.Member, *, reason: str = "No reason provided."):
         """Warns the specified member and sends them a DM."""
         try:
-            embed = discord.Embed(
-                title="Warning",
-                description=f"You have been warned in {ctx.guild.name}",
-                color=discord.Color.yellow()
-            )
-            embed.add_field(name="Reason", value=reason, inline=False)
-            embed.add_field(name="Moderator", value=ctx.author.name, inline=True)
-            
-            await member.send(embed=embed)
-            
-            # Send confirmation in channel
-            confirm_embed = discord.Embed(
-                title="Member Warned",
-                description=f"{member.mention} has been warned",
-                color=discord.Color.yellow()
-            )
-            confirm_embed.add_field(name="Reason", value=reason, inline=False)
-            confirm_embed.add_field(name="Moderator", value=ctx.author.mention, inline=True)
-            await ctx.send(embed=confirm_embed)
-            
-            logger.info(f"{ctx.author} warned {member} for: {reason}")
-        except discord.Forbidden:
-            await ctx.send(f"Could not DM {member.mention}. Warning issued, but DM failed.", ephemeral=True)
+            if not await self.warn_member(member, reason, ctx.author, ctx):
+                await ctx.send(f"Could not DM {member.mention}. Warning issued, but DM failed.", ephemeral=True)
         except Exception as e:
             await ctx.send(f"An error occurred while trying to warn: {e}", ephemeral=True)
             logger.error(f"Error warning {member}: {e}")
@@ -462,7 +483,7 @@ class Moderation(commands.Cog):
             return
 
         try:
-            await ctx.channel.edit(slowmode_delay=seconds)
+            await self.apply_slowmode(ctx.channel, seconds, ctx.author)
             
             embed = discord.Embed(
                 title="Slowmode Updated",
@@ -475,7 +496,6 @@ class Moderation(commands.Cog):
             embed.add_field(name="Moderator", value=ctx.author.mention, inline=True)
             
             await ctx.send(embed=embed)
-            logger.info(f"{ctx.author} set slowmode to {seconds} seconds in {ctx.channel}")
         except discord.Forbidden:
             await ctx.send("I don't have permission to manage channels.", ephemeral=True)
         except Exception as e:
@@ -0,0 +1,406 @@
+# cogs/raid.py
+import discord
+from discord.ext import commands
+import asyncio
+import logging
+import re
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta, timezone
+
+from utils.storage import data_path, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+RAID_FILE = data_path("raid.json")
+LOCKDOWN_FILE = data_path("raid_lockdowns.json")
+RING_SIZE = 50  # Recent joins kept per guild for raid_status
+WINDOW_CAP = 100  # Joins kept in the detection window; the largest allowed join_threshold
+ACTIONS = ('verification', 'slowmode', 'quarantine')
+QUARANTINE_ROLE = "Quarantine"
+SUSPICIOUS_SCORE = 2  # Joins scoring at least this are quarantined during a raid
+
+# setting -> (default, minimum, maximum)
+SETTINGS = {
+    "window": (30, 5, 600),
+    "join_threshold": (8, 3, WINDOW_CAP),
+    "score_threshold": (16, 1, 500),
+    "lockdown_minutes": (15, 1, 1440),
+    "slowmode": (30, 1, 21600),
+}
+
+NAME_KEY_PATTERN = re.compile(r'[^a-z]+')
+
+
+def name_key(name):
+    """Reduce a username to its letters so `raider01` and `Raider_77` collide."""
+    return NAME_KEY_PATTERN.sub('', name.lower())[:10]
+
+
+class JoinRecord:
+    """One member join and what made it look suspicious."""
+
+    __slots__ = ('member_id', 'name', 'joined_at', 'account_age_days', 'has_avatar', 'name_key', 'score')
+
+    def __init__(self, member, now):
+        self.member_id = member.id
+        self.name = str(member)
+        self.joined_at = now
+        self.account_age_days = (datetime.now(timezone.utc) - member.created_at).days
+        self.has_avatar = member.avatar is not None
+        self.name_key = name_key(member.name)
+        self.score = 0
+
+
+class JoinTracker:
+    """Join history for one guild with running totals over the detection window."""
+
+    def __init__(self):
+        self.recent = deque(maxlen=RING_SIZE)
+        self.window = deque()
+        self.window_score = 0
+        self.names = Counter()
+        self.raid_until = 0.0
+
+    def add(self, member, now, window):
+        """Score a join and return its record. Amortised O(1)."""
+        # Expire joins that fell out of the window, keeping the running totals in step
+        cutoff = now - window
+        while self.window and (self.window[0].joined_at < cutoff or len(self.window) >= WINDOW_CAP):
+            old = self.window.popleft()
+            self.window_score -= old.score
+            self.names[old.name_key] -= 1
+            if not self.names[old.name_key]:
+                del self.names[old.name_key]
+
+        record = JoinRecord(member, now)
+        if record.account_age_days < 1:
+            record.score += 3
+        elif record.account_age_days < 7:
+            record.score += 1
+        if not record.has_avatar:
+            record.score += 1
+        if record.name_key and self.names[record.name_key]:
+            record.score += 2
+        # Joining mid-burst is itself a signal
+        record.score += min(len(self.window), 5) // 2
+
+        self.window.append(record)
+        self.window_score += record.score
+        if record.name_key:
+            self.names[record.name_key] += 1
+        self.recent.append(record)
+        return record
+
+    @property
+    def raid_active(self):
+        return time.monotonic() < self.raid_until
+
+
+class Raid(commands.Cog):
+    """Join-rate raid detection and automatic lockdown."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.config = {}
+        self.trackers = {}
+        # guild_id -> state needed to undo a lockdown, saved so a restart still undoes it
+        self.lockdowns = {}
+
+    async def cog_load(self):
+        stored = await asyncio.to_thread(load_json, RAID_FILE, {})
+        self.config = {int(guild_id): settings for guild_id, settings in stored.items()}
+        for guild_id in self.config:
+            self.guild_config(guild_id)
+
+        # Lockdowns that were active at shutdown end when they were due to, or right away if overdue
+        stored = await asyncio.to_thread(load_json, LOCKDOWN_FILE, {})
+        for guild_id, lockdown in stored.items():
+            guild_id = int(guild_id)
+            remaining = max(0.0, lockdown["ends_at"] - time.time())
+            tracker = self.trackers[guild_id] = JoinTracker()
+            tracker.raid_until = time.monotonic() + remaining
+            lockdown["slowmode"] = [tuple(entry) for entry in lockdown["slowmode"]]
+            lockdown["task"] = asyncio.create_task(self.end_lockdown_later(guild_id, remaining))
+            self.lockdowns[guild_id] = lockdown
+        if stored:
+            logger.info(f"Resumed {len(stored)} raid lockdowns")
+
+    async def cog_unload(self):
+        # The saved lockdowns are picked up again by the next load
+        for lockdown in self.lockdowns.values():
+            lockdown["task"].cancel()
+
+    async def save_config(self):
+        data = {str(guild_id): settings for guild_id, settings in self.config.items()}
+        await asyncio.to_thread(save_json, RAID_FILE, data)
+
+    async def save_lockdowns(self):
+        data = {
+            str(guild_id): {key: value for key, value in lockdown.items() if key != "task"}
+            for guild_id, lockdown in self.lockdowns.items()
+        }
+        await asyncio.to_thread(save_json, LOCKDOWN_FILE, data)
+
+    def guild_config(self, guild_id):
+        settings = self.config.setdefault(guild_id, {"enabled": False, "actions": ["slowmode", "quarantine"]})
+        for name, (default, _, _) in SETTINGS.items():
+            settings.setdefault(name, default)
+        return settings
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        settings = self.config.get(member.guild.id)
+        if settings is None or not settings["enabled"] or member.bot:
+            return
+
+        now = time.monotonic()
+        tracker = self.trackers.get(member.guild.id)
+        if tracker is None:
+            tracker = self.trackers[member.guild.id] = JoinTracker()
+        record = tracker.add(member, now, settings["window"])
+
+        if tracker.raid_active:
+            if record.score >= SUSPICIOUS_SCORE and "quarantine" in settings["actions"]:
+                await self.quarantine(member, settings)
+            return
+
+        if len(tracker.window) >= settings["join_threshold"] and tracker.window_score >= settings["score_threshold"]:
+            tracker.raid_until = now + settings["lockdown_minutes"] * 60
+            await self.start_lockdown(member.guild, tracker, settings)
+
+    async def start_lockdown(self, guild, tracker, settings):
+        """Apply the configured lockdown actions and schedule their removal."""
+        moderation = self.bot.get_cog('Moderation')
+        actions = settings["actions"]
+        lockdown = {"verification": None, "slowmode": []}
+        logger.warning(
+            f"Raid detected in {guild} ({guild.id}): {len(tracker.window)} joins, score {tracker.window_score}"
+        )
+
+        if "verification" in actions and guild.verification_level < discord.VerificationLevel.high:
+            try:
+                lockdown["verification"] = guild.verification_level.value
+                await guild.edit(verification_level=discord.VerificationLevel.high, reason="Raid detected")
+            except discord.Forbidden:
+                lockdown["verification"] = None
+                logger.warning(f"Cannot raise verification level in {guild.id}")
+
+        if "slowmode" in actions and moderation:
+            for channel in guild.text_channels:
+                if channel.slowmode_delay >= settings["slowmode"]:
+                    continue
+                if not channel.permissions_for(guild.me).manage_channels:
+                    continue
+                try:
+                    previous = channel.slowmode_delay
+                    await moderation.apply_slowmode(channel, settings["slowmode"], self.bot.user)
+                    lockdown["slowmode"].append((channel.id, previous))
+                except discord.HTTPException as e:
+                    logger.warning(f"Cannot set slowmode in #{channel} ({guild.id}): {e}")
+
+        if "quarantine" in actions:
+            for record in list(tracker.window):
+                member = guild.get_member(record.member_id)
+                if member and record.score >= SUSPICIOUS_SCORE:
+                    await self.quarantine(member, settings)
+
+        previous = self.lockdowns.pop(guild.id, None)
+        if previous:
+            # Keep the original settings so the eventual restore undoes both lockdowns
+            previous["task"].cancel()
+            if previous["verification"] is not None:
+                lockdown["verification"] = previous["verification"]
+            lockdown["slowmode"] = previous["slowmode"] + lockdown["slowmode"]
+        lockdown["ends_at"] = time.time() + settings["lockdown_minutes"] * 60
+        lockdown["task"] = asyncio.create_task(self.end_lockdown_later(guild.id, settings["lockdown_minutes"] * 60))
+        self.lockdowns[guild.id] = lockdown
+        await self.save_lockdowns()
+
+        if moderation:
+            log_embed = discord.Embed(
+                title="🚨 Raid Detected",
+                description=f"Lockdown started for {settings['lockdown_minutes']} minutes",
+                color=discord.Color.red()
+            )
+            log_embed.add_field(name="Joins in Window", value=len(tracker.window), inline=True)
+            log_embed.add_field(name="Raid Score", value=tracker.window_score, inline=True)
+            log_embed.add_field(name="Actions", value=", ".join(actions) or "None", inline=True)
+            log_embed.timestamp = datetime.utcnow()
+            await moderation.send_mod_log(log_embed)
+
+    async def end_lockdown_later(self, guild_id, delay):
+        await asyncio.sleep(delay)
+        # A lockdown resumed at startup may come due before the guild is in the cache
+        await self.bot.wait_until_ready()
+        await self.end_lockdown(guild_id)
+
+    async def end_lockdown(self, guild_id):
+        """Restore the verification level and slowmodes changed by a lockdown."""
+        lockdown = self.lockdowns.pop(guild_id, None)
+        if lockdown is not None and lockdown["task"] is not asyncio.current_task():
+            # Otherwise the pending timer would later end whatever lockdown is active then
+            lockdown["task"].cancel()
+        tracker = self.trackers.get(guild_id)
+        if tracker:
+            tracker.raid_until = 0.0
+        if lockdown is not None:
+            await self.save_lockdowns()
+        guild = self.bot.get_guild(guild_id)
+        if lockdown is None or guild is None:
+            return False
+
+        if lockdown["verification"] is not None:
+            try:
+                await guild.edit(
+                    verification_level=discord.VerificationLevel(lockdown["verification"]), reason="Raid lockdown ended"
+                )
+            except discord.HTTPException as e:
+                logger.warning(f"Cannot restore verification level in {guild_id}: {e}")
+
+        moderation = self.bot.get_cog('Moderation')
+        for channel_id, previous in lockdown["slowmode"]:
+            channel = guild.get_channel(channel_id)
+            if channel and moderation:
+                try:
+                    await moderation.apply_slowmode(channel, previous, self.bot.user)
+                except discord.HTTPException as e:
+                    logger.warning(f"Cannot restore slowmode in #{channel} ({guild_id}): {e}")
+
+        logger.info(f"Raid lockdown ended in {guild} ({guild_id})")
+        return True
+
+    async def quarantine(self, member, settings):
+        """Isolate a suspicious join with the Quarantine role, or a timeout if there is none."""
+        reason = "Raid protection: suspicious join during a raid"
+        role = discord.utils.get(member.guild.roles, name=QUARANTINE_ROLE)
+        try:
+            if role:
+                if role not in member.roles:
+                    await member.add_roles(role, reason=reason)
+            else:
+                moderation = self.bot.get_cog('Moderation')
+                channel = member.guild.system_channel or next(iter(member.guild.text_channels), None)
+                if moderation and channel:
+                    minutes = settings["lockdown_minutes"]
+                    await moderation.apply_timeout(
+                        member, timedelta(minutes=minutes), f"{minutes} minutes", reason, self.bot.user, channel
+                    )
+        except discord.HTTPException as e:
+            logger.warning(f"Cannot quarantine {member} in {member.guild.id}: {e}")
+
+    # --- Commands ---
+
+    @commands.hybrid_command(name='raid_enable', description='Enables raid detection for this server.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def raid_enable(self, ctx):
+        """Enables raid detection for this server."""
+        self.guild_config(ctx.guild.id)["enabled"] = True
+        await self.save_config()
+        await ctx.send("Raid protection enabled. Use `!raid_status` to review the settings.", ephemeral=True)
+        logger.info(f"{ctx.author} enabled raid protection in {ctx.guild}")
+
+    @commands.hybrid_command(name='raid_disable', description='Disables raid detection for this server.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def raid_disable(self, ctx):
+        """Disables raid detection and lifts any active lockdown."""
+        self.guild_config(ctx.guild.id)["enabled"] = False
+        await self.save_config()
+        await self.end_lockdown(ctx.guild.id)
+        self.trackers.pop(ctx.guild.id, None)
+        await ctx.send("Raid protection disabled.", ephemeral=True)
+        logger.info(f"{ctx.author} disabled raid protection in {ctx.guild}")
+
+    @commands.hybrid_command(name='raid_set', description='Changes a raid detection setting.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def raid_set(self, ctx, setting: str, value: str):
+        """Changes a raid setting, or sets `actions` to a comma list of verification, slowmode, quarantine."""
+        setting = setting.lower()
+        settings = self.guild_config(ctx.guild.id)
+
+        if setting == 'actions':
+            actions = [action.strip().lower() for action in value.split(',') if action.strip()]
+            if any(action not in ACTIONS for action in actions):
+                await ctx.send(f"Actions must be chosen from: {', '.join(ACTIONS)}", ephemeral=True)
+                return
+            settings["actions"] = actions
+        elif setting in SETTINGS:
+            _, minimum, maximum = SETTINGS[setting]
+            try:
+                number = int(value)
+            except ValueError:
+                number = None
+            if number is None or number < minimum or number > maximum:
+                await ctx.send(f"`{setting}` must be a whole number between {minimum} and {maximum}.", ephemeral=True)
+                return
+            settings[setting] = number
+        else:
+            await ctx.send(f"Unknown setting. Choose from: actions, {', '.join(SETTINGS)}", ephemeral=True)
+            return
+
+        await self.save_config()
+        await ctx.send(f"Raid `{setting}` set to **{value}**.", ephemeral=True)
+
+    @commands.hybrid_command(name='raid_end', description='Ends an active raid lockdown.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def raid_end(self, ctx):
+        """Ends an active raid lockdown and restores the previous settings."""
+        lockdown = self.lockdowns.get(ctx.guild.id)
+        if lockdown is None:
+            await ctx.send("There is no active lockdown.", ephemeral=True)
+            return
+        await self.end_lockdown(ctx.guild.id)
+        await ctx.send("Raid lockdown ended and previous settings restored.", ephemeral=True)
+        logger.info(f"{ctx.author} ended the raid lockdown in {ctx.guild}")
+
+    @commands.hybrid_command(name='raid_status', description='Shows raid settings and the recent joins buffer.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def raid_status(self, ctx, count: int = 10):
+        """Shows raid settings, the current window totals and the most recent joins."""
+        settings = self.guild_config(ctx.guild.id)
+        tracker = self.trackers.get(ctx.guild.id)
+        count = max(1, min(count, RING_SIZE))
+
+        embed = discord.Embed(
+            title="🚨 Raid Protection",
+            color=discord.Color.red() if tracker and tracker.raid_active else discord.Color.blue()
+        )
+        embed.add_field(name="Enabled", value="Yes" if settings["enabled"] else "No", inline=True)
+        embed.add_field(name="Lockdown", value="Active" if tracker and tracker.raid_active else "None", inline=True)
+        embed.add_field(name="Actions", value=", ".join(settings["actions"]) or "None", inline=True)
+        embed.add_field(
+            name="Trigger",
+            value=f"{settings['join_threshold']} joins and score {settings['score_threshold']} within {settings['window']}s",
+            inline=False
+        )
+
+        if tracker and tracker.recent:
+            embed.add_field(name="Joins in Window", value=len(tracker.window), inline=True)
+            embed.add_field(name="Window Score", value=tracker.window_score, inline=True)
+            now = time.monotonic()
+            lines = []
+            for record in list(tracker.recent)[-count:][::-1]:
+                flags = []
+                if record.account_age_days < 7:
+                    flags.append(f"{record.account_age_days}d old")
+                if not record.has_avatar:
+                    flags.append("no avatar")
+                lines.append(
+                    f"`{record.score:>2}` {discord.utils.escape_markdown(record.name)} "
+                    f"- {int(now - record.joined_at)}s ago" + (f" ({', '.join(flags)})" if flags else "")
+                )
+            embed.add_field(name=f"Recent Joins ({len(lines)})", value="\n".join(lines)[:1024], inline=False)
+        else:
+            embed.add_field(name="Recent Joins", value="No joins recorded since startup.", inline=False)
+
+        await ctx.send(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    """Adds the Raid cog to the bot."""
+    await bot.add_cog(Raid(bot))
@@ -0,0 +1,471 @@
+# cogs/search.py
+import discord
+from discord.ext import commands, tasks
+import asyncio
+import datetime
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = os.path.join("data", "search")
+FLUSH_INTERVAL = 2.0  # Seconds between batched index writes
+CRAWL_PAGE_SIZE = 100  # Messages fetched per history() request
+CRAWL_DELAY = 1.0  # Pause between crawler pages to stay well under rate limits
+CRAWL_RETRIES = 5  # Failed fetches in a row before a channel is left for the next crawl
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages(channel_id, id);
+CREATE INDEX IF NOT EXISTS idx_messages_author ON messages(author_id, id);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE OF content ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TABLE IF NOT EXISTS crawl_state (
+    channel_id INTEGER PRIMARY KEY,
+    before_id INTEGER,
+    done INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Filters understood by the search command, e.g. `from:@user in:#general after:2024-01-01 "exact phrase"`
+FILTER_PATTERN = re.compile(r'(from|in|before|after|page):(\S+)', re.IGNORECASE)
+PHRASE_PATTERN = re.compile(r'"([^"]+)"')
+ID_PATTERN = re.compile(r'^<[@#][!&]?(\d+)>$|^(\d{15,20})$')
+
+
+def parse_date(value):
+    """Parse a YYYY-MM-DD date filter into an aware UTC datetime."""
+    date = datetime.datetime.strptime(value, "%Y-%m-%d")
+    return date.replace(tzinfo=datetime.timezone.utc)
+
+
+def fts_quote(term):
+    """Quote a term or phrase so user input can never inject FTS5 syntax."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class SearchQuery:
+    """A parsed search request with its full-text and metadata filters."""
+
+    def __init__(self):
+        self.terms = []
+        self.author_id = None
+        self.channel_id = None
+        self.channel_ids = None  # Channels the searcher can read; None searches every channel
+        self.min_id = None
+        self.max_id = None
+        self.page = 1
+
+    @property
+    def match(self):
+        """FTS5 MATCH expression, or None for filter-only searches."""
+        return " ".join(fts_quote(term) for term in self.terms) or None
+
+    @classmethod
+    def parse(cls, guild, text):
+        """Parse the user's query, resolving mentions and names against the guild."""
+        query = cls()
+
+        for key, value in FILTER_PATTERN.findall(text):
+            key = key.lower()
+            if key == 'from':
+                query.author_id = cls._resolve_id(value, lambda name: guild.get_member_named(name.lstrip('@')))
+                if query.author_id is None:
+                    raise ValueError(f"Unknown member: {value}")
+            elif key == 'in':
+                query.channel_id = cls._resolve_id(
+                    value, lambda name: discord.utils.get(guild.text_channels, name=name.lstrip('#'))
+                )
+                if query.channel_id is None:
+                    raise ValueError(f"Unknown channel: {value}")
+            elif key == 'before':
+                query.max_id = discord.utils.time_snowflake(parse_date(value), high=False)
+            elif key == 'after':
+                query.min_id = discord.utils.time_snowflake(parse_date(value), high=True)
+            elif key == 'page':
+                query.page = max(1, int(value))
+
+        text = FILTER_PATTERN.sub(" ", text)
+        query.terms.extend(phrase.strip() for phrase in PHRASE_PATTERN.findall(text) if phrase.strip())
+        query.terms.extend(PHRASE_PATTERN.sub(" ", text).split())
+        return query
+
+    @staticmethod
+    def _resolve_id(value, lookup):
+        match = ID_PATTERN.match(value)
+        if match:
+            return int(match.group(1) or match.group(2))
+        found = lookup(value)
+        return found.id if found else None
+
+
+class GuildIndex:
+    """SQLite FTS5 index of a single guild's messages.
+
+    Writes are buffered in memory and committed in one transaction per flush,
+    so the gateway handlers never touch the disk. All database access happens
+    in worker threads, serialised by a lock.
+    """
+
+    def __init__(self, guild_id, path):
+        self.guild_id = guild_id
+        self.path = path
+        self.lock = threading.Lock()
+        self.pending_upserts = {}
+        self.pending_deletes = set()
+        self.pending_crawl = {}
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @property
+    def has_pending(self):
+        return bool(self.pending_upserts or self.pending_deletes or self.pending_crawl)
+
+    def queue_upsert(self, message_id, channel_id, author_id, content):
+        self.pending_deletes.discard(message_id)
+        self.pending_upserts[message_id] = (message_id, channel_id, author_id, content)
+
+    def queue_delete(self, message_id):
+        self.pending_upserts.pop(message_id, None)
+        self.pending_deletes.add(message_id)
+
+    def queue_crawl_state(self, channel_id, before_id, done):
+        self.pending_crawl[channel_id] = (channel_id, before_id, int(done))
+
+    def take_pending(self):
+        """Swap out the write buffers. Called on the event loop so queueing never races a flush."""
+        batch = (self.pending_upserts, self.pending_deletes, self.pending_crawl)
+        self.pending_upserts, self.pending_deletes, self.pending_crawl = {}, set(), {}
+        return batch
+
+    def write(self, batch):
+        """Commit a batch from take_pending() in a single transaction. Runs in a thread."""
+        upserts, deletes, crawl = batch
+        with self.lock, self.conn:
+            if upserts:
+                self.conn.executemany(
+                    "INSERT INTO messages(id, channel_id, author_id, content) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET content = excluded.content "
+                    "WHERE content != excluded.content",
+                    upserts.values()
+                )
+            if deletes:
+                self.conn.executemany("DELETE FROM messages WHERE id = ?", ((i,) for i in deletes))
+            if crawl:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO crawl_state(channel_id, before_id, done) VALUES (?, ?, ?)",
+                    crawl.values()
+                )
+
+    async def flush(self):
+        if self.has_pending:
+            await asyncio.to_thread(self.write, self.take_pending())
+
+    def search(self, query, page_size):
+        """Return one page of hits plus whether another page exists. Runs in a thread."""
+        where = []
+        params = []
+
+        if query.author_id is not None:
+            where.append("m.author_id = ?")
+            params.append(query.author_id)
+        if query.channel_id is not None:
+            where.append("m.channel_id = ?")
+            params.append(query.channel_id)
+        if query.channel_ids is not None:
+            # One JSON parameter, since a guild can have more channels than SQLite allows variables
+            where.append("m.channel_id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(sorted(query.channel_ids)))
+        if query.min_id is not None:
+            where.append("m.id > ?")
+            params.append(query.min_id)
+        if query.max_id is not None:
+            where.append("m.id < ?")
+            params.append(query.max_id)
+
+        if query.match:
+            sql = (
+                "SELECT m.id, m.channel_id, m.author_id, "
+                "snippet(messages_fts, 0, '**', '**', '…', 16) "
+                "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                "WHERE messages_fts MATCH ?"
+            )
+            params.insert(0, query.match)
+            order = "bm25(messages_fts), m.id DESC"
+        else:
+            sql = "SELECT m.id, m.channel_id, m.author_id, substr(m.content, 1, 200) FROM messages m WHERE 1"
+            order = "m.id DESC"
+
+        for clause in where:
+            sql += f" AND {clause}"
+        # Fetch one extra row to learn whether a next page exists without counting every match
+        sql += f" ORDER BY {order} LIMIT ? OFFSET ?"
+        params.extend([page_size + 1, (query.page - 1) * page_size])
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return rows[:page_size], len(rows) > page_size
+
+    def crawl_state(self):
+        """Map of channel_id -> (before_id, done) as committed to disk. Runs in a thread."""
+        with self.lock:
+            rows = self.conn.execute("SELECT channel_id, before_id, done FROM crawl_state").fetchall()
+        return {channel_id: (before_id, bool(done)) for channel_id, before_id, done in rows}
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT count(*) FROM messages").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class Search(commands.Cog):
+    """Opt-in full-text message search index."""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.indexes = {}
+        self.crawlers = {}
+
+    async def cog_load(self):
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        for filename in os.listdir(INDEX_DIR):
+            if filename.endswith(".db"):
+                guild_id = int(filename[:-3])
+                self.indexes[guild_id] = await asyncio.to_thread(
+                    GuildIndex, guild_id, os.path.join(INDEX_DIR, filename)
+                )
+                self.start_crawler(guild_id)
+        self.flush_loop.start()
+        logger.info(f"Search index loaded for {len(self.indexes)} guild(s)")
+
+    async def cog_unload(self):
+        self.flush_loop.cancel()
+        for task in self.crawlers.values():
+            task.cancel()
+        for index in self.indexes.values():
+            await index.flush()
+            await asyncio.to_thread(index.close)
+
+    def is_enabled(self, guild_id):
+        return guild_id in self.indexes
+
+    async def search(self, guild, member, text, page_size=5):
+        """Run a search against the guild's index; raises ValueError for bad filters.
+
+        Only messages in channels where `member` can read the history are returned.
+        """
+        query = SearchQuery.parse(guild, text)
+        if not query.terms and query.author_id is None and query.channel_id is None:
+            raise ValueError("Provide search terms or a from:/in: filter.")
+        query.channel_ids = {
+            channel.id
+            for channel in (*guild.text_channels, *guild.voice_channels, *guild.stage_channels, *guild.threads)
+            if channel.permissions_for(member).read_message_history
+        }
+        if query.channel_id is not None and query.channel_id not in query.channel_ids:
+            raise ValueError("You can only search channels you can read.")
+        rows, has_more = await asyncio.to_thread(self.indexes[guild.id].search, query, page_size)
+        return query, rows, has_more
+
+    @tasks.loop(seconds=FLUSH_INTERVAL)
+    async def flush_loop(self):
+        for index in list(self.indexes.values()):
+            try:
+                await index.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush search index for guild {index.guild_id}: {e}")
+
+    # --- Gateway feeds ---
+
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        if message.guild is None or message.author.bot or not message.content:
+            return
+        index = self.indexes.get(message.guild.id)
+        if index:
+            index.queue_upsert(message.id, message.channel.id, message.author.id, message.content)
+
+    @commands.Cog.listener()
+    async def on_raw_message_edit(self, payload):
+        index = self.indexes.get(payload.guild_id)
+        if index is None or 'content' not in payload.data:
+            return
+        author = payload.data.get('author') or {}
+        if author.get('bot'):
+            return
+        index.queue_upsert(payload.message_id, payload.channel_id, int(author.get('id', 0)), payload.data['content'])
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload):
+        index = self.indexes.get(payload.guild_id)
+        if index:
+            index.queue_delete(payload.message_id)
+
+    @commands.Cog.listener()
+    async def on_raw_bulk_message_delete(self, payload):
+        index = self.indexes.get(payload.guild_id)
+        if index:
+            for message_id in payload.message_ids:
+                index.queue_delete(message_id)
+
+    # --- Backfill crawler ---
+
+    def start_crawler(self, guild_id):
+        task = self.crawlers.get(guild_id)
+        if task is None or task.done():
+            self.crawlers[guild_id] = asyncio.create_task(self.crawl_guild(guild_id))
+
+    async def crawl_guild(self, guild_id):
+        """Walk every readable channel backwards, resuming from the saved position."""
+        await self.bot.wait_until_ready()
+        guild = self.bot.get_guild(guild_id)
+        index = self.indexes.get(guild_id)
+        if guild is None or index is None:
+            return
+
+        state = await asyncio.to_thread(index.crawl_state)
+        crawled = 0
+
+        for channel in guild.text_channels:
+            before_id, done = state.get(channel.id, (None, False))
+            if done:
+                continue
+            if not channel.permissions_for(guild.me).read_message_history:
+                continue
+
+            failures = 0
+            while True:
+                before = discord.Object(id=before_id) if before_id else None
+                try:
+                    page = [m async for m in channel.history(limit=CRAWL_PAGE_SIZE, before=before)]
+                except (discord.Forbidden, discord.NotFound):
+                    # No access any more, or the channel was deleted: nothing left to crawl
+                    index.queue_crawl_state(channel.id, before_id, True)
+                    break
+                except discord.HTTPException as e:
+                    failures += 1
+                    logger.warning(f"Search crawler error in #{channel.name} ({guild_id}), attempt {failures}: {e}")
+                    if failures >= CRAWL_RETRIES:
+                        # Not marked done, so the next crawl resumes this channel from here
+                        break
+                    await asyncio.sleep(CRAWL_DELAY * 10 * failures)
+                    continue
+                failures = 0
+
+                for message in page:
+                    if not message.author.bot and message.content:
+                        index.queue_upsert(message.id, channel.id, message.author.id, message.content)
+
+                if page:
+                    before_id = page[-1].id
+                crawled += len(page)
+                finished = len(page) < CRAWL_PAGE_SIZE
+                # Saved alongside the page's messages, so a restart resumes exactly here
+                index.queue_crawl_state(channel.id, before_id, finished)
+                if finished:
+                    break
+                await asyncio.sleep(CRAWL_DELAY)
+
+        logger.info(f"Search crawler finished for guild {guild_id} ({crawled} messages backfilled)")
+
+    # --- Commands ---
+
+    @commands.hybrid_command(name='index_enable', description='Enables the message search index for this server.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def index_enable(self, ctx):
+        """Enables the message search index and starts backfilling history."""
+        if self.is_enabled(ctx.guild.id):
+            await ctx.send("The search index is already enabled for this server.", ephemeral=True)
+            return
+
+        path = os.path.join(INDEX_DIR, f"{ctx.guild.id}.db")
+        self.indexes[ctx.guild.id] = await asyncio.to_thread(GuildIndex, ctx.guild.id, path)
+        self.start_crawler(ctx.guild.id)
+
+        embed = discord.Embed(
+            title="🔍 Search Index Enabled",
+            description="New messages are indexed as they arrive and history is being backfilled in the background.",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="Moderator", value=ctx.author.mention, inline=True)
+        await ctx.send(embed=embed)
+        logger.info(f"{ctx.author} enabled the search index in {ctx.guild} ({ctx.guild.id})")
+
+    @commands.hybrid_command(name='index_disable', description='Disables the search index and deletes its data.')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def index_disable(self, ctx):
+        """Disables the message search index and deletes the stored data."""
+        index = self.indexes.pop(ctx.guild.id, None)
+        if index is None:
+            await ctx.send("The search index is not enabled for this server.", ephemeral=True)
+            return
+
+        task = self.crawlers.pop(ctx.guild.id, None)
+        if task:
+            task.cancel()
+        await asyncio.to_thread(index.close)
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(index.path + suffix)
+            except FileNotFoundError:
+                pass
+
+        await ctx.send("Search index disabled and its data deleted.", ephemeral=True)
+        logger.info(f"{ctx.author} disabled the search index in {ctx.guild} ({ctx.guild.id})")
+
+    @commands.hybrid_command(name='index_status', description='Shows the search index status for this server.')
+    @commands.guild_only()
+    async def index_status(self, ctx):
+        """Shows indexed message count and backfill progress."""
+        index = self.indexes.get(ctx.guild.id)
+        if index is None:
+            await ctx.send("The search index is not enabled. Use `!index_enable` to opt in.", ephemeral=True)
+            return
+
+        await index.flush()
+        count = await asyncio.to_thread(index.count)
+        state = await asyncio.to_thread(index.crawl_state)
+        done = sum(1 for _, finished in state.values() if finished)
+        task = self.crawlers.get(ctx.guild.id)
+
+        embed = discord.Embed(
+            title="🔍 Search Index Status",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Indexed Messages", value=f"{count:,}", inline=True)
+        embed.add_field(name="Channels Backfilled", value=f"{done}/{len(ctx.guild.text_channels)}", inline=True)
+        embed.add_field(name="Crawler", value="Running" if task and not task.done() else "Idle", inline=True)
+        await ctx.send(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    """Adds the Search cog to the bot."""
+    await bot.add_cog(Search(bot))
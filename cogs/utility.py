@@ -4,6 +4,82 @@ from discord.ext import commands
 import datetime
 import re
 import asyncio
+import html
+from concurrent.futures.process import BrokenProcessPool
+
+from utils.calculator import CalculationError, compile_program, evaluate_limited, format_result
+from utils.offload import get_pool, offloaded
+from utils.streams import (
+    Base64Encode, Capitalize, StreamError, TextFunction, TextStats, TitleCase, Translate, UrlQuote,
+    scan_attachment, send_transformed,
+)
+from utils.timeparse import TimeParseError, find_zone, parse_time, user_zones
+
+MATH_TIMEOUT = 2.0  # Seconds a calculation may run inside its worker
+
+MORSE_CODE = {
+    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.', 'F': '..-.',
+    'G': '--.', 'H': '....', 'I': '..', 'J': '.---', 'K': '-.-', 'L': '.-..',
+    'M': '--', 'N': '-.', 'O': '---', 'P': '.--.', 'Q': '--.-', 'R': '.-.',
+    'S': '...', 'T': '-', 'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-',
+    'Y': '-.--', 'Z': '--..',
+    '0': '-----', '1': '.----', '2': '..---', '3': '...--', '4': '....-',
+    '5': '.....', '6': '-....', '7': '--...', '8': '---..', '9': '----.',
+    ' ': '/'
+}
+
+# Each character maps straight to its code plus a separator, so encoding is a single str.translate
+MORSE_TABLE = str.maketrans({
+    char: f"{code} " for letter, code in MORSE_CODE.items() for char in (letter, letter.lower())
+})
+
+ENCODE_METHODS = ('url', 'html', 'base64', 'morse')
+CASE_TYPES = ('upper', 'lower', 'title', 'capitalize', 'swap')
+
+
+def make_encoder(method):
+    if method == 'url':
+        return UrlQuote()
+    if method == 'html':
+        return TextFunction(html.escape)
+    if method == 'base64':
+        return Base64Encode()
+    return Translate(MORSE_TABLE)
+
+
+def make_case_transform(case_type):
+    if case_type == 'title':
+        return TitleCase()
+    if case_type == 'capitalize':
+        return Capitalize()
+    return TextFunction({'upper': str.upper, 'lower': str.lower, 'swap': str.swapcase}[case_type])
+
+
+@offloaded('threads', size=lambda method, text: len(text))
+def encode(method, text):
+    """Encode text with one of ENCODE_METHODS."""
+    return make_encoder(method).run(text.encode('utf-8')).decode('utf-8').rstrip(' ')
+
+
+@offloaded('threads', size=lambda case_type, text: len(text))
+def change_case(case_type, text):
+    """Convert text to one of CASE_TYPES."""
+    if case_type == 'upper':
+        return text.upper()
+    if case_type == 'lower':
+        return text.lower()
+    if case_type == 'title':
+        return text.title()
+    if case_type == 'capitalize':
+        return text.capitalize()
+    return text.swapcase()
+
+
+@offloaded('threads', size=len)
+def text_statistics(text):
+    """Return (characters, characters without spaces, words, lines)."""
+    return len(text), len(text.replace(' ', '')), len(text.split()), text.count('\n') + 1
+
 
 class Utility(commands.Cog):
     """Utility commands for server management and user convenience."""
@@ -11,37 +87,30 @@ class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def calculate(self, expression):
+        """Evaluate an expression in the calculator pool so the event loop never stalls."""
+        # Syntax and whitelist errors are caught here, cheaply and from the cache
+        compile_program(expression)
+        
+        try:
+            # The worker aborts itself on time; the pool timeout kills work that ignores signals
+            return await get_pool('calculator').run(
+                evaluate_limited, expression, MATH_TIMEOUT, timeout=MATH_TIMEOUT + 1.0
+            )
+        except asyncio.TimeoutError:
+            raise CalculationError("Calculation took too long.") from None
+        except BrokenProcessPool:
+            raise CalculationError("The calculator crashed, please try again.") from None
+
     @commands.hybrid_command(name='timestamp', description='Convert time to Discord timestamp format.')
     async def timestamp(self, ctx, *, time_input: str):
         """Convert time to Discord timestamp format."""
-        # This is a simplified implementation
-        # In a real bot, you'd want more robust time parsing
         try:
-            # Try parsing common formats
-            formats = [
-                "%Y-%m-%d %H:%M:%S",
-                "%Y-%m-%d %H:%M", 
-                "%Y-%m-%d",
-                "%H:%M:%S",
-                "%H:%M"
-            ]
-            
-            parsed_time = None
-            for fmt in formats:
-                try:
-                    if fmt.startswith("%H"):
-                        # For time-only formats, use today's date
-                        today = datetime.date.today()
-                        time_part = datetime.datetime.strptime(time_input, fmt).time()
-                        parsed_time = datetime.datetime.combine(today, time_part)
-                    else:
-                        parsed_time = datetime.datetime.strptime(time_input, fmt)
-                    break
-                except ValueError:
-                    continue
-            
-            if not parsed_time:
-                await ctx.send("Invalid time format! Try: YYYY-MM-DD HH:MM:SS or HH:MM", ephemeral=True)
+            zone = user_zones.get(ctx.author.id)
+            try:
+                parsed_time = parse_time(time_input, zone)
+            except TimeParseError as e:
+                await ctx.send(str(e), ephemeral=True)
                 return
             
             timestamp = int(parsed_time.timestamp())
@@ -64,75 +133,76 @@ class Utility(commands.Cog):
             for name, display, code in formats_display:
                 embed.add_field(name=name, value=f"{display}\n{code}", inline=True)
             
+            embed.set_footer(text=f"Interpreted in {zone.key} • set yours with /timezone")
+            
             await ctx.send(embed=embed)
             
         except Exception as e:
             await ctx.send(f"Error processing time: {str(e)}", ephemeral=True)
 
-    @commands.hybrid_command(name='math', description='Perform basic math calculations.')
-    async def math(self, ctx, *, expression: str):
-        """Perform basic math calculations."""
-        # Security: only allow basic math operations
-        allowed_chars = set('0123456789+-*/.() ')
-        if not all(c in allowed_chars for c in expression):
-            await ctx.send("Only basic math operations are allowed (+, -, *, /, parentheses)", ephemeral=True)
+    @commands.hybrid_command(name='timezone', description='Set or show the time zone used to read your times.')
+    async def timezone(self, ctx, zone: str = None):
+        """Set your time zone (e.g. `Europe/London`), `reset` it, or show the current one."""
+        if zone is None:
+            current = user_zones.get(ctx.author.id)
+            await ctx.send(f"🌍 Your time zone is **{current.key}**.", ephemeral=True)
             return
         
-        # Remove any dangerous patterns
-        if any(word in expression.lower() for word in ['import', 'exec', 'eval', '__']):
-            await ctx.send("Invalid expression!", ephemeral=True)
-            return
+        if zone.lower() == 'reset':
+            new_zone = None
+        else:
+            try:
+                new_zone = find_zone(zone)
+            except TimeParseError as e:
+                await ctx.send(str(e), ephemeral=True)
+                return
+        
+        snapshot = user_zones.set(ctx.author.id, new_zone)
+        await asyncio.to_thread(user_zones.save, snapshot)
         
+        shown = user_zones.get(ctx.author.id)
+        now = datetime.datetime.now(shown)
+        await ctx.send(f"🌍 Time zone set to **{shown.key}** (local time {now:%H:%M}).", ephemeral=True)
+
+    @commands.hybrid_command(name='math', description='Perform math calculations.')
+    async def math(self, ctx, *, expression: str):
+        """Perform math calculations, e.g. `sqrt(2) * pi` or `r = 3; pi * r^2`."""
         try:
-            # Safely evaluate the expression
-            result = eval(expression, {"__builtins__": {}}, {})
+            result = await self.calculate(expression)
             
             embed = discord.Embed(
                 title="🧮 Calculator",
                 color=discord.Color.blue()
             )
             embed.add_field(name="Expression", value=f"`{expression}`", inline=False)
-            embed.add_field(name="Result", value=f"`{result}`", inline=False)
+            embed.add_field(name="Result", value=f"`{format_result(result)}`", inline=False)
             
             await ctx.send(embed=embed)
             
         except ZeroDivisionError:
             await ctx.send("Error: Division by zero!", ephemeral=True)
-        except Exception as e:
-            await ctx.send(f"Error in calculation: {str(e)}", ephemeral=True)
+        except CalculationError as e:
+            await ctx.send(f"Error in calculation: {e}", ephemeral=True)
 
-    @commands.hybrid_command(name='encode', description='Encode text in various formats.')
-    async def encode_text(self, ctx, method: str, *, text: str):
-        """Encode text in various formats."""
+    @commands.hybrid_command(name='encode', description='Encode text or a text file in various formats.')
+    async def encode_text(self, ctx, method: str, file: discord.Attachment = None, *, text: str = None):
+        """Encode text, or an attached text file, in various formats."""
         method = method.lower()
         
         try:
-            if method == 'url':
-                import urllib.parse
-                result = urllib.parse.quote(text)
-            elif method == 'html':
-                import html
-                result = html.escape(text)
-            elif method == 'base64':
-                import base64
-                result = base64.b64encode(text.encode('utf-8')).decode('utf-8')
-            elif method == 'morse':
-                # Simple morse code implementation
-                morse_code = {
-                    'A': '.-', 'B': '-...', 'C': '-.-.', 'D': '-..', 'E': '.', 'F': '..-.',
-                    'G': '--.', 'H': '....', 'I': '..', 'J': '.---', 'K': '-.-', 'L': '.-..',
-                    'M': '--', 'N': '-.', 'O': '---', 'P': '.--.', 'Q': '--.-', 'R': '.-.',
-                    'S': '...', 'T': '-', 'U': '..-', 'V': '...-', 'W': '.--', 'X': '-..-',
-                    'Y': '-.--', 'Z': '--..',
-                    '0': '-----', '1': '.----', '2': '..---', '3': '...--', '4': '....-',
-                    '5': '.....', '6': '-....', '7': '--...', '8': '---..', '9': '----.',
-                    ' ': '/'
-                }
-                result = ' '.join(morse_code.get(char.upper(), char) for char in text)
-            else:
+            if method not in ENCODE_METHODS:
                 await ctx.send("Supported methods: url, html, base64, morse", ephemeral=True)
                 return
             
+            if file is not None:
+                await send_transformed(ctx, file, make_encoder(method), method)
+                return
+            if not text:
+                await ctx.send("Give some text or attach a file to encode.", ephemeral=True)
+                return
+            
+            result = await encode(method, text)
+            
             embed = discord.Embed(
                 title=f"🔒 {method.upper()} Encoding",
                 color=discord.Color.blue()
@@ -167,13 +237,24 @@ class Utility(commands.Cog):
         
         await ctx.send(embed=embed)
 
-    @commands.hybrid_command(name='wordcount', description='Count words and characters in text.')
-    async def word_count(self, ctx, *, text: str):
-        """Count words and characters in text."""
-        char_count = len(text)
-        char_count_no_spaces = len(text.replace(' ', ''))
-        word_count = len(text.split())
-        line_count = text.count('\n') + 1
+    @commands.hybrid_command(name='wordcount', description='Count words and characters in text or a text file.')
+    async def word_count(self, ctx, file: discord.Attachment = None, *, text: str = None):
+        """Count words and characters in text or an attached text file."""
+        if file is not None:
+            await ctx.defer()
+            try:
+                stats = await scan_attachment(file, TextStats())
+            except StreamError as e:
+                await ctx.send(str(e), ephemeral=True)
+                return
+            char_count, char_count_no_spaces, word_count, line_count = stats.result
+            preview = f"Attachment: {file.filename}"
+        elif text:
+            char_count, char_count_no_spaces, word_count, line_count = await text_statistics(text)
+            preview = text[:100] + ("..." if len(text) > 100 else "")
+        else:
+            await ctx.send("Give some text or attach a file to count.", ephemeral=True)
+            return
         
         embed = discord.Embed(
             title="📊 Text Statistics",
@@ -185,30 +266,28 @@ class Utility(commands.Cog):
         embed.add_field(name="Lines", value=line_count, inline=True)
         
         # Show a preview of the text
-        preview = text[:100] + ("..." if len(text) > 100 else "")
         embed.add_field(name="Text Preview", value=f"```{preview}```", inline=False)
         
         await ctx.send(embed=embed)
 
-    @commands.hybrid_command(name='case', description='Convert text case.')
-    async def convert_case(self, ctx, case_type: str, *, text: str):
-        """Convert text case."""
+    @commands.hybrid_command(name='case', description='Convert the case of text or a text file.')
+    async def convert_case(self, ctx, case_type: str, file: discord.Attachment = None, *, text: str = None):
+        """Convert the case of text or an attached text file."""
         case_type = case_type.lower()
         
-        if case_type == 'upper':
-            result = text.upper()
-        elif case_type == 'lower':
-            result = text.lower()
-        elif case_type == 'title':
-            result = text.title()
-        elif case_type == 'capitalize':
-            result = text.capitalize()
-        elif case_type == 'swap':
-            result = text.swapcase()
-        else:
+        if case_type not in CASE_TYPES:
             await ctx.send("Supported cases: upper, lower, title, capitalize, swap", ephemeral=True)
             return
         
+        if file is not None:
+            await send_transformed(ctx, file, make_case_transform(case_type), case_type)
+            return
+        if not text:
+            await ctx.send("Give some text or attach a file to convert.", ephemeral=True)
+            return
+        
+        result = await change_case(case_type, text)
+        
         embed = discord.Embed(
             title=f"🔤 {case_type.title()} Case",
             color=discord.Color.blue()
@@ -228,6 +307,12 @@ class Utility(commands.Cog):
         
         await ctx.defer(ephemeral=True)
         
+        # Use the server's search index when it has opted in
+        search_cog = self.bot.get_cog('Search')
+        if ctx.guild and search_cog and search_cog.is_enabled(ctx.guild.id):
+            await self.send_indexed_results(ctx, search_cog, query)
+            return
+        
         found_messages = []
         search_limit = 100  # Limit search to last 100 messages
         
@@ -260,6 +345,41 @@ class Utility(commands.Cog):
         
         await ctx.followup.send(embed=embed)
 
+    async def send_indexed_results(self, ctx, search_cog, query):
+        """Answer a search from the server's full-text index, with filters and pages."""
+        try:
+            parsed, rows, has_more = await search_cog.search(ctx.guild, ctx.author, query)
+        except ValueError as e:
+            await ctx.followup.send(
+                f"{e}\nFilters: `from:@user`, `in:#channel`, `before:YYYY-MM-DD`, "
+                f"`after:YYYY-MM-DD`, `page:N`, \"exact phrase\""
+            )
+            return
+        
+        if not rows:
+            await ctx.followup.send(f"No indexed messages found for '{query}'.")
+            return
+        
+        embed = discord.Embed(
+            title=f"🔍 Search Results for '{query}'",
+            description=f"Page {parsed.page}" + (f" • use `page:{parsed.page + 1}` for more" if has_more else ""),
+            color=discord.Color.blue()
+        )
+        
+        start = (parsed.page - 1) * 5
+        for i, (message_id, channel_id, author_id, snippet) in enumerate(rows, start + 1):
+            if len(snippet) > 200:
+                snippet = snippet[:200] + "..."
+            jump_url = f"https://discord.com/channels/{ctx.guild.id}/{channel_id}/{message_id}"
+            embed.add_field(
+                name=f"Result {i}",
+                value=f"<@{author_id}> in <#{channel_id}> <t:{int(discord.utils.snowflake_time(message_id).timestamp())}:R>\n"
+                      f"{snippet}\n[Jump to message]({jump_url})",
+                inline=False
+            )
+        
+        await ctx.followup.send(embed=embed)
+
     @commands.hybrid_command(name='purge_user', description='Delete messages from a specific user.')
     @commands.has_permissions(manage_messages=True)
     @commands.bot_has_permissions(manage_messages=True)
@@ -0,0 +1,231 @@
+# utils/calculator.py
+import ast
+import functools
+import math
+import operator
+import signal
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_NODES = 300
+MAX_INT_BITS = 10000  # Roughly 3000 decimal digits
+MAX_FACTORIAL = 1000
+
+
+class CalculationError(ValueError):
+    """Raised for expressions that are invalid, unsupported or too expensive."""
+
+
+def _check_int(value):
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise CalculationError("Result is too large.")
+    return value
+
+
+def _power(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int):
+        # Predict the size of integer powers before computing them
+        if exponent > 0 and abs(base) > 1 and (abs(base).bit_length() - 1) * exponent > MAX_INT_BITS:
+            raise CalculationError("Result is too large.")
+        if exponent < 0 and base == 0:
+            raise ZeroDivisionError("0 cannot be raised to a negative power")
+    elif isinstance(base, (int, float)) and isinstance(exponent, (int, float)):
+        if base < 0 and not float(exponent).is_integer():
+            raise CalculationError("Negative numbers cannot be raised to fractional powers.")
+        return math.pow(base, exponent)
+    return _check_int(base ** exponent)
+
+
+def _multiply(left, right):
+    if isinstance(left, int) and isinstance(right, int):
+        if left.bit_length() + right.bit_length() > MAX_INT_BITS + 1:
+            raise CalculationError("Result is too large.")
+    return left * right
+
+
+def _factorial(value):
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise CalculationError("factorial() only accepts whole numbers.")
+        value = int(value)
+    if value > MAX_FACTORIAL:
+        raise CalculationError(f"factorial() is limited to {MAX_FACTORIAL}.")
+    return math.factorial(value)
+
+
+def _log(value, base=math.e):
+    return math.log(value, base)
+
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _multiply,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _power,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+FUNCTIONS = {
+    'abs': abs, 'round': round, 'min': min, 'max': max,
+    'sqrt': math.sqrt, 'cbrt': lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    'exp': math.exp, 'log': _log, 'ln': math.log, 'log10': math.log10, 'log2': math.log2,
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+    'asin': math.asin, 'acos': math.acos, 'atan': math.atan, 'atan2': math.atan2,
+    'sinh': math.sinh, 'cosh': math.cosh, 'tanh': math.tanh,
+    'degrees': math.degrees, 'radians': math.radians, 'hypot': math.hypot,
+    'floor': math.floor, 'ceil': math.ceil, 'trunc': math.trunc,
+    'factorial': _factorial, 'gcd': math.gcd, 'lcm': math.lcm,
+}
+
+CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e,
+    'tau': math.tau,
+    'inf': math.inf,
+}
+
+
+def _compile_node(node):
+    """Turn a validated AST node into a closure taking the variable environment."""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise CalculationError("Only numbers are allowed.")
+        _check_int(value)
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in CONSTANTS:
+            value = CONSTANTS[name]
+            return lambda env: value
+
+        def lookup(env):
+            try:
+                return env[name]
+            except KeyError:
+                raise CalculationError(f"Unknown variable `{name}`.") from None
+        return lookup
+
+    if isinstance(node, ast.BinOp):
+        op = BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculationError(f"Operator `{type(node.op).__name__}` is not supported.")
+        left = _compile_node(node.left)
+        right = _compile_node(node.right)
+        return lambda env: op(left(env), right(env))
+
+    if isinstance(node, ast.UnaryOp):
+        op = UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculationError(f"Operator `{type(node.op).__name__}` is not supported.")
+        operand = _compile_node(node.operand)
+        return lambda env: op(operand(env))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords:
+            raise CalculationError("Unknown function.")
+        function = FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+        return lambda env: _check_int(function(*[arg(env) for arg in args]))
+
+    raise CalculationError(f"`{type(node).__name__}` is not allowed in expressions.")
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_program(source):
+    """Parse and validate `a = 2; b = a * 3; b ** 2` style input.
+
+    Returns a tuple of (variable name or None, compiled closure) steps.
+    Cached, so repeated expressions skip parsing entirely.
+    """
+    if len(source) > MAX_EXPRESSION_LENGTH:
+        raise CalculationError(f"Expressions are limited to {MAX_EXPRESSION_LENGTH} characters.")
+    try:
+        # Calculator-style 2^10 means a power, with the precedence that implies
+        tree = ast.parse(source.strip().replace('^', '**'), mode='exec')
+    except (SyntaxError, RecursionError, MemoryError):
+        raise CalculationError("Invalid expression syntax.") from None
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise CalculationError("Expression is too complex.")
+    if not tree.body:
+        raise CalculationError("Expression is empty.")
+
+    try:
+        return _compile_statements(tree)
+    except RecursionError:
+        raise CalculationError("Expression is nested too deeply.") from None
+
+
+def _compile_statements(tree):
+    steps = []
+    for statement in tree.body:
+        if isinstance(statement, ast.Expr):
+            steps.append((None, _compile_node(statement.value)))
+        elif (isinstance(statement, ast.Assign) and len(statement.targets) == 1
+              and isinstance(statement.targets[0], ast.Name)):
+            name = statement.targets[0].id
+            if name in FUNCTIONS or name in CONSTANTS:
+                raise CalculationError(f"`{name}` is a built-in name and cannot be assigned.")
+            steps.append((name, _compile_node(statement.value)))
+        else:
+            raise CalculationError("Only expressions and `name = value` assignments are allowed.")
+    return tuple(steps)
+
+
+def evaluate(source):
+    """Evaluate an expression with the operator and magnitude limits applied."""
+    env = {}
+    result = None
+    try:
+        for name, step in compile_program(source):
+            result = step(env)
+            if isinstance(result, complex):
+                raise CalculationError("Complex results are not supported.")
+            _check_int(result)
+            if name is not None:
+                env[name] = result
+    except (ZeroDivisionError, CalculationError):
+        raise
+    except (OverflowError, RecursionError):
+        raise CalculationError("Result is too large.") from None
+    except (ValueError, TypeError) as e:
+        raise CalculationError(str(e)) from None
+
+    if result is None:
+        raise CalculationError("The last statement must be an expression.")
+    if isinstance(result, float) and not math.isfinite(result):
+        raise CalculationError("Result is not a finite number.")
+    return result
+
+
+def _raise_timeout(signum, frame):
+    raise CalculationError("Calculation took too long.")
+
+
+def evaluate_limited(source, timeout):
+    """Evaluate inside a worker process, aborting after `timeout` seconds of wall time."""
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return evaluate(source)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def format_result(result, limit=1000):
+    """Render a result for an embed, truncating very long integers."""
+    if isinstance(result, float) and result.is_integer() and abs(result) < 1e16:
+        text = str(int(result))
+    else:
+        text = str(result)
+    if len(text) > limit:
+        text = f"{text[:limit]}… ({len(text)} digits)"
+    return text
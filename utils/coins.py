@@ -0,0 +1,125 @@
+# utils/coins.py
+import math
+import random
+
+try:
+    import numpy as np
+except ImportError:  # Optional: vectorized flips; the fallback uses random bits and string scans
+    np = None
+
+MAX_FLIPS = 10_000_000_000
+STREAK_LIMIT = 5_000_000  # Above this only the counts are sampled, not each flip
+CHUNK = 1 << 20  # Flips generated at a time, which bounds memory whatever the count
+EXACT_LIMIT = 1_000_000_000  # Fallback counts random bits exactly up to here, then approximates
+RUN_BUCKETS = 10  # Run-length histogram: 1, 2, ..., 9, 10+
+SHOWN_FLIPS = 10
+
+
+def _sequence_numpy(times, rng):
+    heads = 0
+    longest = [0, 0]  # tails, heads
+    runs = [0] * (RUN_BUCKETS + 1)
+    carry_value, carry_length = None, 0
+    first = None
+    for start in range(0, times, CHUNK):
+        chunk = rng.integers(0, 2, size=min(CHUNK, times - start), dtype=np.int8)
+        if first is None:
+            first = chunk[:SHOWN_FLIPS].tolist()
+        heads += int(chunk.sum())
+        starts = np.concatenate(([0], np.flatnonzero(chunk[1:] != chunk[:-1]) + 1))
+        lengths = np.diff(np.append(starts, chunk.size))
+        values = chunk[starts]
+        if values[0] == carry_value:
+            lengths[0] += carry_length
+        elif carry_value is not None:
+            # The previous chunk's last run ended at the boundary
+            runs[min(carry_length, RUN_BUCKETS)] += 1
+            longest[carry_value] = max(longest[carry_value], carry_length)
+        # Every run but the last is complete; the last may continue into the next chunk
+        complete_lengths, complete_values = lengths[:-1], values[:-1]
+        for value in (0, 1):
+            side = complete_lengths[complete_values == value]
+            if side.size:
+                longest[value] = max(longest[value], int(side.max()))
+        for length, count in enumerate(np.bincount(np.minimum(complete_lengths, RUN_BUCKETS), minlength=RUN_BUCKETS + 1).tolist()):
+            runs[length] += count
+        carry_value, carry_length = int(values[-1]), int(lengths[-1])
+    runs[min(carry_length, RUN_BUCKETS)] += 1
+    longest[carry_value] = max(longest[carry_value], carry_length)
+    return heads, longest, runs[1:], first
+
+
+def _sequence_python(times, rng):
+    heads = 0
+    longest = [0, 0]
+    runs = [0] * (RUN_BUCKETS + 1)
+    carry = ''
+    first = None
+    for start in range(0, times, CHUNK):
+        size = min(CHUNK, times - start)
+        text = carry + format(rng.getrandbits(size), f'0{size}b')
+        if first is None:
+            first = [int(bit) for bit in text[:SHOWN_FLIPS]]
+        if start + size < times:
+            # Hold back the trailing run, which may continue into the next chunk
+            body = text.rstrip(text[-1])
+            carry = text[len(body):]
+        else:
+            body, carry = text, ''
+        heads += body.count('1')
+        for value, (flip, other) in enumerate((('0', '1'), ('1', '0'))):
+            while flip * (longest[value] + 1) in body:
+                longest[value] += 1
+            # Runs of at least n: each is `other` followed by n flips, or n flips at the start
+            at_least = [
+                body.count(other + flip * n) + body.startswith(flip * n)
+                for n in range(1, RUN_BUCKETS + 1)
+            ]
+            for n in range(1, RUN_BUCKETS):
+                runs[n] += at_least[n - 1] - at_least[n]
+            runs[RUN_BUCKETS] += at_least[-1]
+    return heads, longest, runs[1:], first
+
+
+def _count_heads(times, rng):
+    if np is not None:
+        return int(rng.binomial(times, 0.5))
+    if times > EXACT_LIMIT:
+        # At this size the normal approximation is off by far less than one part in a million
+        return min(times, max(0, round(rng.gauss(times / 2, math.sqrt(times) / 2))))
+    return sum(rng.getrandbits(min(CHUNK, times - start)).bit_count() for start in range(0, times, CHUNK))
+
+
+def flip_summary(times, seed=None):
+    """Flip `times` fair coins and summarize them.
+
+    Up to STREAK_LIMIT flips every flip is generated, in chunks, to find the
+    longest heads and tails streaks and a run-length histogram; beyond that
+    the heads count is drawn from the binomial distribution directly and
+    streaks are left to `expected_longest_streak`. Returns a dict with
+    heads, tails, longest ([tails, heads] or None), runs (counts of runs of
+    length 1-9 and 10+, or None) and first (up to SHOWN_FLIPS flips as 0/1,
+    or None).
+    """
+    if not 1 <= times <= MAX_FLIPS:
+        raise ValueError(f"times must be between 1 and {MAX_FLIPS}")
+    if times <= STREAK_LIMIT:
+        if np is not None:
+            heads, longest, runs, first = _sequence_numpy(times, np.random.default_rng(seed))
+        else:
+            heads, longest, runs, first = _sequence_python(times, random.Random(seed))
+    else:
+        rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+        heads, longest, runs, first = _count_heads(times, rng), None, None, None
+    return {
+        'heads': heads,
+        'tails': times - heads,
+        'longest': longest,
+        'runs': runs,
+        'first': first,
+    }
+
+
+def expected_longest_streak(times):
+    """Typical longest run of one face in `times` fair flips (about log2(n/2))."""
+    return max(1, round(math.log2(times / 2))) if times > 1 else 1
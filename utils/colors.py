@@ -0,0 +1,274 @@
+# utils/colors.py
+import functools
+import io
+import random
+import re
+
+from utils.png import PNGError, decode_png, encode_png
+
+try:
+    import numpy as np
+except ImportError:  # Optional: vectorized k-means
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:  # Optional: JPEG/WebP/GIF decoding; PNG works without it
+    Image = None
+
+COLORS_FILE = "assets/colors.csv"
+PALETTE_SAMPLE = 64  # Images are downsampled to roughly this many pixels per side
+PALETTE_MAX_PIXELS = 1920 * 1080  # Without Pillow; the pure-Python PNG decoder takes seconds beyond this
+KMEANS_ITERATIONS = 20
+
+
+class ColorError(ValueError):
+    """Raised for colour input or images that cannot be handled."""
+
+
+def _to_linear(channel):
+    channel /= 255
+    return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+
+def rgb_to_lab(rgb):
+    """sRGB (0-255) to CIELAB (D65), where Euclidean distance tracks perceived difference."""
+    r, g, b = (_to_linear(channel) for channel in rgb)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+
+    def f(t):
+        return t ** (1 / 3) if t > 0.008856 else 7.787 * t + 16 / 116
+
+    fx, fy, fz = f(x), f(y), f(z)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def split_rgb(value):
+    return (value >> 16) & 255, (value >> 8) & 255, value & 255
+
+
+class KDTree:
+    """A static 3-d tree for nearest-neighbour queries.
+
+    Nodes are (point, payload, axis, left, right) tuples, built by median
+    split on the axis of greatest spread.
+    """
+
+    def __init__(self, items):
+        self.size = len(items)
+        self.root = self._build(list(items))
+
+    def _build(self, items):
+        if not items:
+            return None
+        spreads = [
+            max(point[axis] for point, _ in items) - min(point[axis] for point, _ in items)
+            for axis in range(3)
+        ]
+        axis = spreads.index(max(spreads))
+        items.sort(key=lambda item: item[0][axis])
+        middle = len(items) // 2
+        point, payload = items[middle]
+        return (point, payload, axis, self._build(items[:middle]), self._build(items[middle + 1:]))
+
+    def nearest(self, target):
+        """Return (payload, squared distance) of the closest point to `target`."""
+        best = [None, float('inf')]
+
+        def visit(node):
+            if node is None:
+                return
+            point, payload, axis, left, right = node
+            distance = (
+                (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            )
+            if distance < best[1]:
+                best[0], best[1] = payload, distance
+            offset = target[axis] - point[axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            visit(near)
+            # The far side can only hold something closer if the splitting plane is within reach
+            if offset * offset < best[1]:
+                visit(far)
+
+        visit(self.root)
+        return best[0], best[1]
+
+
+class ColorNames:
+    """Named colours with exact lookup by name and nearest lookup by value."""
+
+    def __init__(self, entries):
+        self.by_name = {name: value for name, value in entries}
+        self.tree = KDTree([(rgb_to_lab(split_rgb(value)), (name, value)) for name, value in entries])
+
+    def nearest(self, value):
+        """Return (name, exact value of that name, delta E) for the closest named colour."""
+        (name, named_value), distance = self.tree.nearest(rgb_to_lab(split_rgb(value)))
+        return name, named_value, distance ** 0.5
+
+
+@functools.lru_cache(maxsize=1)
+def color_names(path=COLORS_FILE):
+    """Load the named-colour table once and build its index."""
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            name, _, hex_value = line.rpartition(',')
+            entries.append((name.strip().lower(), int(hex_value.strip().lstrip('#'), 16)))
+    return ColorNames(entries)
+
+
+_HEX = re.compile(r'(?:#|0x)?([0-9a-f]{6}|[0-9a-f]{3})')
+_RGB = re.compile(r'(?:rgb\s*)?\(?\s*(\d{1,3})\s*[, ]\s*(\d{1,3})\s*[, ]\s*(\d{1,3})\s*\)?')
+
+
+def parse_color(text):
+    """Parse `#FF8800`, `f80`, `0xFF8800`, `rgb(255, 136, 0)` or a colour name into an int."""
+    text = text.strip().lower()
+    match = _RGB.fullmatch(text)
+    if match:
+        channels = [int(group) for group in match.groups()]
+        if any(channel > 255 for channel in channels):
+            raise ColorError("RGB values must be between 0 and 255.")
+        return channels[0] << 16 | channels[1] << 8 | channels[2]
+
+    names = color_names()
+    if text in names.by_name:
+        return names.by_name[text]
+
+    match = _HEX.fullmatch(text)
+    if match:
+        digits = match.group(1)
+        if len(digits) == 3:
+            digits = ''.join(digit * 2 for digit in digits)
+        return int(digits, 16)
+
+    raise ColorError("Invalid color! Use hex (#FF0000), rgb(255, 0, 0) or a color name (red, dusty rose, ...).")
+
+
+@functools.lru_cache(maxsize=512)
+def render_swatch(colors, width=256, height=64):
+    """Render colours as equal vertical stripes and return PNG bytes (cached per colours/size)."""
+    stripe = width // len(colors)
+    row = bytearray()
+    for index, value in enumerate(colors):
+        # The last stripe absorbs any rounding remainder
+        columns = stripe if index < len(colors) - 1 else width - stripe * (len(colors) - 1)
+        row += bytes(split_rgb(value)) * columns
+    row = bytes(row)
+    return encode_png(width, height, (row for _ in range(height)))
+
+
+def _sample_pixels(data):
+    """Decode an image and downsample it to roughly PALETTE_SAMPLE x PALETTE_SAMPLE RGB pixels."""
+    if Image is not None:
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.draft('RGB', (PALETTE_SAMPLE * 2, PALETTE_SAMPLE * 2))
+                image = image.convert('RGB')
+                image.thumbnail((PALETTE_SAMPLE, PALETTE_SAMPLE))
+                return list(image.getdata())
+        except OSError:
+            raise ColorError("That file is not an image I can read.") from None
+
+    try:
+        header_width, header_height = _png_size(data)
+        step = max(1, max(header_width, header_height) // PALETTE_SAMPLE)
+        return decode_png(data, step=step, max_pixels=PALETTE_MAX_PIXELS)[2]
+    except PNGError as e:
+        raise ColorError(f"{e} (install Pillow for JPEG, GIF and WebP support)") from None
+
+
+def _png_size(data):
+    if len(data) < 24 or not data.startswith(b'\x89PNG'):
+        raise PNGError("Not a PNG image.")
+    return int.from_bytes(data[16:20], 'big'), int.from_bytes(data[20:24], 'big')
+
+
+def _kmeans_numpy(pixels, k, rng):
+    points = np.asarray(pixels, dtype=np.float64)
+    centers = points[rng.sample(range(len(points)), 1)]
+    # k-means++ seeding: later centres are picked far from the existing ones
+    for _ in range(1, k):
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).min(axis=1)
+        if not distances.sum():
+            break
+        threshold = rng.random() * distances.sum()
+        centers = np.vstack([centers, points[np.searchsorted(np.cumsum(distances), threshold)]])
+
+    for _ in range(KMEANS_ITERATIONS):
+        labels = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+        updated = np.array([
+            points[labels == index].mean(axis=0) if (labels == index).any() else centers[index]
+            for index in range(len(centers))
+        ])
+        if np.allclose(updated, centers, atol=0.5):
+            break
+        centers = updated
+    counts = np.bincount(labels, minlength=len(centers))
+    return [(tuple(int(round(c)) for c in center), int(count)) for center, count in zip(centers, counts)]
+
+
+def _kmeans_python(pixels, k, rng):
+    def distance(a, b):
+        return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+    centers = [pixels[rng.randrange(len(pixels))]]
+    for _ in range(1, k):
+        distances = [min(distance(pixel, center) for center in centers) for pixel in pixels]
+        total = sum(distances)
+        if not total:
+            break
+        threshold = rng.random() * total
+        for pixel, weight in zip(pixels, distances):
+            threshold -= weight
+            if threshold <= 0:
+                centers.append(pixel)
+                break
+
+    for _ in range(KMEANS_ITERATIONS):
+        sums = [[0, 0, 0, 0] for _ in centers]
+        for pixel in pixels:
+            nearest = min(range(len(centers)), key=lambda index: distance(pixel, centers[index]))
+            bucket = sums[nearest]
+            bucket[0] += pixel[0]
+            bucket[1] += pixel[1]
+            bucket[2] += pixel[2]
+            bucket[3] += 1
+        updated = [
+            (r / n, g / n, b / n) if n else center
+            for (r, g, b, n), center in zip(sums, centers)
+        ]
+        converged = all(distance(a, b) < 0.25 for a, b in zip(updated, centers))
+        centers = updated
+        if converged:
+            break
+    counts = [bucket[3] for bucket in sums]
+    return [(tuple(int(round(c)) for c in center), count) for center, count in zip(centers, counts)]
+
+
+def extract_palette(data, k=5, seed=0):
+    """Return up to `k` dominant colours of an image as [(value, share), ...], largest first.
+
+    Runs k-means (k-means++ seeding, fixed seed so results are repeatable)
+    over a downsampled copy of the image; vectorized with numpy when it is
+    installed.
+    """
+    pixels = _sample_pixels(data)
+    if not pixels:
+        raise ColorError("The image has no pixels.")
+    rng = random.Random(seed)
+    clusters = _kmeans_numpy(pixels, k, rng) if np is not None else _kmeans_python(pixels, k, rng)
+
+    total = sum(count for _, count in clusters)
+    palette = [
+        ((r << 16) | (g << 8) | b, count / total)
+        for (r, g, b), count in clusters if count
+    ]
+    return sorted(palette, key=lambda item: item[1], reverse=True)
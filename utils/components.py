@@ -0,0 +1,159 @@
+# utils/components.py
+import base64
+import hashlib
+import hmac
+import logging
+import os
+
+import discord
+
+from utils.storage import data_path
+
+logger = logging.getLogger(__name__)
+
+SECRET_FILE = data_path("component.key")
+SIGNATURE_BYTES = 9  # 12 base64 characters; forging one takes ~2^72 guesses
+MAX_CUSTOM_ID = 100  # Discord's limit
+
+
+class ComponentError(ValueError):
+    """Raised for custom_ids that are malformed, unsigned or too long."""
+
+
+def _encode_int(value):
+    if value < 0:
+        return '-' + _encode_int(-value)
+    digits = '0123456789abcdefghijklmnopqrstuvwxyz'
+    encoded = ''
+    while True:
+        value, remainder = divmod(value, 36)
+        encoded = digits[remainder] + encoded
+        if not value:
+            return encoded
+
+
+def _load_secret():
+    secret = os.getenv("COMPONENT_SECRET")
+    if secret:
+        return secret.encode('utf-8')
+    # Buttons must keep verifying after a restart, so a generated key is kept on disk
+    try:
+        with open(SECRET_FILE, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        key = os.urandom(32)
+        with open(SECRET_FILE, 'wb') as f:
+            f.write(key)
+        return key
+
+
+class ComponentRegistry:
+    """Persistent buttons whose state lives in signed custom_ids.
+
+    A custom_id is `name:version:fields:signature`, where fields are base-36
+    integers and the signature is a truncated HMAC of the rest. Handlers are
+    registered by name (cogs do this in `cog_load`), so buttons sent before a
+    restart keep working and routing is one dict lookup; nothing is stored
+    per message. Views sent with `stateless_view()` are never kept in
+    discord.py's view store either.
+    """
+
+    def __init__(self):
+        self._handlers = {}  # name -> (version, handler)
+        self._secret = None
+        self.dispatched = 0
+        self.rejected = 0
+
+    def install(self, bot):
+        """Subscribe to the bot's interaction events (once, at startup)."""
+        bot.add_listener(self.on_interaction, 'on_interaction')
+
+    def register(self, name, handler, version=1):
+        """Route clicks on `name` buttons to `handler(interaction, fields)`."""
+        self._handlers[name] = (version, handler)
+
+    def unregister(self, name):
+        self._handlers.pop(name, None)
+
+    def _sign(self, message):
+        if self._secret is None:
+            self._secret = _load_secret()
+        digest = hmac.new(self._secret, message.encode('utf-8'), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+        return base64.urlsafe_b64encode(digest).decode('ascii')
+
+    def custom_id(self, name, *fields):
+        """Pack integer fields into a signed custom_id for the handler registered as `name`."""
+        version = self._handlers[name][0] if name in self._handlers else 1
+        body = f"{name}:{_encode_int(version)}:{'.'.join(_encode_int(field) for field in fields)}"
+        custom_id = f"{body}:{self._sign(body)}"
+        if len(custom_id) > MAX_CUSTOM_ID:
+            raise ComponentError(f"custom_id for {name} is {len(custom_id)} characters (max {MAX_CUSTOM_ID}).")
+        return custom_id
+
+    def parse(self, custom_id):
+        """Return (name, version, fields) for a custom_id this registry signed."""
+        body, _, signature = custom_id.rpartition(':')
+        if not body or not hmac.compare_digest(signature, self._sign(body)):
+            raise ComponentError("Bad signature.")
+        name, version, fields = body.split(':')
+        return name, int(version, 36), [int(field, 36) for field in fields.split('.')] if fields else []
+
+    async def on_interaction(self, interaction):
+        if interaction.type is not discord.InteractionType.component:
+            return
+        custom_id = (interaction.data or {}).get('custom_id', '')
+        name = custom_id.partition(':')[0]
+        entry = self._handlers.get(name)
+        if entry is None:
+            return  # Not one of ours (plain views and router prompts handle their own)
+        try:
+            _, version, fields = self.parse(custom_id)
+        except (ComponentError, ValueError):
+            self.rejected += 1
+            await interaction.response.send_message("This button is not valid.", ephemeral=True)
+            return
+        expected_version, handler = entry
+        if version != expected_version:
+            self.rejected += 1
+            await interaction.response.send_message("This button is from an older version of the bot.", ephemeral=True)
+            return
+        self.dispatched += 1
+        try:
+            await handler(interaction, fields)
+        except Exception as e:
+            logger.error(f"Component handler {name} failed: {e}")
+            if not interaction.response.is_done():
+                await interaction.response.send_message("Something went wrong handling that button.", ephemeral=True)
+
+
+def stateless_view(*items):
+    """A View holding `items` that discord.py will not keep in memory after sending.
+
+    Clicks are routed by ComponentRegistry through the custom_id alone, so
+    the view is stopped up front; discord.py only stores unfinished views.
+    """
+    view = discord.ui.View(timeout=None)
+    for item in items:
+        view.add_item(item)
+    view.stop()
+    return view
+
+
+def disabled_copy(components):
+    """Rebuild a message's buttons, all disabled, e.g. once a question is answered."""
+    items = []
+    for row, action_row in enumerate(components):
+        for component in getattr(action_row, 'children', []):
+            if isinstance(component, discord.Button):
+                items.append(discord.ui.Button(
+                    style=component.style, label=component.label, emoji=component.emoji,
+                    custom_id=component.custom_id, url=component.url, disabled=True, row=row
+                ))
+    return stateless_view(*items)
+
+
+_components = ComponentRegistry()
+
+
+def get_components():
+    return _components
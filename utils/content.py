@@ -0,0 +1,99 @@
+# utils/content.py
+import logging
+import os
+import time
+
+from utils.shuffle import ShuffleBag
+from utils.storage import data_path
+
+logger = logging.getLogger(__name__)
+
+BUILTIN_DIR = "assets/packs"
+# Packs here replace the built-in pack of the same name and can be edited while the bot runs
+OVERRIDE_DIR = os.path.dirname(data_path("packs", "README"))
+PACK_SUFFIX = ".txt"
+RELOAD_CHECK_INTERVAL = 30  # Seconds between checking a pack's file for changes
+
+
+class ContentError(LookupError):
+    """Raised when a pack does not exist or has no entries."""
+
+
+class _Pack:
+    __slots__ = ('entries', 'path', 'mtime', 'checked', 'version')
+
+    def __init__(self, entries, path, mtime, version):
+        self.entries = entries
+        self.path = path
+        self.mtime = mtime
+        self.checked = time.monotonic()
+        self.version = version
+
+
+# name -> _Pack; entries are tuples, loaded on first use
+_packs = {}
+# (scope, name) -> (pack version, ShuffleBag)
+_bags = {}
+
+
+def _pack_file(name):
+    for directory in (OVERRIDE_DIR, BUILTIN_DIR):
+        path = os.path.join(directory, name + PACK_SUFFIX)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return tuple(
+            line.strip() for line in f
+            if line.strip() and not line.lstrip().startswith('#')
+        )
+
+
+def pack(name):
+    """Return a pack's entries, loading it on first use and reloading it when its file changes.
+
+    A pack is a text file with one entry per line, looked up in
+    `data/packs/` first and then `assets/packs/`.
+    """
+    current = _packs.get(name)
+    now = time.monotonic()
+    if current is not None and now - current.checked < RELOAD_CHECK_INTERVAL:
+        return current.entries
+
+    path = _pack_file(name)
+    if path is None:
+        if current is not None:
+            return current.entries  # The file went away; keep serving what we had
+        raise ContentError(f"No content pack named {name}.")
+    mtime = os.path.getmtime(path)
+    if current is not None and current.path == path and current.mtime == mtime:
+        current.checked = now
+        return current.entries
+
+    entries = _read(path)
+    if not entries:
+        if current is not None:
+            logger.warning(f"Content pack {path} is empty; keeping the previous version")
+            current.checked = now
+            return current.entries
+        raise ContentError(f"Content pack {name} has no entries.")
+    version = current.version + 1 if current is not None else 0
+    _packs[name] = _Pack(entries, path, mtime, version)
+    if current is not None:
+        logger.info(f"Reloaded content pack {name} ({len(entries)} entries)")
+    return entries
+
+
+def draw(name, scope):
+    """Pick an entry without repeats until `scope` (e.g. a guild id) has seen the whole pack."""
+    entries = pack(name)
+    version = _packs[name].version
+    key = (scope, name)
+    entry = _bags.get(key)
+    if entry is None or entry[0] != version:
+        # A reloaded pack starts a fresh round
+        entry = _bags[key] = (version, ShuffleBag(len(entries)))
+    return entries[entry[1].draw()]
@@ -0,0 +1,250 @@
+# utils/dice.py
+import collections
+import functools
+import heapq
+import random
+import re
+
+try:
+    import numpy as np
+except ImportError:  # Optional: vectorized rolling; large pools are slower without it
+    np = None
+
+MAX_TERMS = 20
+# Across the whole expression; the pure-Python fallback is ~100x slower per die
+MAX_DICE = 10_000_000 if np is not None else 100_000
+MAX_SIDES = 1_000_000
+MAX_EXPLOSIONS = 100  # Rerolls per die before an exploding chain stops
+SHOWN_DICE = 30  # Pools up to this size list every roll
+STATS_TRIALS = 10_000
+# Dice rolled per statistics run; fewer trials for big pools
+STATS_BUDGET = 5_000_000 if np is not None else 500_000
+MIN_STATS_TRIALS = 100
+
+_TERM = re.compile(
+    r'\s*(?P<sign>[+-])\s*'
+    r'(?:(?P<count>\d*)d(?P<sides>\d+|%)(?P<explode>!)?(?:(?P<keep>kh|kl|dh|dl|k|d)(?P<keep_count>\d+))?'
+    r'|(?P<constant>\d+))'
+)
+
+# A dice term is count/sides/explode/keep, a constant is sides=0 with its value in count.
+# keep is None or (True for highest / False for lowest, number of dice kept).
+Term = collections.namedtuple('Term', 'sign count sides explode keep')
+TermResult = collections.namedtuple('TermResult', 'term total rolls dropped')
+
+
+class DiceError(ValueError):
+    """Raised for dice expressions that do not parse or are too large."""
+
+
+@functools.lru_cache(maxsize=1024)
+def parse(expression):
+    """Parse `8d6+3`, `4d6kh3`, `2d20kl1`, `10d6!` or `d%` into a tuple of Terms.
+
+    `kh`/`k` keeps the highest dice, `kl` the lowest, `dl`/`d` and `dh` drop
+    them; `!` makes dice that roll their maximum roll again and add on.
+    """
+    text = expression.strip().lower()
+    if not text:
+        raise DiceError("Empty dice expression.")
+    if text[0] not in '+-':
+        text = '+' + text
+
+    terms = []
+    position = 0
+    while position < len(text):
+        match = _TERM.match(text, position)
+        if match is None or match.end() == position:
+            raise DiceError(f"Can't read `{expression[max(0, position - 1):][:20]}`.")
+        position = match.end()
+        sign = -1 if match['sign'] == '-' else 1
+        if match['constant'] is not None:
+            terms.append(Term(sign, int(match['constant']), 0, False, None))
+            continue
+
+        count = int(match['count']) if match['count'] else 1
+        if not count:
+            raise DiceError("Roll at least one die.")
+        sides = 100 if match['sides'] == '%' else int(match['sides'])
+        if not 1 <= sides <= MAX_SIDES:
+            raise DiceError(f"Dice need 1 to {MAX_SIDES:,} sides.")
+        if match['explode'] and sides < 2:
+            raise DiceError("Only dice with 2 or more sides can explode.")
+        keep = None
+        if match['keep']:
+            amount = int(match['keep_count'])
+            if match['keep'] in ('kh', 'k'):
+                keep = (True, amount)
+            elif match['keep'] == 'kl':
+                keep = (False, amount)
+            elif match['keep'] == 'dh':
+                keep = (False, count - amount)
+            else:
+                keep = (True, count - amount)
+            if not 0 <= keep[1] <= count:
+                raise DiceError(f"Can't keep or drop {amount} of {count} dice.")
+            if keep[1] == count:
+                keep = None
+        terms.append(Term(sign, count, sides, bool(match['explode']), keep))
+
+    if len(terms) > MAX_TERMS:
+        raise DiceError(f"Use at most {MAX_TERMS} terms.")
+    if dice_count(terms) > MAX_DICE:
+        raise DiceError(f"Roll at most {MAX_DICE:,} dice at once.")
+    return tuple(terms)
+
+
+def dice_count(terms):
+    return sum(term.count for term in terms if term.sides)
+
+
+def _roll_numpy(generator, term, trials=None):
+    """Roll one term as an int64 array of shape (count,) or (trials, count)."""
+    shape = term.count if trials is None else (trials, term.count)
+    rolls = generator.integers(1, term.sides + 1, size=shape, dtype=np.int64)
+    if term.explode:
+        flat = rolls.reshape(-1)
+        live = np.flatnonzero(flat == term.sides)
+        for _ in range(MAX_EXPLOSIONS):
+            if not live.size:
+                break
+            extra = generator.integers(1, term.sides + 1, size=live.size, dtype=np.int64)
+            flat[live] += extra
+            live = live[extra == term.sides]
+    return rolls
+
+
+def _kept_total_numpy(rolls, keep):
+    if keep is None:
+        return rolls.sum(axis=-1)
+    highest, amount = keep
+    if amount == 0:
+        return np.zeros(rolls.shape[:-1], dtype=np.int64) if rolls.ndim > 1 else 0
+    count = rolls.shape[-1]
+    # partition is O(n), unlike a full sort, and only the kept side is summed
+    if highest:
+        return np.partition(rolls, count - amount, axis=-1)[..., count - amount:].sum(axis=-1)
+    return np.partition(rolls, amount - 1, axis=-1)[..., :amount].sum(axis=-1)
+
+
+def _roll_python(rng, term):
+    rolls = rng.choices(range(1, term.sides + 1), k=term.count)
+    if term.explode:
+        for index, value in enumerate(rolls):
+            total, explosions = value, 0
+            while value == term.sides and explosions < MAX_EXPLOSIONS:
+                value = rng.randint(1, term.sides)
+                total += value
+                explosions += 1
+            rolls[index] = total
+    return rolls
+
+
+def _kept_total_python(rolls, keep):
+    if keep is None:
+        return sum(rolls)
+    highest, amount = keep
+    return sum((heapq.nlargest if highest else heapq.nsmallest)(amount, rolls))
+
+
+def _split_kept(rolls, keep):
+    """Return (kept, dropped) for a pool small enough to show."""
+    if keep is None:
+        return rolls, []
+    highest, amount = keep
+    order = sorted(range(len(rolls)), key=rolls.__getitem__, reverse=highest)
+    dropped = set(order[amount:])
+    return [value for index, value in enumerate(rolls) if index not in dropped], [rolls[index] for index in sorted(dropped)]
+
+
+def _generator(seed):
+    return np.random.default_rng(seed) if np is not None else random.Random(seed)
+
+
+def roll(expression, seed=None):
+    """Roll an expression once; returns (total, [TermResult, ...]).
+
+    TermResult.rolls and .dropped list the individual dice for pools of up
+    to SHOWN_DICE and are None for bigger ones. A seed makes rolls repeatable
+    (for the same seed and backend, numpy or the `random` fallback).
+    """
+    terms = parse(expression)
+    generator = _generator(seed)
+    results = []
+    for term in terms:
+        if not term.sides:
+            results.append(TermResult(term, term.sign * term.count, None, None))
+            continue
+        if np is not None:
+            rolls = _roll_numpy(generator, term)
+            subtotal = int(_kept_total_numpy(rolls, term.keep))
+            rolls = rolls.tolist() if term.count <= SHOWN_DICE else None
+        else:
+            rolls = _roll_python(generator, term)
+            subtotal = _kept_total_python(rolls, term.keep)
+            rolls = rolls if term.count <= SHOWN_DICE else None
+        kept, dropped = _split_kept(rolls, term.keep) if rolls is not None else (None, None)
+        results.append(TermResult(term, term.sign * subtotal, kept, dropped))
+    return sum(result.total for result in results), results
+
+
+def _histogram(totals):
+    """One (label, count) bin per total when there are up to 20 of them, else 12 ranges."""
+    low, high = min(totals), max(totals)
+    counts = collections.Counter(totals)
+    if high - low < 20:
+        return [(str(value), counts.get(value, 0)) for value in range(low, high + 1)]
+    width = -(-(high - low + 1) // 12)
+    bins = collections.Counter()
+    for value, count in counts.items():
+        bins[(value - low) // width] += count
+    return [
+        (f"{low + index * width}–{min(high, low + (index + 1) * width - 1)}", bins.get(index, 0))
+        for index in range(-(-(high - low + 1) // width))
+    ]
+
+
+def distribution(expression, seed=None, trials=STATS_TRIALS):
+    """Simulate an expression many times and summarize the totals.
+
+    Returns a dict with trials, mean, stdev, min, max, the 5th/50th/95th
+    percentiles and a histogram of (label, count) bins. Big pools get fewer
+    trials so one run rolls at most STATS_BUDGET dice.
+    """
+    terms = parse(expression)
+    dice = dice_count(terms)
+    trials = min(trials, STATS_BUDGET // dice) if dice else 1
+    if trials < MIN_STATS_TRIALS:
+        raise DiceError(f"Too many dice for statistics (at most {STATS_BUDGET // MIN_STATS_TRIALS:,}).")
+
+    generator = _generator(seed)
+    if np is not None:
+        totals = np.zeros(trials, dtype=np.int64)
+        for term in terms:
+            if term.sides:
+                totals += term.sign * _kept_total_numpy(_roll_numpy(generator, term, trials), term.keep)
+            else:
+                totals += term.sign * term.count
+        totals = np.sort(totals)
+        mean, stdev = float(totals.mean()), float(totals.std())
+        totals = totals.tolist()
+    else:
+        totals = sorted(
+            sum(
+                term.sign * (_kept_total_python(_roll_python(generator, term), term.keep) if term.sides else term.count)
+                for term in terms
+            )
+            for _ in range(trials)
+        )
+        mean = sum(totals) / trials
+        stdev = (sum((total - mean) ** 2 for total in totals) / trials) ** 0.5
+
+    return {
+        'trials': trials,
+        'mean': mean,
+        'stdev': stdev,
+        'min': totals[0],
+        'max': totals[-1],
+        'percentiles': {p: totals[min(trials - 1, trials * p // 100)] for p in (5, 50, 95)},
+        'histogram': _histogram(totals),
+    }
@@ -0,0 +1,291 @@
+# utils/http.py
+import asyncio
+import contextlib
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+
+import aiohttp
+from yarl import URL
+
+logger = logging.getLogger(__name__)
+
+TOTAL_CONNECTIONS = 100
+PER_HOST_LIMIT = 8  # Concurrent requests per host unless HOST_LIMITS says otherwise
+HOST_LIMITS = {
+    'cdn.discordapp.com': 16,
+    'media.discordapp.net': 16,
+}
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 15.0
+CONNECT_TIMEOUT = 5.0
+MAX_RETRIES = 2
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CACHE_MAX_BYTES = 8 * 1024 * 1024
+CACHE_MAX_ENTRY = 512 * 1024  # Larger bodies are never cached
+
+
+class HTTPError(Exception):
+    """Raised for connection failures, timeouts and error statuses. `status` is None for the first two."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class HTTPStats:
+    """Counters for the shared client; times are in seconds."""
+
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.cache_hits = 0  # 304 Not Modified answered from the cache
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.waiting = 0
+
+    @property
+    def reuse_rate(self):
+        connections = self.connections_created + self.connections_reused
+        return self.connections_reused / connections if connections else 0.0
+
+    @property
+    def avg_time(self):
+        return self.total_time / self.requests if self.requests else 0.0
+
+    def record(self, elapsed):
+        self.requests += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+
+class Response:
+    """A fully read response: status, headers and body bytes."""
+
+    def __init__(self, status, headers, body, from_cache=False):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.from_cache = from_cache
+
+    def text(self, encoding='utf-8'):
+        return self.body.decode(encoding, errors='replace')
+
+    def json(self):
+        try:
+            return json.loads(self.body)
+        except ValueError:
+            raise HTTPError("Response was not valid JSON.", self.status) from None
+
+
+class ETagCache:
+    """Byte-bounded LRU of GET bodies with their ETag / Last-Modified validators."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # url -> (etag, last_modified, headers, body)
+
+    def get(self, url):
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def store(self, url, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not (etag or last_modified) or len(response.body) > CACHE_MAX_ENTRY:
+            return
+        self.discard(url)
+        self._entries[url] = (etag, last_modified, response.headers, response.body)
+        self.size += len(response.body)
+        while self.size > self.max_bytes:
+            _, (_, _, _, body) = self._entries.popitem(last=False)
+            self.size -= len(body)
+
+    def discard(self, url):
+        entry = self._entries.pop(url, None)
+        if entry is not None:
+            self.size -= len(entry[3])
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, or the server's Retry-After if it is shorter than the cap."""
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), BACKOFF_CAP)
+        except ValueError:
+            pass
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class HTTPClient:
+    """The bot's one outbound HTTP client.
+
+    One pooled, keep-alive session with a DNS cache serves every cog, so
+    connections to the same host are reused across features. Each host also
+    gets a semaphore (PER_HOST_LIMIT, or HOST_LIMITS) so one slow service
+    cannot take every connection.
+    """
+
+    def __init__(self):
+        self.stats = HTTPStats()
+        self.cache = ETagCache()
+        self._session = None
+        self._host_limits = {}
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            trace = aiohttp.TraceConfig()
+            trace.on_connection_create_end.append(self._on_connection_created)
+            trace.on_connection_reuseconn.append(self._on_connection_reused)
+            connector = aiohttp.TCPConnector(
+                limit=TOTAL_CONNECTIONS,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+                trace_configs=[trace],
+            )
+        return self._session
+
+    async def _on_connection_created(self, session, context, params):
+        self.stats.connections_created += 1
+
+    async def _on_connection_reused(self, session, context, params):
+        self.stats.connections_reused += 1
+
+    def _host_limit(self, url):
+        host = URL(url).host
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = self._host_limits[host] = asyncio.Semaphore(HOST_LIMITS.get(host, PER_HOST_LIMIT))
+        return semaphore
+
+    @contextlib.asynccontextmanager
+    async def _slot(self, url):
+        semaphore = self._host_limit(url)
+        self.stats.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.stats.waiting -= 1
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    async def request(self, method, url, *, params=None, headers=None, retries=None, cache=False, **kwargs):
+        """Send a request and read the whole body, retrying transient failures.
+
+        GET and HEAD retry up to MAX_RETRIES times by default; other methods
+        only when `retries` is given. With `cache=True`, GET responses that
+        carry an ETag or Last-Modified are kept and revalidated next time, so
+        an unchanged resource costs a 304 instead of a download.
+        """
+        method = method.upper()
+        if retries is None:
+            retries = MAX_RETRIES if method in ('GET', 'HEAD') else 0
+        headers = dict(headers or {})
+        cache_key = str(URL(url).update_query(params)) if params else url
+        cached = self.cache.get(cache_key) if cache and method == 'GET' else None
+        if cached is not None:
+            etag, last_modified, _, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            retry_after = None
+            try:
+                async with self._slot(url):
+                    async with self.session.request(method, url, params=params, headers=headers, **kwargs) as response:
+                        body = await response.read()
+                        result = Response(response.status, response.headers, body)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self.stats.record(time.perf_counter() - start)
+                error = HTTPError(f"Request to {URL(url).host} failed ({type(e).__name__}).")
+            else:
+                self.stats.record(time.perf_counter() - start)
+                if result.status == 304 and cached is not None:
+                    self.stats.cache_hits += 1
+                    return Response(200, cached[2], cached[3], from_cache=True)
+                if result.status < 400:
+                    if cache and method == 'GET':
+                        self.cache.store(cache_key, result)
+                    return result
+                error = HTTPError(f"{URL(url).host} returned HTTP {result.status}.", result.status)
+                if result.status not in RETRY_STATUSES:
+                    self.stats.failures += 1
+                    raise error
+                retry_after = result.headers.get('Retry-After')
+
+            if attempt < retries:
+                self.stats.retries += 1
+                await asyncio.sleep(backoff_delay(attempt, retry_after))
+        self.stats.failures += 1
+        raise error
+
+    async def get_json(self, url, **kwargs):
+        return (await self.request('GET', url, **kwargs)).json()
+
+    @contextlib.asynccontextmanager
+    async def stream(self, url, **kwargs):
+        """Open a GET for incremental reading (`response.content`); no retries or caching.
+
+        Holds the host's slot until the block exits.
+        """
+        start = time.perf_counter()
+        try:
+            async with self._slot(url):
+                async with self.session.get(url, **kwargs) as response:
+                    if response.status >= 400:
+                        raise HTTPError(f"{URL(url).host} returned HTTP {response.status}.", response.status)
+                    yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.stats.failures += 1
+            raise HTTPError(f"Request to {URL(url).host} failed ({type(e).__name__}).") from None
+        except HTTPError:
+            self.stats.failures += 1
+            raise
+        finally:
+            self.stats.record(time.perf_counter() - start)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+_client = HTTPClient()
+
+
+def get_client():
+    return _client
+
+
+async def start_client():
+    """Open the shared session up front so the first command does not pay for it."""
+    _client.session
+    return _client
+
+
+async def close_client():
+    """Close the shared session. Called once on bot shutdown, after the cogs are unloaded."""
+    await _client.close()
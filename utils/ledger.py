@@ -0,0 +1,283 @@
+# utils/ledger.py
+import asyncio
+import bisect
+import json
+import logging
+import os
+import sqlite3
+
+from utils.storage import data_path
+
+logger = logging.getLogger(__name__)
+
+LEDGER_DB = data_path("ledger.db")
+ALL_GAMES = '*'  # Ranking key for points summed over every game
+
+# Row layout: the per-(guild, user, game) counters, in table column order
+POINTS, WINS, LOSSES, TIES, STREAK, BEST_STREAK = range(6)
+COLUMNS = ('points', 'wins', 'losses', 'ties', 'streak', 'best_streak')
+USER_MASK = (1 << 64) - 1
+
+
+def _entry(user_id, points):
+    return (-points << 64) | user_id
+
+
+class Ranking:
+    """Users ordered by points, kept sorted as scores change.
+
+    Entries are `-points << 64 | user_id` (ints sort faster than tuples,
+    best score first, ties by user id) in a list of sorted chunks of at most
+    2 * CHUNK entries, with each chunk's last entry indexed for bisecting.
+    An update touches one chunk, so it stays cheap with 100k+ players where
+    a single sorted list would move the whole list on every insert; the top
+    N is read from the first chunks without sorting anything.
+    """
+
+    CHUNK = 512
+
+    def __init__(self, scores=()):
+        """Build from (user_id, points) pairs with a single sort."""
+        self._points = dict(scores)
+        entries = sorted(_entry(user_id, points) for user_id, points in self._points.items())
+        self._chunks = [entries[i:i + self.CHUNK] for i in range(0, len(entries), self.CHUNK)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+
+    def __len__(self):
+        return len(self._points)
+
+    def _locate(self, entry):
+        return min(bisect.bisect_left(self._maxes, entry), len(self._maxes) - 1)
+
+    def _insert(self, entry):
+        if not self._chunks:
+            self._chunks.append([entry])
+            self._maxes.append(entry)
+            return
+        index = self._locate(entry)
+        chunk = self._chunks[index]
+        bisect.insort(chunk, entry)
+        self._maxes[index] = chunk[-1]
+        if len(chunk) > 2 * self.CHUNK:
+            self._chunks[index:index + 1] = [chunk[:self.CHUNK], chunk[self.CHUNK:]]
+            self._maxes[index:index + 1] = [chunk[self.CHUNK - 1], chunk[-1]]
+
+    def _remove(self, entry):
+        index = self._locate(entry)
+        chunk = self._chunks[index]
+        del chunk[bisect.bisect_left(chunk, entry)]
+        if chunk:
+            self._maxes[index] = chunk[-1]
+        else:
+            del self._chunks[index]
+            del self._maxes[index]
+
+    def update(self, user_id, points):
+        old = self._points.get(user_id)
+        if old == points:
+            return
+        if old is not None:
+            self._remove(_entry(user_id, old))
+        self._insert(_entry(user_id, points))
+        self._points[user_id] = points
+
+    def top(self, count=10):
+        """The `count` highest [(user_id, points), ...]."""
+        top = []
+        for chunk in self._chunks:
+            top.extend((entry & USER_MASK, -(entry >> 64)) for entry in chunk[:count - len(top)])
+            if len(top) >= count:
+                break
+        return top
+
+    def rank(self, user_id):
+        """1-based position of a user, or None if they have no entry."""
+        points = self._points.get(user_id)
+        if points is None:
+            return None
+        entry = _entry(user_id, points)
+        index = self._locate(entry)
+        return sum(map(len, self._chunks[:index])) + bisect.bisect_left(self._chunks[index], entry) + 1
+
+
+class GameLedger:
+    """Per-guild, per-user game results held in memory and written behind.
+
+    `record()` only touches memory plus one appended journal line, so game
+    commands never wait on the database. `flush()` writes the rows changed
+    since the last flush to SQLite in a single transaction; the journal
+    segment covering them is deleted once that commits. After a crash,
+    `open()` replays any journal left behind on top of the database.
+    """
+
+    def __init__(self, path=LEDGER_DB):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.flushing_path = path + ".journal.flushing"
+        self._db = None
+        self._journal = None
+        # (guild_id, user_id) -> {game: [points, wins, losses, ties, streak, best_streak]}
+        # Rows are replaced, never mutated, so a flush can read them from its thread
+        self.members = {}
+        self._totals = {}  # (guild_id, user_id) -> points over all games
+        self._rankings = {}  # (guild_id, game or ALL_GAMES) -> Ranking
+        self._dirty = set()  # (guild_id, user_id, game) changed since the last flush
+        self._flushing = None
+        self.flushes = 0
+        self.flushed_rows = 0
+
+    def open(self):
+        """Load the database and replay leftover journals (blocking; run in a thread)."""
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (guild_id INTEGER, user_id INTEGER, game TEXT, "
+            f"{', '.join(f'{column} INTEGER' for column in COLUMNS)}, PRIMARY KEY (guild_id, user_id, game))"
+        )
+        for guild_id, user_id, game, *row in self._db.execute("SELECT * FROM results"):
+            self.members.setdefault((guild_id, user_id), {})[game] = row
+
+        replayed = 0
+        for path in (self.flushing_path, self.journal_path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            guild_id, user_id, game, *row = json.loads(line)
+                        except ValueError:
+                            break  # A torn final line from the crash; everything before it is intact
+                        self.members.setdefault((guild_id, user_id), {})[game] = row
+                        self._dirty.add((guild_id, user_id, game))
+                        replayed += 1
+            except FileNotFoundError:
+                continue
+        if replayed:
+            logger.info(f"Replayed {replayed} ledger journal entries")
+            self.write_batch(self._take_dirty())
+        for path in (self.flushing_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+        # Rankings are built in one sort per leaderboard rather than row by row
+        entries = {}
+        for (guild_id, user_id), games in self.members.items():
+            total = 0
+            for game, row in games.items():
+                entries.setdefault((guild_id, game), []).append((user_id, row[POINTS]))
+                total += row[POINTS]
+            self._totals[(guild_id, user_id)] = total
+            entries.setdefault((guild_id, ALL_GAMES), []).append((user_id, total))
+        self._rankings = {key: Ranking(ranked) for key, ranked in entries.items()}
+
+    def ranking(self, guild_id, game=None):
+        key = (guild_id, game or ALL_GAMES)
+        ranking = self._rankings.get(key)
+        if ranking is None:
+            ranking = self._rankings[key] = Ranking()
+        return ranking
+
+    def record(self, guild_id, user_id, game, outcome, points=0):
+        """Add one game result and return the updated row."""
+        games = self.members.setdefault((guild_id, user_id), {})
+        old = games.get(game)
+        row = list(old or (0,) * len(COLUMNS))
+        row[POINTS] += points
+        if outcome == 'win':
+            row[WINS] += 1
+            row[STREAK] += 1
+            row[BEST_STREAK] = max(row[BEST_STREAK], row[STREAK])
+        elif outcome == 'loss':
+            row[LOSSES] += 1
+            row[STREAK] = 0
+        elif outcome == 'tie':
+            row[TIES] += 1
+        else:
+            raise ValueError(f"Unknown outcome: {outcome}")
+        games[game] = row
+        self._dirty.add((guild_id, user_id, game))
+
+        if points:
+            total = self._totals.get((guild_id, user_id), 0) + points
+            self._totals[(guild_id, user_id)] = total
+            self.ranking(guild_id, game).update(user_id, row[POINTS])
+            self.ranking(guild_id).update(user_id, total)
+        elif old is None:
+            # First game: the player joins the leaderboards with whatever they have
+            self.ranking(guild_id, game).update(user_id, 0)
+            self.ranking(guild_id).update(user_id, self._totals.setdefault((guild_id, user_id), 0))
+
+        if self._journal is not None:
+            # Full rows rather than deltas, so replaying an entry twice is harmless
+            self._journal.write(json.dumps([guild_id, user_id, game, *row], separators=(',', ':')) + '\n')
+            self._journal.flush()
+        return row
+
+    def stats(self, guild_id, user_id):
+        """({game: row}, total points, overall rank) for one member."""
+        games = dict(self.members.get((guild_id, user_id), {}))
+        return games, self._totals.get((guild_id, user_id), 0), self.ranking(guild_id).rank(user_id)
+
+    def top(self, guild_id, game=None, count=10):
+        return self.ranking(guild_id, game).top(count)
+
+    @property
+    def pending(self):
+        return len(self._dirty)
+
+    def _take_dirty(self):
+        keys, self._dirty = self._dirty, set()
+        return keys
+
+    async def flush(self):
+        """Write the rows changed since the last flush; returns how many were written.
+
+        Runs on the event loop with the database work in a thread. Flushes
+        never overlap, and one that is cancelled still finishes its write.
+        """
+        while self._flushing is not None:
+            await asyncio.shield(self._flushing)
+        if not self._dirty:
+            return 0
+        # Start a new journal segment; the old one is kept as the `.flushing`
+        # file until its rows commit, so a crash mid-write loses nothing
+        self._journal.close()
+        os.replace(self.journal_path, self.flushing_path)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._flushing = asyncio.ensure_future(self._write(self._take_dirty()))
+        return await asyncio.shield(self._flushing)
+
+    async def _write(self, keys):
+        try:
+            await asyncio.to_thread(self.write_batch, keys)
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Failed to flush {len(keys)} ledger rows: {e}")
+            # Keep the rows dirty and fold the segment back into the live journal
+            self._dirty |= keys
+            self._journal.close()
+            with open(self.flushing_path, 'a', encoding='utf-8') as old, open(self.journal_path, encoding='utf-8') as new:
+                old.write(new.read())
+            os.replace(self.flushing_path, self.journal_path)
+            self._journal = open(self.journal_path, 'a', encoding='utf-8')
+            return 0
+        else:
+            os.remove(self.flushing_path)
+            return len(keys)
+        finally:
+            self._flushing = None
+
+    def write_batch(self, keys):
+        """Upsert the current rows for `keys` in one transaction (blocking; run in a thread)."""
+        placeholders = ', '.join('?' * (3 + len(COLUMNS)))
+        rows = [(guild_id, user_id, game, *self.members[(guild_id, user_id)][game]) for guild_id, user_id, game in keys]
+        with self._db:
+            self._db.executemany(f"INSERT OR REPLACE INTO results VALUES ({placeholders})", rows)
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
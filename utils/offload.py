@@ -0,0 +1,195 @@
+# utils/offload.py
+import asyncio
+import functools
+import importlib
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolStats:
+    """Counters for one pool; times are in seconds."""
+
+    def __init__(self):
+        self.submitted = 0
+        self.inline = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.queue_time = 0.0
+        self.max_queue_time = 0.0
+        self.run_time = 0.0
+        self.max_run_time = 0.0
+
+    def record(self, queued, ran):
+        self.queue_time += queued
+        self.run_time += ran
+        self.max_queue_time = max(self.max_queue_time, queued)
+        self.max_run_time = max(self.max_run_time, ran)
+
+
+class WorkPool:
+    """A thread or process executor with a concurrency cap and timing metrics.
+
+    At most `concurrency` jobs are handed to the executor at once; the rest
+    wait on a semaphore, which is what the queue-time metric measures. Jobs
+    whose size is below `inline_below` skip the pool entirely, since the
+    hand-off would cost more than the work.
+    """
+
+    def __init__(self, name, kind, workers, concurrency, inline_below=0):
+        if kind not in ('thread', 'process'):
+            raise ValueError(f"Unknown pool kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.concurrency = concurrency
+        self.inline_below = inline_below
+        self.stats = PoolStats()
+        self.active = 0
+        self.waiting = 0
+        self._executor = None
+        self._semaphore = None
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            if self.kind == 'thread':
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"pool-{self.name}")
+            else:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, func, *args, size=None, timeout=None):
+        """Run `func(*args)` in the pool (or inline for small sizes) and return its result."""
+        self.stats.submitted += 1
+        if size is not None and size < self.inline_below:
+            self.stats.inline += 1
+            return func(*args)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        started_at = time.perf_counter()
+        self.active += 1
+        try:
+            return await self._submit(func, args, timeout)
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+            self.stats.record(started_at - queued_at, time.perf_counter() - started_at)
+
+    async def _submit(self, func, args, timeout):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        retried = False
+        while True:
+            executor = self.executor
+            future = loop.run_in_executor(executor, func, *args)
+            try:
+                if deadline is None:
+                    result = await future
+                else:
+                    result = await asyncio.wait_for(future, max(deadline - loop.time(), 0.1))
+            except asyncio.TimeoutError:
+                self.stats.timeouts += 1
+                if self.kind == 'process':
+                    # A thread cannot be stopped, but a stuck worker process can
+                    self.restart(executor)
+                raise
+            except BrokenProcessPool:
+                if self._executor is not executor and not retried:
+                    # Killed by another job's restart, not by this job: run it once more on the new workers
+                    retried = True
+                    continue
+                self.stats.failed += 1
+                self.restart(executor)
+                raise
+            except Exception:
+                self.stats.failed += 1
+                raise
+            self.stats.completed += 1
+            return result
+
+    def restart(self, executor=None):
+        """Kill the pool's worker processes and start fresh ones on next use.
+
+        With `executor`, only if it is still the current one, so jobs failing
+        together after a restart do not tear down its replacement.
+        """
+        if executor is not None and executor is not self._executor:
+            return
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        self.stats.restarts += 1
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.warning(f"Worker pool '{self.name}' restarted")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+POOLS = {
+    # General CPU work on strings/bytes; inline below ~20k units of input
+    'threads': WorkPool('threads', 'thread', workers=4, concurrency=16, inline_below=20000),
+    # Heavy pure-Python work that would hold the GIL for long stretches
+    'processes': WorkPool('processes', 'process', workers=2, concurrency=8, inline_below=200000),
+    # Untrusted calculator input, isolated so a stuck job can be killed
+    'calculator': WorkPool('calculator', 'process', workers=2, concurrency=4),
+}
+
+
+def get_pool(name):
+    return POOLS[name]
+
+
+def shutdown_pools():
+    """Stop every pool's workers. Called once on bot shutdown."""
+    for pool in POOLS.values():
+        pool.shutdown()
+
+
+def _invoke(module_name, qualname, args):
+    """Process-pool entry point: look up the undecorated function by name and call it."""
+    target = importlib.import_module(module_name)
+    for part in qualname.split('.'):
+        target = getattr(target, part)
+    return target.__wrapped__(*args)
+
+
+def offloaded(pool_name, size=None, timeout=None):
+    """Mark a synchronous function as CPU-bound work for the named pool.
+
+    The decorated function becomes a coroutine function. `size` receives the
+    call's arguments and returns a work estimate (e.g. input length) that is
+    compared with the pool's inline threshold. Functions used with process
+    pools must be defined at module level so workers can import them.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args):
+            pool = POOLS[pool_name]
+            work_size = size(*args) if size else None
+            if pool.kind == 'process':
+                return await pool.run(
+                    _invoke, func.__module__, func.__qualname__, args, size=work_size, timeout=timeout
+                )
+            return await pool.run(func, *args, size=work_size, timeout=timeout)
+        return wrapper
+    return decorator
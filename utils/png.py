@@ -0,0 +1,183 @@
+# utils/png.py
+import struct
+import zlib
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+GRAYSCALE = 0
+RGB = 2
+
+
+def _chunk(kind, data):
+    return (
+        struct.pack('>I', len(data)) + kind + data
+        + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+    )
+
+
+def encode_png(width, height, rows, color_type=RGB, bit_depth=8, level=6):
+    """Build a PNG from an iterable of packed scanlines (without filter bytes).
+
+    Every row uses filter type 0; the images drawn here are flat colours and
+    bitmaps, which zlib already compresses well without prediction.
+    """
+    compressor = zlib.compressobj(level)
+    parts = []
+    for row in rows:
+        parts.append(compressor.compress(b'\x00' + row))
+    parts.append(compressor.flush())
+
+    header = struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)
+    return b''.join((
+        PNG_SIGNATURE,
+        _chunk(b'IHDR', header),
+        _chunk(b'IDAT', b''.join(parts)),
+        _chunk(b'IEND', b''),
+    ))
+
+
+def bitmap_png(matrix, scale=1, border=0):
+    """Render rows of 0/1 strings (1 = dark) as a black-and-white, 1-bit PNG.
+
+    Each module becomes a `scale` x `scale` block, with a light `border` of
+    modules around the image.
+    """
+    width = (len(matrix[0]) + 2 * border) * scale
+    pad = '0' * border
+    # One str.translate both inverts (PNG grayscale 0 is black) and scales a whole row
+    expand = str.maketrans({'0': '1' * scale, '1': '0' * scale})
+    row_bytes = (width + 7) // 8
+    fill = '1' * (row_bytes * 8 - width)
+
+    def scanline(bits):
+        return int((pad + bits + pad).translate(expand) + fill, 2).to_bytes(row_bytes, 'big')
+
+    blank = scanline('0' * len(matrix[0]))
+
+    def rows():
+        for _ in range(border * scale):
+            yield blank
+        for bits in matrix:
+            line = scanline(bits)
+            for _ in range(scale):
+                yield line
+        for _ in range(border * scale):
+            yield blank
+
+    height = (len(matrix) + 2 * border) * scale
+    return encode_png(width, height, rows(), color_type=GRAYSCALE, bit_depth=1)
+
+
+class PNGError(ValueError):
+    """Raised for PNG data this decoder does not understand."""
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _unfilter(kind, row, previous, bpp):
+    if kind == 0:
+        return row
+    if kind == 2:
+        return bytearray((x + up) & 255 for x, up in zip(row, previous))
+    if kind == 1:
+        for i in range(bpp, len(row)):
+            row[i] = (row[i] + row[i - bpp]) & 255
+        return row
+    if kind == 3:
+        for i in range(len(row)):
+            left = row[i - bpp] if i >= bpp else 0
+            row[i] = (row[i] + ((left + previous[i]) >> 1)) & 255
+        return row
+    if kind == 4:
+        for i in range(len(row)):
+            left = row[i - bpp] if i >= bpp else 0
+            upper_left = previous[i - bpp] if i >= bpp else 0
+            row[i] = (row[i] + _paeth(left, previous[i], upper_left)) & 255
+        return row
+    raise PNGError(f"Unknown PNG filter type {kind}.")
+
+
+_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+MAX_DECODE_PIXELS = 3840 * 2160  # 4K; every row is unfiltered in Python whatever the step
+
+
+def decode_png(data, step=1, max_pixels=MAX_DECODE_PIXELS):
+    """Decode an 8-bit, non-interlaced PNG into (width, height, [(r, g, b), ...]).
+
+    Only every `step`-th row and column is returned, for callers that only
+    need a downsampled image. Every row is still unfiltered, since each one
+    can depend on the row before it. Malformed data raises PNGError.
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise PNGError("Not a PNG image.")
+    try:
+        return _decode(data, step, max_pixels)
+    except (zlib.error, struct.error) as e:
+        raise PNGError(f"Corrupt PNG image: {e}") from None
+
+
+def _decode(data, step, max_pixels):
+    position = len(PNG_SIGNATURE)
+    header = None
+    palette = None
+    compressed = []
+    while position + 8 <= len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif kind == b'PLTE':
+            palette = [tuple(body[i:i + 3]) for i in range(0, len(body) - 2, 3)]
+        elif kind == b'IDAT':
+            compressed.append(body)
+        elif kind == b'IEND':
+            break
+    if header is None:
+        raise PNGError("PNG header is missing.")
+
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or interlace or color_type not in _CHANNELS:
+        raise PNGError("Only 8-bit, non-interlaced PNG images are supported.")
+    if width * height > max_pixels:
+        raise PNGError(f"Image is too large to decode (max {max_pixels:,} pixels).")
+    if color_type == 3 and not palette:
+        raise PNGError("Palette image without a palette.")
+
+    channels = _CHANNELS[color_type]
+    stride = width * channels
+    expected = height * (stride + 1)
+    # Bounded by what the header promises, so a small IDAT cannot inflate into gigabytes
+    decompressor = zlib.decompressobj()
+    raw = decompressor.decompress(b''.join(compressed), expected)
+    if decompressor.unconsumed_tail:
+        raise PNGError("PNG image data is larger than its header says.")
+    if len(raw) != expected:
+        raise PNGError("PNG image data is truncated.")
+
+    pixels = []
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        row = _unfilter(raw[start], bytearray(raw[start + 1:start + 1 + stride]), previous, channels)
+        previous = row
+        if color_type == 3 and max(row, default=0) >= len(palette):
+            raise PNGError("PNG palette index is out of range.")
+        if y % step:
+            continue
+        for x in range(0, width, step):
+            offset = x * channels
+            if color_type == 2 or color_type == 6:
+                pixels.append((row[offset], row[offset + 1], row[offset + 2]))
+            elif color_type == 3:
+                pixels.append(palette[row[offset]])
+            else:
+                value = row[offset]
+                pixels.append((value, value, value))
+    return width, height, pixels
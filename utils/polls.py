@@ -0,0 +1,178 @@
+# utils/polls.py
+import asyncio
+import logging
+
+from utils.storage import data_path, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+POLLS_FILE = data_path("polls.json")
+MAX_OPTIONS = 25  # One button each, five rows of five
+YES_NO = ["Yes", "No"]
+
+
+class Poll:
+    """One poll's options and votes.
+
+    Votes are a user id -> bitmask dict (bit i set = voted for option i),
+    with per-option counts kept in step, so a vote is O(1) and a tally
+    never rescans the voters.
+    """
+
+    __slots__ = (
+        'message_id', 'channel_id', 'author_id', 'question', 'options',
+        'multiple', 'anonymous', 'deadline', 'votes', 'counts',
+    )
+
+    def __init__(self, message_id, channel_id, author_id, question, options,
+                 multiple=False, anonymous=False, deadline=None):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.question = question
+        self.options = options
+        self.multiple = multiple
+        self.anonymous = anonymous
+        self.deadline = deadline
+        self.votes = {}
+        self.counts = [0] * len(options)
+
+    def vote(self, user_id, option):
+        """Toggle `option` for a user and return their new bitmask.
+
+        Single-choice polls move the vote; picking the current choice again
+        withdraws it. Multiple-choice polls toggle each option independently.
+        """
+        old = self.votes.get(user_id, 0)
+        bit = 1 << option
+        if self.multiple:
+            new = old ^ bit
+        else:
+            new = 0 if old == bit else bit
+        changed = old ^ new
+        while changed:
+            low = changed & -changed
+            self.counts[low.bit_length() - 1] += 1 if new & low else -1
+            changed ^= low
+        if new:
+            self.votes[user_id] = new
+        else:
+            self.votes.pop(user_id, None)
+        return new
+
+    def choices(self, mask):
+        return [self.options[i] for i in range(len(self.options)) if mask >> i & 1]
+
+    def voters(self, option):
+        bit = 1 << option
+        return [user_id for user_id, mask in self.votes.items() if mask & bit]
+
+    def to_json(self):
+        return {
+            'channel_id': self.channel_id,
+            'author_id': self.author_id,
+            'question': self.question,
+            'options': self.options,
+            'multiple': self.multiple,
+            'anonymous': self.anonymous,
+            'deadline': self.deadline,
+            # Flat [user, mask, user, mask, ...] keeps large polls compact on disk
+            'votes': [value for pair in self.votes.items() for value in pair],
+        }
+
+    @classmethod
+    def from_json(cls, message_id, data):
+        if 'options' not in data:
+            # Yes/No polls from before options existed: {user_id: option index}
+            poll = cls(message_id, None, None, None, list(YES_NO))
+            for user_id, option in data.items():
+                poll.vote(int(user_id), option)
+            return poll
+        poll = cls(
+            message_id, data['channel_id'], data['author_id'], data['question'], data['options'],
+            data['multiple'], data['anonymous'], data['deadline']
+        )
+        flat = data['votes']
+        poll.votes = dict(zip(flat[::2], flat[1::2]))
+        for mask in poll.votes.values():
+            while mask:
+                low = mask & -mask
+                poll.counts[low.bit_length() - 1] += 1
+                mask ^= low
+        return poll
+
+
+class PollStore:
+    """Open polls by message id, snapshotted to disk when changed."""
+
+    def __init__(self, path=POLLS_FILE):
+        self.path = path
+        self.polls = {}
+        self.dirty = False
+
+    def load(self):
+        self.polls = {
+            int(message_id): Poll.from_json(int(message_id), data)
+            for message_id, data in load_json(self.path, {}).items()
+        }
+
+    def snapshot(self):
+        """Return the data to persist and clear the dirty flag."""
+        self.dirty = False
+        return {str(message_id): poll.to_json() for message_id, poll in self.polls.items()}
+
+    def save(self, snapshot):
+        save_json(self.path, snapshot)
+
+
+class Debouncer:
+    """Coalesces triggers per key into at most one `callback(key)` every `interval` seconds.
+
+    The first trigger after a quiet period runs right away; triggers inside
+    the interval schedule one trailing call, so the last change is never lost.
+    """
+
+    def __init__(self, interval, callback):
+        self.interval = interval
+        self.callback = callback
+        self._scheduled = {}  # key -> TimerHandle
+        self._last_run = {}
+        self._running = set()
+        self.triggers = 0
+        self.calls = 0
+
+    def trigger(self, key):
+        self.triggers += 1
+        if key in self._scheduled:
+            return
+        loop = asyncio.get_running_loop()
+        delay = max(0.0, self._last_run.get(key, float('-inf')) + self.interval - loop.time())
+        self._scheduled[key] = loop.call_later(delay, self._run, key)
+
+    def _run(self, key):
+        del self._scheduled[key]
+        self._last_run[key] = asyncio.get_running_loop().time()
+        self.calls += 1
+        task = asyncio.ensure_future(self._call(key))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _call(self, key):
+        try:
+            await self.callback(key)
+        except Exception as e:
+            logger.error(f"Debounced call for {key} failed: {e}")
+
+    def cancel(self, key):
+        handle = self._scheduled.pop(key, None)
+        if handle is not None:
+            handle.cancel()
+        self._last_run.pop(key, None)
+
+    async def flush(self):
+        """Run every pending call now, e.g. before shutdown."""
+        for key, handle in list(self._scheduled.items()):
+            handle.cancel()
+            self._run(key)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
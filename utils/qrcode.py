@@ -0,0 +1,402 @@
+# utils/qrcode.py
+"""QR code encoding (ISO/IEC 18004, model 2, versions 1-40) in pure Python."""
+import functools
+import re
+
+from utils.png import bitmap_png
+
+# Error correction level -> (table index, format bits)
+ERROR_LEVELS = {'L': (0, 1), 'M': (1, 0), 'Q': (2, 3), 'H': (3, 2)}
+
+# Indexed [level][version]; index 0 is unused
+ECC_CODEWORDS_PER_BLOCK = (
+    (-1, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28, 28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    (-1, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26, 26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28),
+    (-1, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30, 28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    (-1, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28, 30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+)
+NUM_ERROR_CORRECTION_BLOCKS = (
+    (-1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8, 8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22, 24, 25),
+    (-1, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16, 17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40, 43, 45, 47, 49),
+    (-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68),
+    (-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81),
+)
+
+ALPHANUMERIC_CHARSET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_ALPHANUMERIC_VALUES = {char: index for index, char in enumerate(ALPHANUMERIC_CHARSET)}
+_NUMERIC = re.compile(r'[0-9]*')
+_ALPHANUMERIC = re.compile(r'[0-9A-Z $%*+\-./:]*')
+
+# Mode -> (indicator, character count bits for versions 1-9, 10-26, 27-40)
+MODES = {
+    'numeric': (0x1, (10, 12, 14)),
+    'alphanumeric': (0x2, (9, 11, 13)),
+    'byte': (0x4, (8, 16, 16)),
+}
+
+# A light-dark-light-dark-light run in 1:1:3:1:1 ratio with 4 light modules on one side
+_FINDER_LIKE = ('10111010000', '00001011101')
+_LONG_RUN = re.compile(r'0{5,}|1{5,}')
+
+
+class QRCodeError(ValueError):
+    """Raised when data does not fit in a QR code at the requested error correction level."""
+
+
+# GF(256) arithmetic with the QR polynomial x^8 + x^4 + x^3 + x^2 + 1
+_EXP = [0] * 512
+_LOG = [0] * 256
+_value = 1
+for _power in range(255):
+    _EXP[_power] = _value
+    _LOG[_value] = _power
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= 0x11D
+for _power in range(255, 512):
+    _EXP[_power] = _EXP[_power - 255]
+
+
+def _gf_multiply(x, y):
+    if x == 0 or y == 0:
+        return 0
+    return _EXP[_LOG[x] + _LOG[y]]
+
+
+_DIVISORS = {}
+
+
+def _rs_divisor(degree):
+    """Generator polynomial coefficients (highest term dropped) for `degree` ECC codewords."""
+    divisor = _DIVISORS.get(degree)
+    if divisor is None:
+        divisor = [0] * (degree - 1) + [1]
+        root = 1
+        for _ in range(degree):
+            for j in range(degree):
+                divisor[j] = _gf_multiply(divisor[j], root)
+                if j + 1 < degree:
+                    divisor[j] ^= divisor[j + 1]
+            root = _gf_multiply(root, 0x02)
+        divisor = _DIVISORS[degree] = tuple(divisor)
+    return divisor
+
+
+def _rs_remainder(data, divisor):
+    log_divisor = [_LOG[coefficient] if coefficient else None for coefficient in divisor]
+    result = [0] * len(divisor)
+    for byte in data:
+        factor = byte ^ result.pop(0)
+        result.append(0)
+        if factor:
+            log_factor = _LOG[factor]
+            for i, log_coefficient in enumerate(log_divisor):
+                if log_coefficient is not None:
+                    result[i] ^= _EXP[log_coefficient + log_factor]
+    return result
+
+
+def _raw_data_modules(version):
+    """Modules available for data and ECC once function patterns are placed."""
+    result = (16 * version + 128) * version + 64
+    if version >= 2:
+        alignments = version // 7 + 2
+        result -= (25 * alignments - 10) * alignments - 55
+        if version >= 7:
+            result -= 36
+    return result
+
+
+def data_capacity(version, level):
+    """Data codewords (bytes) available at a version and error correction level."""
+    index = ERROR_LEVELS[level][0]
+    return (_raw_data_modules(version) // 8
+            - ECC_CODEWORDS_PER_BLOCK[index][version] * NUM_ERROR_CORRECTION_BLOCKS[index][version])
+
+
+def _alignment_positions(version):
+    if version == 1:
+        return []
+    count = version // 7 + 2
+    size = version * 4 + 17
+    step = (version * 8 + count * 3 + 5) // (count * 4 - 4) * 2
+    return [6] + [size - 7 - i * step for i in range(count - 2, -1, -1)]
+
+
+def _choose_mode(text):
+    if _NUMERIC.fullmatch(text):
+        return 'numeric'
+    if _ALPHANUMERIC.fullmatch(text):
+        return 'alphanumeric'
+    return 'byte'
+
+
+def _segment_bits(text, mode):
+    """Return (payload as a '0'/'1' string, character count) for a single segment."""
+    if mode == 'numeric':
+        parts = []
+        for i in range(0, len(text), 3):
+            group = text[i:i + 3]
+            parts.append(format(int(group), f'0{len(group) * 3 + 1}b'))
+        return ''.join(parts), len(text)
+    if mode == 'alphanumeric':
+        parts = []
+        for i in range(0, len(text) - 1, 2):
+            parts.append(format(_ALPHANUMERIC_VALUES[text[i]] * 45 + _ALPHANUMERIC_VALUES[text[i + 1]], '011b'))
+        if len(text) % 2:
+            parts.append(format(_ALPHANUMERIC_VALUES[text[-1]], '06b'))
+        return ''.join(parts), len(text)
+    data = text.encode('utf-8')
+    return ''.join(format(byte, '08b') for byte in data), len(data)
+
+
+def _count_bits(mode, version):
+    widths = MODES[mode][1]
+    return widths[0] if version <= 9 else widths[1] if version <= 26 else widths[2]
+
+
+def _encode_data(text, level):
+    """Pick the smallest version that fits and return (version, data codewords)."""
+    mode = _choose_mode(text)
+    payload, count = _segment_bits(text, mode)
+    for version in range(1, 41):
+        count_width = _count_bits(mode, version)
+        capacity_bits = data_capacity(version, level) * 8
+        if count < 1 << count_width and 4 + count_width + len(payload) <= capacity_bits:
+            break
+    else:
+        raise QRCodeError("Text is too long for a QR code at this error correction level.")
+
+    bits = format(MODES[mode][0], '04b') + format(count, f'0{count_width}b') + payload
+    bits += '0' * min(4, capacity_bits - len(bits))
+    bits += '0' * (-len(bits) % 8)
+    codewords = [int(bits[i:i + 8], 2) for i in range(0, len(bits), 8)]
+    padding = capacity_bits // 8 - len(codewords)
+    codewords.extend((0xEC, 0x11) * (padding // 2) + (0xEC,) * (padding % 2))
+    return version, codewords
+
+
+def _add_error_correction(codewords, version, level):
+    """Split data into blocks, append Reed-Solomon codewords and interleave."""
+    index = ERROR_LEVELS[level][0]
+    block_count = NUM_ERROR_CORRECTION_BLOCKS[index][version]
+    ecc_length = ECC_CODEWORDS_PER_BLOCK[index][version]
+    raw_codewords = _raw_data_modules(version) // 8
+    short_blocks = block_count - raw_codewords % block_count
+    short_length = raw_codewords // block_count
+
+    divisor = _rs_divisor(ecc_length)
+    data_blocks = []
+    ecc_blocks = []
+    position = 0
+    for block in range(block_count):
+        length = short_length - ecc_length + (0 if block < short_blocks else 1)
+        data = codewords[position:position + length]
+        position += length
+        data_blocks.append(data)
+        ecc_blocks.append(_rs_remainder(data, divisor))
+
+    result = []
+    for i in range(short_length - ecc_length + 1):
+        for data in data_blocks:
+            if i < len(data):
+                result.append(data[i])
+    for i in range(ecc_length):
+        for ecc in ecc_blocks:
+            result.append(ecc[i])
+    return result
+
+
+def _format_bits(level, mask):
+    data = ERROR_LEVELS[level][1] << 3 | mask
+    remainder = data
+    for _ in range(10):
+        remainder = (remainder << 1) ^ ((remainder >> 9) * 0x537)
+    return (data << 10 | remainder) ^ 0x5412
+
+
+def _version_bits(version):
+    remainder = version
+    for _ in range(12):
+        remainder = (remainder << 1) ^ ((remainder >> 11) * 0x1F25)
+    return version << 12 | remainder
+
+
+class _Matrix:
+    """Module grid stored as lists of 0/1 plus a parallel grid marking function patterns."""
+
+    def __init__(self, version):
+        self.version = version
+        self.size = size = version * 4 + 17
+        self.modules = [[0] * size for _ in range(size)]
+        self.function = [[False] * size for _ in range(size)]
+
+    def set_function(self, x, y, dark):
+        self.modules[y][x] = 1 if dark else 0
+        self.function[y][x] = True
+
+    def draw_function_patterns(self):
+        size = self.size
+        for i in range(size):
+            self.set_function(6, i, i % 2 == 0)
+            self.set_function(i, 6, i % 2 == 0)
+
+        for x, y in ((3, 3), (size - 4, 3), (3, size - 4)):
+            # Finder pattern plus its light separator
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    if 0 <= x + dx < size and 0 <= y + dy < size:
+                        distance = max(abs(dx), abs(dy))
+                        self.set_function(x + dx, y + dy, distance not in (2, 4))
+
+        positions = _alignment_positions(self.version)
+        last = len(positions) - 1
+        for i, x in enumerate(positions):
+            for j, y in enumerate(positions):
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self.set_function(x + dx, y + dy, max(abs(dx), abs(dy)) != 1)
+
+        # Reserve the format areas now; the bits themselves depend on the mask
+        self.draw_format_bits(0)
+
+        if self.version >= 7:
+            bits = _version_bits(self.version)
+            for i in range(18):
+                dark = (bits >> i) & 1
+                a, b = size - 11 + i % 3, i // 3
+                self.set_function(a, b, dark)
+                self.set_function(b, a, dark)
+
+    def format_positions(self):
+        """Yield (x, y, bit index) for both copies of the 15 format bits."""
+        size = self.size
+        for i in range(6):
+            yield 8, i, i
+        yield 8, 7, 6
+        yield 8, 8, 7
+        yield 7, 8, 8
+        for i in range(9, 15):
+            yield 14 - i, 8, i
+        for i in range(8):
+            yield size - 1 - i, 8, i
+        for i in range(8, 15):
+            yield 8, size - 15 + i, i
+
+    def draw_format_bits(self, bits):
+        for x, y, i in self.format_positions():
+            self.set_function(x, y, (bits >> i) & 1)
+        self.set_function(8, self.size - 8, True)
+
+    def place_codewords(self, codewords):
+        size = self.size
+        total_bits = len(codewords) * 8
+        i = 0
+        right = size - 1
+        while right >= 1:
+            if right == 6:
+                right = 5
+            upward = ((right + 1) & 2) == 0
+            for vertical in range(size):
+                y = size - 1 - vertical if upward else vertical
+                for x in (right, right - 1):
+                    if not self.function[y][x] and i < total_bits:
+                        self.modules[y][x] = (codewords[i >> 3] >> (7 - (i & 7))) & 1
+                        i += 1
+            right -= 2
+
+
+_MASKS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+
+
+def _row_int(row):
+    return int(''.join(map(str, row)), 2)
+
+
+@functools.lru_cache(maxsize=None)
+def _mask_rows(mask, size):
+    """Mask pattern rows as ints; there are only 8 masks x 40 sizes, so they are built once."""
+    pattern = _MASKS[mask]
+    return tuple(_row_int([1 if pattern(x, y) else 0 for x in range(size)]) for y in range(size))
+
+
+def _penalty(rows, size):
+    """Score a masked symbol (rows as ints, bit size-1-x = column x) by the four standard rules."""
+    lines = [format(row, f'0{size}b') for row in rows]
+    columns = [''.join(column) for column in zip(*lines)]
+
+    score = 0
+    for line in lines + columns:
+        for run in _LONG_RUN.finditer(line):
+            score += run.end() - run.start() - 2
+        padded = f'0000{line}0000'
+        score += 40 * (padded.count(_FINDER_LIKE[0]) + padded.count(_FINDER_LIKE[1]))
+
+    # 2x2 blocks of one colour: compare each row with the next and with itself shifted by one
+    inner = (1 << (size - 1)) - 1
+    for upper, lower in zip(rows, rows[1:]):
+        same_vertical = ~(upper ^ lower)
+        same_block = same_vertical & (same_vertical >> 1) & ~(upper ^ (upper >> 1)) & inner
+        score += 3 * same_block.bit_count()
+
+    dark = sum(row.bit_count() for row in rows)
+    total = size * size
+    score += 10 * ((abs(dark * 20 - total * 10) + total - 1) // total - 1)
+    return score
+
+
+def encode(text, level='M', mask=None):
+    """Encode text into a QR symbol and return its rows as '0'/'1' strings (1 = dark).
+
+    Uses a single numeric, alphanumeric or byte (UTF-8) segment, the
+    smallest version that fits, and the lowest-penalty mask unless one is
+    given.
+    """
+    level = level.upper()
+    if level not in ERROR_LEVELS:
+        raise QRCodeError("Error correction must be one of L, M, Q or H.")
+
+    version, data = _encode_data(text, level)
+    codewords = _add_error_correction(data, version, level)
+
+    matrix = _Matrix(version)
+    matrix.draw_function_patterns()
+    matrix.place_codewords(codewords)
+    size = matrix.size
+
+    base = [_row_int(row) for row in matrix.modules]
+    data_area = [_row_int([0 if fixed else 1 for fixed in row]) for row in matrix.function]
+    format_positions = list(matrix.format_positions())
+
+    def masked(mask_index):
+        rows = [row ^ (pattern & area) for row, pattern, area in zip(base, _mask_rows(mask_index, size), data_area)]
+        bits = _format_bits(level, mask_index)
+        for x, y, i in format_positions:
+            bit = 1 << (size - 1 - x)
+            rows[y] = rows[y] | bit if (bits >> i) & 1 else rows[y] & ~bit
+        return rows
+
+    if mask is None:
+        candidates = [masked(index) for index in range(8)]
+        rows = min(candidates, key=lambda candidate: _penalty(candidate, size))
+    else:
+        rows = masked(mask)
+    return [format(row, f'0{size}b') for row in rows]
+
+
+def render_png(text, size=256, level='M', border=4):
+    """Encode `text` and render it as a PNG roughly `size` pixels wide (whole pixels per module)."""
+    rows = encode(text, level)
+    scale = max(1, size // (len(rows) + 2 * border))
+    return bitmap_png(rows, scale=scale, border=border)
@@ -0,0 +1,146 @@
+# utils/roles.py
+import asyncio
+import heapq
+
+
+class RoleIndex:
+    """Member ids per role, per guild, kept current from member events.
+
+    discord.py answers `role.members` by scanning every cached member of
+    the guild; here each role has a set of member ids, so counts are
+    `len()` and overlaps are set algebra. `load()` builds a guild's index
+    from the member cache in a thread, and `add()`, `remove()` and
+    `update()` keep it current; events that arrive mid-build are queued
+    and replayed once it finishes (all three are idempotent). The
+    @everyone role, whose id is the guild's, maps to every member.
+    """
+
+    def __init__(self):
+        self._guilds = {}  # guild_id -> {role_id: set of member ids}
+        self._pending = {}  # guild_id -> [(method, args)] queued while its index is built
+        self._loading = {}  # guild_id -> build task
+
+    def __len__(self):
+        return len(self._guilds)
+
+    @staticmethod
+    def _build(guild_id, members):
+        roles = {guild_id: set()}
+        everyone = roles[guild_id]
+        for member in members:
+            everyone.add(member.id)
+            # The raw id list; `member.roles` would resolve and sort Role objects for every member
+            for role_id in member._roles:
+                roles.setdefault(role_id, set()).add(member.id)
+        return roles
+
+    async def load(self, guild):
+        """Build the guild's index if it has none yet.
+
+        Skipped until the guild's member list has been downloaded, since a
+        partial cache would leave members out for good.
+        """
+        if guild.id in self._guilds or not guild.chunked:
+            return
+        task = self._loading.get(guild.id)
+        if task is None:
+            pending = self._pending[guild.id] = []
+            task = self._loading[guild.id] = asyncio.ensure_future(self._load(guild, pending))
+        await asyncio.shield(task)
+
+    async def _load(self, guild, pending):
+        try:
+            # `guild.members` is a list copied here on the loop; only member objects are read in the thread
+            roles = await asyncio.to_thread(self._build, guild.id, guild.members)
+        finally:
+            if self._pending.get(guild.id) is pending:
+                del self._pending[guild.id]
+                del self._loading[guild.id]
+            else:
+                pending = None  # Cleared while building
+        if pending is not None:
+            self._guilds[guild.id] = roles
+            for method, args in pending:
+                method(*args)
+
+    def roles(self, guild):
+        """The guild's {role_id: member ids}; the sets must not be modified.
+
+        Without a loaded index (see `load()`) this scans the member cache.
+        """
+        roles = self._guilds.get(guild.id)
+        if roles is None:
+            return self._build(guild.id, guild.members)
+        return roles
+
+    def members(self, guild, role_id):
+        return self.roles(guild).get(role_id, frozenset())
+
+    def count(self, guild, role_id):
+        return len(self.members(guild, role_id))
+
+    def add(self, member):
+        if member.guild.id in self._pending:
+            self._pending[member.guild.id].append((self.add, (member,)))
+            return
+        roles = self._guilds.get(member.guild.id)
+        if roles is None:
+            return
+        roles[member.guild.id].add(member.id)
+        for role_id in member._roles:
+            roles.setdefault(role_id, set()).add(member.id)
+
+    def remove(self, member):
+        if member.guild.id in self._pending:
+            self._pending[member.guild.id].append((self.remove, (member,)))
+            return
+        roles = self._guilds.get(member.guild.id)
+        if roles is None:
+            return
+        roles[member.guild.id].discard(member.id)
+        for role_id in member._roles:
+            if role_id in roles:
+                roles[role_id].discard(member.id)
+
+    def update(self, before, after):
+        """Apply a member's role changes."""
+        if after.guild.id in self._pending:
+            self._pending[after.guild.id].append((self.update, (before, after)))
+            return
+        roles = self._guilds.get(after.guild.id)
+        if roles is None:
+            return
+        old, new = set(before._roles), set(after._roles)
+        for role_id in old - new:
+            if role_id in roles:
+                roles[role_id].discard(after.id)
+        for role_id in new - old:
+            roles.setdefault(role_id, set()).add(after.id)
+
+    def drop_role(self, guild_id, role_id):
+        if guild_id in self._pending:
+            self._pending[guild_id].append((self.drop_role, (guild_id, role_id)))
+            return
+        roles = self._guilds.get(guild_id)
+        if roles is not None:
+            roles.pop(role_id, None)
+
+    def forget_guild(self, guild_id):
+        self._guilds.pop(guild_id, None)
+        self._pending.pop(guild_id, None)
+        self._loading.pop(guild_id, None)
+
+    def clear(self):
+        self._guilds.clear()
+        self._pending.clear()
+        self._loading.clear()
+
+
+def sorted_page(member_ids, number, size):
+    """Page `number` (1-based) of the ids in ascending order, plus whether another page follows.
+
+    Only the first `number * size` ids are ordered (a heap select), not the
+    whole set.
+    """
+    end = number * size
+    return heapq.nsmallest(end, member_ids)[end - size:], len(member_ids) > end
@@ -0,0 +1,143 @@
+# utils/router.py
+import asyncio
+import heapq
+import itertools
+import logging
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+class Prompt:
+    """One pending wait: who may answer, with what, and until when."""
+
+    __slots__ = ('key', 'user_id', 'choices', 'future', 'deadline')
+
+    def __init__(self, key, user_id, choices, future, deadline):
+        self.key = key
+        self.user_id = user_id
+        self.choices = choices
+        self.future = future
+        self.deadline = deadline
+
+
+class InteractionRouter:
+    """Dispatches reactions and component clicks to the one prompt waiting for them.
+
+    `bot.wait_for('reaction_add', check=...)` adds a listener whose check runs
+    for every reaction in every guild, so each event costs O(open prompts).
+    Here prompts live in a dict keyed by message id (reactions) or custom_id
+    (components), so an event costs one lookup. Timeouts share a single heap
+    and a single `call_at` timer armed for the earliest deadline; finished
+    prompts are dropped from the heap lazily when they reach the top.
+    """
+
+    def __init__(self):
+        self.bot_user_id = None
+        self._prompts = {}
+        self._deadlines = []  # (deadline, sequence, key, prompt)
+        self._sequence = itertools.count()
+        self._timer = None
+        self._timer_at = None
+        self.dispatched = 0
+        self.timeouts = 0
+
+    def install(self, bot):
+        """Subscribe to the bot's raw reaction and interaction events (once, at startup)."""
+        self._bot = bot
+        bot.add_listener(self.on_raw_reaction_add, 'on_raw_reaction_add')
+        bot.add_listener(self.on_interaction, 'on_interaction')
+
+    def __len__(self):
+        return len(self._prompts)
+
+    async def _wait(self, key, user_id, choices, timeout):
+        if key in self._prompts:
+            raise RuntimeError(f"A prompt is already waiting on {key!r}.")
+        loop = asyncio.get_running_loop()
+        prompt = Prompt(key, user_id, choices, loop.create_future(), loop.time() + timeout)
+        self._prompts[key] = prompt
+        heapq.heappush(self._deadlines, (prompt.deadline, next(self._sequence), key, prompt))
+        if self._timer_at is None or prompt.deadline < self._timer_at:
+            self._arm(loop)
+        try:
+            return await prompt.future
+        finally:
+            if self._prompts.get(key) is prompt:
+                del self._prompts[key]
+
+    async def wait_reaction(self, message_id, *, user_id=None, emojis=None, timeout=30.0):
+        """Wait for a reaction on a message; returns (emoji string, user id).
+
+        Only `user_id` may answer if given, and only with one of `emojis` if
+        given. Raises asyncio.TimeoutError like `bot.wait_for`.
+        """
+        choices = frozenset(emojis) if emojis is not None else None
+        return await self._wait(('reaction', message_id), user_id, choices, timeout)
+
+    async def wait_component(self, custom_id, *, user_id=None, timeout=60.0):
+        """Wait for a button/select with this custom_id; returns the interaction, not yet responded to."""
+        return await self._wait(('component', custom_id), user_id, None, timeout)
+
+    def _arm(self, loop):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._timer_at = None
+        while self._deadlines and self._deadlines[0][3].future.done():
+            heapq.heappop(self._deadlines)
+        if self._deadlines:
+            self._timer_at = self._deadlines[0][0]
+            self._timer = loop.call_at(self._timer_at, self._expire, loop)
+
+    def _expire(self, loop):
+        now = loop.time()
+        while self._deadlines and self._deadlines[0][0] <= now:
+            _, _, key, prompt = heapq.heappop(self._deadlines)
+            if not prompt.future.done():
+                prompt.future.set_exception(asyncio.TimeoutError())
+                self.timeouts += 1
+            if self._prompts.get(key) is prompt:
+                del self._prompts[key]
+        self._arm(loop)
+
+    def _resolve(self, key, user_id, choice, result):
+        prompt = self._prompts.get(key)
+        if prompt is None or prompt.future.done():
+            return False
+        if prompt.user_id is not None and user_id != prompt.user_id:
+            return False
+        if prompt.choices is not None and choice not in prompt.choices:
+            return False
+        del self._prompts[key]
+        prompt.future.set_result(result)
+        self.dispatched += 1
+        return True
+
+    def dispatch_reaction(self, message_id, user_id, emoji):
+        """Route one reaction; returns True if a prompt took it."""
+        if user_id == self.bot_user_id:
+            return False
+        return self._resolve(('reaction', message_id), user_id, emoji, (emoji, user_id))
+
+    def dispatch_component(self, custom_id, interaction):
+        return self._resolve(('component', custom_id), interaction.user.id, None, interaction)
+
+    async def on_raw_reaction_add(self, payload):
+        if self.bot_user_id is None and self._bot.user is not None:
+            self.bot_user_id = self._bot.user.id
+        self.dispatch_reaction(payload.message_id, payload.user_id, str(payload.emoji))
+
+    async def on_interaction(self, interaction):
+        if interaction.type is discord.InteractionType.component:
+            custom_id = (interaction.data or {}).get('custom_id')
+            if custom_id is not None:
+                self.dispatch_component(custom_id, interaction)
+
+
+_router = InteractionRouter()
+
+
+def get_router():
+    return _router
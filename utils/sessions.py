@@ -0,0 +1,163 @@
+# utils/sessions.py
+import asyncio
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+MAX_GUILD_SESSIONS = 25  # Concurrent games per guild (one per channel)
+SESSION_TIMEOUT = 120  # Seconds of inactivity before a game ends
+
+
+class SessionError(Exception):
+    """Raised when a game cannot start (channel busy or guild at its cap)."""
+
+
+class TimerWheel:
+    """A hashed timing wheel: any number of timeouts on one repeating tick.
+
+    Each key sits in the slot its deadline falls in, with a count of full
+    turns still to wait, so scheduling and cancelling are dict operations
+    and a tick only visits one slot. There is one `call_at` handle for the
+    whole wheel, armed only while something is scheduled, where
+    `asyncio.sleep` per session would mean a task and a timer each.
+    Deadlines are rounded up to whole ticks.
+    """
+
+    def __init__(self, callback, tick=1.0, size=512):
+        self.callback = callback
+        self.tick = tick
+        self.size = size
+        self._slots = [{} for _ in range(size)]  # key -> remaining turns
+        self._where = {}  # key -> slot index
+        self._position = 0
+        self._handle = None
+        self._next_at = None
+        self.fired = 0
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def schedule(self, key, delay):
+        """(Re)schedule `callback(key)` to run after `delay` seconds."""
+        self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._position + ticks) % self.size
+        self._slots[slot][key] = (ticks - 1) // self.size
+        self._where[key] = slot
+        if self._handle is None:
+            loop = asyncio.get_running_loop()
+            self._next_at = loop.time() + self.tick
+            self._handle = loop.call_at(self._next_at, self._advance, loop)
+
+    def cancel(self, key):
+        slot = self._where.pop(key, None)
+        if slot is not None:
+            del self._slots[slot][key]
+
+    def _advance(self, loop):
+        self._position = (self._position + 1) % self.size
+        bucket = self._slots[self._position]
+        expired = []
+        for key, turns in bucket.items():
+            if turns:
+                bucket[key] = turns - 1
+            else:
+                expired.append(key)
+        for key in expired:
+            del bucket[key]
+            del self._where[key]
+            self.fired += 1
+            try:
+                self.callback(key)
+            except Exception as e:
+                logger.error(f"Timer callback for {key} failed: {e}")
+
+        if self._where:
+            # Fixed steps from the previous tick so the wheel does not drift
+            self._next_at += self.tick
+            self._handle = loop.call_at(self._next_at, self._advance, loop)
+        else:
+            self._handle = None
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+
+class SessionManager:
+    """Running games, one per channel, with a per-guild cap and idle expiry.
+
+    Sessions are the caller's objects and need `guild_id` and `channel_id`
+    attributes. When a session's timer runs out, `on_expire(session)` runs
+    as a task and should either `end()` it or `touch()` it to start another
+    timer (e.g. to move on to the next question).
+    """
+
+    def __init__(self, on_expire, max_per_guild=MAX_GUILD_SESSIONS, timeout=SESSION_TIMEOUT):
+        self.on_expire = on_expire
+        self.max_per_guild = max_per_guild
+        self.timeout = timeout
+        self._sessions = {}  # channel_id -> session
+        self._per_guild = {}  # guild_id -> running sessions
+        self._wheel = TimerWheel(self._expired)
+        self._tasks = set()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def get(self, channel_id):
+        return self._sessions.get(channel_id)
+
+    def start(self, session, timeout=None):
+        """Register a new session; raises SessionError if its channel or guild is full."""
+        if session.channel_id in self._sessions:
+            raise SessionError("A game is already running in this channel.")
+        if self._per_guild.get(session.guild_id, 0) >= self.max_per_guild:
+            raise SessionError(f"This server already has {self.max_per_guild} games running.")
+        self._sessions[session.channel_id] = session
+        self._per_guild[session.guild_id] = self._per_guild.get(session.guild_id, 0) + 1
+        self._wheel.schedule(session.channel_id, timeout or self.timeout)
+        return session
+
+    def touch(self, session, timeout=None):
+        """Restart a session's timer after activity."""
+        if self._sessions.get(session.channel_id) is session:
+            self._wheel.schedule(session.channel_id, timeout or self.timeout)
+
+    def end(self, session):
+        """Remove a session; returns False if it had already ended."""
+        if self._sessions.get(session.channel_id) is not session:
+            return False
+        del self._sessions[session.channel_id]
+        self._wheel.cancel(session.channel_id)
+        remaining = self._per_guild[session.guild_id] - 1
+        if remaining:
+            self._per_guild[session.guild_id] = remaining
+        else:
+            del self._per_guild[session.guild_id]
+        return True
+
+    def _expired(self, channel_id):
+        session = self._sessions.get(channel_id)
+        if session is None:
+            return
+        task = asyncio.ensure_future(self._run_expire(session))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_expire(self, session):
+        try:
+            await self.on_expire(session)
+        except Exception as e:
+            logger.error(f"Session expiry handler failed for channel {session.channel_id}: {e}")
+            self.end(session)
+
+    def close(self):
+        self._wheel.close()
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,49 @@
+# utils/shuffle.py
+import random
+
+
+class ShuffleBag:
+    """Draws every index in range(size) once, in random order, then starts a new round.
+
+    The order is a keyed permutation (a 4-round Feistel network over the next
+    even power of two, cycle-walking past out-of-range values), so a bag is
+    a key and a position rather than a list of `size` ids.
+    """
+
+    ROUNDS = 4
+
+    def __init__(self, size, rng=random):
+        self.size = size
+        half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self._half_bits = half_bits
+        self._half_mask = (1 << half_bits) - 1
+        self._rng = rng
+        self._reset()
+
+    def _reset(self):
+        self._keys = [self._rng.getrandbits(32) for _ in range(self.ROUNDS)]
+        self._counter = 0
+        self.drawn = 0
+
+    def _permute(self, value):
+        left, right = value >> self._half_bits, value & self._half_mask
+        for key in self._keys:
+            mixed = ((right * 0x9E3779B1) ^ key) & 0xFFFFFFFF
+            mixed = ((mixed ^ (mixed >> 15)) * 0x85EBCA6B) & 0xFFFFFFFF
+            left, right = right, (left ^ (mixed ^ (mixed >> 13))) & self._half_mask
+        return (left << self._half_bits) | right
+
+    def draw(self):
+        if self.drawn >= self.size:
+            self._reset()
+        while True:
+            # Visits every value of the power-of-two domain exactly once per round
+            value = self._permute(self._counter)
+            self._counter += 1
+            if value < self.size:
+                self.drawn += 1
+                return value
+
+    @property
+    def remaining(self):
+        return self.size - self.drawn
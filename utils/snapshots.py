@@ -0,0 +1,75 @@
+# utils/snapshots.py
+from collections import OrderedDict
+
+SNAPSHOT_CACHE_SIZE = 256  # Entries kept per guild and kind, least recently used dropped first
+
+
+class SnapshotCache:
+    """Rendered info embeds per guild, kept until a gateway event changes them.
+
+    Entries are keyed by guild, kind (e.g. 'userinfo') and entity id, and
+    have no expiry: the owning cog's event listeners call `invalidate()`
+    when something an embed shows has changed. Returned embeds are shared
+    between lookups and must not be modified. Hits and misses go to
+    `tracker.track_service('<kind> snapshots', ...)` when a tracker is given.
+    """
+
+    def __init__(self, tracker=None, maxsize=SNAPSHOT_CACHE_SIZE):
+        self.tracker = tracker
+        self.maxsize = maxsize
+        self._guilds = {}  # guild_id -> {kind: OrderedDict(entity_id -> embed)}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return sum(len(entries) for kinds in self._guilds.values() for entries in kinds.values())
+
+    def _track(self, kind, event):
+        if self.tracker is not None:
+            self.tracker.track_service(f'{kind} snapshots', event)
+
+    def get(self, guild_id, kind, entity_id, build):
+        """Return the cached embed, or `build()` it and keep it."""
+        entries = self._guilds.setdefault(guild_id, {}).setdefault(kind, OrderedDict())
+        embed = entries.get(entity_id)
+        if embed is not None:
+            entries.move_to_end(entity_id)
+            self.hits += 1
+            self._track(kind, 'hit')
+            return embed
+        self.misses += 1
+        self._track(kind, 'miss')
+        embed = entries[entity_id] = build()
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+        return embed
+
+    def invalidate(self, guild_id, kind, *entity_ids):
+        """Drop entries of one kind; with no ids, every entry of that kind in the guild."""
+        kinds = self._guilds.get(guild_id)
+        if not kinds or kind not in kinds:
+            return
+        if not entity_ids:
+            del kinds[kind]
+            return
+        entries = kinds[kind]
+        for entity_id in entity_ids:
+            entries.pop(entity_id, None)
+
+    def invalidate_everywhere(self, kind, entity_id):
+        """Drop one entity's entries in every guild (e.g. after a username change)."""
+        for kinds in self._guilds.values():
+            entries = kinds.get(kind)
+            if entries:
+                entries.pop(entity_id, None)
+
+    def forget_guild(self, guild_id):
+        self._guilds.pop(guild_id, None)
+
+    def clear(self):
+        self._guilds.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,35 @@
+# utils/storage.py
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+DATA_DIR = "data"
+
+
+def data_path(*parts):
+    """Return a path inside the bot's data directory, creating parent folders."""
+    path = os.path.join(DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def load_json(path, default):
+    """Load a JSON file, returning `default` if it is missing or unreadable."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to read {path}: {e}")
+        return default
+
+
+def save_json(path, data):
+    """Write a JSON file atomically so a crash never leaves it half-written."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
@@ -0,0 +1,254 @@
+# utils/streams.py
+import base64
+import binascii
+import codecs
+import tempfile
+import urllib.parse
+
+import discord
+
+from utils.http import HTTPError, get_client
+from utils.offload import get_pool
+
+CHUNK_SIZE = 64 * 1024
+MAX_INPUT_BYTES = 8 * 1024 * 1024
+SPOOL_LIMIT = 1024 * 1024  # Output beyond this spills from memory to a temp file
+
+_WHITESPACE = b' \t\r\n'
+
+
+class StreamError(ValueError):
+    """Raised when an upload cannot be transformed (too large, malformed input)."""
+
+
+class Transform:
+    """Incremental bytes -> bytes transform; state carries across chunk boundaries."""
+
+    def feed(self, chunk):
+        raise NotImplementedError
+
+    def finish(self):
+        return b''
+
+    def run(self, data):
+        """Transform a complete input in one go."""
+        return self.feed(data) + self.finish()
+
+
+class TextTransform(Transform):
+    """Decodes UTF-8 incrementally so a character split across chunks is never mangled."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def feed(self, chunk):
+        return self.apply(self._decoder.decode(chunk)).encode('utf-8')
+
+    def finish(self):
+        return self.apply(self._decoder.decode(b'', final=True)).encode('utf-8')
+
+    def apply(self, text):
+        raise NotImplementedError
+
+
+class TextFunction(TextTransform):
+    """A transform for functions that work character by character, like `str.upper`."""
+
+    def __init__(self, func):
+        super().__init__()
+        self.apply = func
+
+
+class Translate(TextTransform):
+    """Table-driven character mapping via `str.translate`."""
+
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def apply(self, text):
+        return text.translate(self.table)
+
+
+class TitleCase(TextTransform):
+    """`str.title` across chunks: each chunk is titled as if the previous character preceded it."""
+
+    def __init__(self):
+        super().__init__()
+        self._after_cased = False
+
+    def apply(self, text):
+        if not text:
+            return text
+        # A one-letter prefix reproduces title()'s "previous character was cased" state
+        result = (('a' if self._after_cased else ' ') + text).title()[1:]
+        last = text[-1]
+        self._after_cased = last.islower() or last.isupper() or last.istitle()
+        return result
+
+
+class Capitalize(TextTransform):
+    """`str.capitalize` across chunks: only the very first character is upper-cased."""
+
+    def __init__(self):
+        super().__init__()
+        self._started = False
+
+    def apply(self, text):
+        if not text:
+            return text
+        if self._started:
+            return text.lower()
+        self._started = True
+        return text.capitalize()
+
+
+class UrlQuote(Transform):
+    """Percent-encoding works on bytes, so no decoding is needed."""
+
+    def feed(self, chunk):
+        return urllib.parse.quote_from_bytes(chunk).encode('ascii')
+
+
+class Base64Encode(Transform):
+    def __init__(self):
+        self._pending = b''
+
+    def feed(self, chunk):
+        data = self._pending + chunk
+        usable = len(data) - len(data) % 3
+        self._pending = data[usable:]
+        return base64.b64encode(data[:usable])
+
+    def finish(self):
+        return base64.b64encode(self._pending)
+
+
+class Base64Decode(Transform):
+    def __init__(self):
+        self._pending = b''
+
+    def feed(self, chunk):
+        data = self._pending + chunk.translate(None, _WHITESPACE)
+        usable = len(data) - len(data) % 4
+        self._pending = data[usable:]
+        return self._decode(data[:usable])
+
+    def finish(self):
+        if self._pending:
+            raise StreamError("Input is not valid base64 (incomplete final group).")
+        return b''
+
+    @staticmethod
+    def _decode(data):
+        try:
+            return base64.b64decode(data, validate=True)
+        except binascii.Error:
+            raise StreamError("Input is not valid base64.") from None
+
+
+class TextStats(TextTransform):
+    """Counts characters, spaces, words and lines without producing output."""
+
+    def __init__(self):
+        super().__init__()
+        self.chars = 0
+        self.spaces = 0
+        self.words = 0
+        self.newlines = 0
+        self._in_word = False
+
+    def apply(self, text):
+        if text:
+            self.chars += len(text)
+            self.spaces += text.count(' ')
+            self.newlines += text.count('\n')
+            self.words += len(text.split())
+            # A word split across two chunks was counted twice
+            if self._in_word and not text[0].isspace():
+                self.words -= 1
+            self._in_word = not text[-1].isspace()
+        return ''
+
+    @property
+    def result(self):
+        """(characters, characters without spaces, words, lines), as `wordcount` shows them."""
+        return self.chars, self.chars - self.spaces, self.words, self.newlines + 1
+
+
+def check_attachment(attachment, limit=MAX_INPUT_BYTES):
+    if attachment.size > limit:
+        raise StreamError(f"File is too large (max {limit // (1024 * 1024)} MB).")
+
+
+async def iter_attachment(attachment, chunk_size=CHUNK_SIZE):
+    """Yield an attachment's bytes in chunks straight from the CDN."""
+    check_attachment(attachment)
+    try:
+        async with get_client().stream(attachment.url) as response:
+            received = 0
+            async for chunk in response.content.iter_chunked(chunk_size):
+                received += len(chunk)
+                if received > MAX_INPUT_BYTES:
+                    raise StreamError("File is larger than it claimed to be.")
+                yield chunk
+    except HTTPError as e:
+        raise StreamError(f"Could not download the file: {e}") from None
+
+
+def _step(transform, sink, chunk, output_limit):
+    sink.write(transform.feed(chunk) if chunk is not None else transform.finish())
+    if sink.tell() > output_limit:
+        raise StreamError(f"The result would exceed the upload limit ({output_limit // (1024 * 1024)} MB).")
+
+
+async def transform_attachment(attachment, transform, output_limit):
+    """Stream an attachment through `transform` into a spooled file, rewound and ready to send.
+
+    Only one chunk is processed at a time; output stays in memory up to
+    SPOOL_LIMIT and spills to a temporary file past that.
+    """
+    pool = get_pool('threads')
+    sink = tempfile.SpooledTemporaryFile(max_size=SPOOL_LIMIT)
+    try:
+        async for chunk in iter_attachment(attachment):
+            await pool.run(_step, transform, sink, chunk, output_limit, size=len(chunk))
+        await pool.run(_step, transform, sink, None, output_limit)
+    except BaseException:
+        sink.close()
+        raise
+    sink.seek(0)
+    return sink
+
+
+async def scan_attachment(attachment, transform):
+    """Stream an attachment through an output-less transform such as TextStats."""
+    pool = get_pool('threads')
+    async for chunk in iter_attachment(attachment):
+        await pool.run(transform.feed, chunk, size=len(chunk))
+    transform.finish()
+    return transform
+
+
+async def send_transformed(ctx, attachment, transform, suffix):
+    """Stream an uploaded file through `transform` and reply with the result as a file."""
+    await ctx.defer()
+    limit = ctx.guild.filesize_limit if ctx.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+    try:
+        result = await transform_attachment(attachment, transform, limit)
+    except StreamError as e:
+        await ctx.send(str(e), ephemeral=True)
+        return
+    with result:
+        await ctx.send(
+            f"📄 `{attachment.filename}` → {suffix}",
+            file=discord.File(result, filename=output_name(attachment.filename, suffix))
+        )
+
+
+def output_name(filename, suffix):
+    """`notes.txt` -> `notes.morse.txt`."""
+    stem, dot, extension = filename.rpartition('.')
+    if not dot:
+        return f"{filename}.{suffix}.txt"
+    return f"{stem}.{suffix}.{extension}"
@@ -0,0 +1,269 @@
+# utils/timeparse.py
+import datetime
+import functools
+import re
+import zoneinfo
+
+from utils.storage import data_path, load_json, save_json
+
+DEFAULT_ZONE = zoneinfo.ZoneInfo('UTC')
+TIMEZONES_FILE = data_path("timezones.json")
+MAX_DURATION = 10 * 365 * 86400
+
+
+class TimeParseError(ValueError):
+    """Raised for input that is not a recognised date, time or duration."""
+
+
+UNITS = {
+    's': 1, 'sec': 1, 'secs': 1, 'second': 1, 'seconds': 1,
+    'm': 60, 'min': 60, 'mins': 60, 'minute': 60, 'minutes': 60,
+    'h': 3600, 'hr': 3600, 'hrs': 3600, 'hour': 3600, 'hours': 3600,
+    'd': 86400, 'day': 86400, 'days': 86400,
+    'w': 604800, 'wk': 604800, 'wks': 604800, 'week': 604800, 'weeks': 604800,
+}
+
+MONTHS = {
+    'jan': 1, 'january': 1, 'feb': 2, 'february': 2, 'mar': 3, 'march': 3,
+    'apr': 4, 'april': 4, 'may': 5, 'jun': 6, 'june': 6, 'jul': 7, 'july': 7,
+    'aug': 8, 'august': 8, 'sep': 9, 'sept': 9, 'september': 9, 'oct': 10, 'october': 10,
+    'nov': 11, 'november': 11, 'dec': 12, 'december': 12,
+}
+
+DAY_WORDS = {'today': 0, 'tonight': 0, 'tomorrow': 1, 'yesterday': -1}
+
+_UNIT = '|'.join(sorted(UNITS, key=len, reverse=True))
+_MONTH = '|'.join(sorted(MONTHS, key=len, reverse=True))
+
+_DURATION_PART = re.compile(rf'(\d+(?:\.\d+)?)\s*({_UNIT})(?![a-z])')
+_DURATION = re.compile(rf'(?:\d+(?:\.\d+)?\s*(?:{_UNIT})(?![a-z])(?:\s*,?\s*(?:and\s+)?)?)+')
+_RELATIVE = re.compile(rf'(?:in\s+)?(?P<duration>{_DURATION.pattern})(?:\s*from\s+now)?')
+_AGO = re.compile(rf'(?P<duration>{_DURATION.pattern})\s*ago')
+
+# ISO-8601 with a time and an explicit offset pins an exact instant
+_ISO_INSTANT = re.compile(r'\d{4}-\d{2}-\d{2}[t ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:z|[+-]\d{2}:?\d{2})')
+
+_TIME = (
+    r'(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?(?:\s*(?P<ampm1>[ap])\.?m?\.?)?'
+    r'|(?P<hour12>\d{1,2})\s*(?P<ampm2>[ap])\.?m?\.?'
+    r'|(?P<named>noon|midnight)'
+)
+_DATE = (
+    r'(?P<iso_year>\d{4})[-/](?P<iso_month>\d{1,2})[-/](?P<iso_day>\d{1,2})'
+    rf'|(?P<month_a>{_MONTH})\.?\s+(?P<day_a>\d{{1,2}})(?:st|nd|rd|th)?(?:,?\s+(?P<year_a>\d{{4}}))?'
+    rf'|(?P<day_b>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month_b>{_MONTH})\.?(?:,?\s+(?P<year_b>\d{{4}}))?'
+    rf'|(?P<day_word>{"|".join(DAY_WORDS)})'
+)
+_DATE_FIRST = re.compile(rf'(?:{_DATE})(?:(?:\s+|\s*t|\s*,\s*)(?:at\s+)?(?:{_TIME}))?')
+_TIME_FIRST = re.compile(rf'(?:at\s+)?(?:{_TIME})(?:\s*,?\s+(?:on\s+)?(?:{_DATE}))?')
+
+_SPACES = re.compile(r'\s+')
+
+
+def _normalize(text):
+    return _SPACES.sub(' ', text.strip().lower())
+
+
+@functools.lru_cache(maxsize=4096)
+def _duration_seconds(text):
+    match = _DURATION.fullmatch(text)
+    if not match:
+        raise TimeParseError(f"`{text}` is not a duration.")
+    seconds = sum(float(amount) * UNITS[unit] for amount, unit in _DURATION_PART.findall(text))
+    if seconds > MAX_DURATION:
+        raise TimeParseError("Durations are limited to 10 years.")
+    return seconds
+
+
+def parse_duration(text):
+    """Parse `2h30m`, `90s` or `1 day 4 hours` into a timedelta."""
+    return datetime.timedelta(seconds=_duration_seconds(_normalize(text)))
+
+
+def is_unit(word):
+    return word.lower() in UNITS
+
+
+def format_duration(delta):
+    """Render a timedelta compactly, e.g. `1d 4h 30m`."""
+    seconds = int(delta.total_seconds())
+    parts = []
+    for suffix, size in (('d', 86400), ('h', 3600), ('m', 60), ('s', 1)):
+        amount, seconds = divmod(seconds, size)
+        if amount:
+            parts.append(f"{amount}{suffix}")
+    return ' '.join(parts) or '0s'
+
+
+def _time_of_day(match):
+    if match['named']:
+        return (12, 0, 0) if match['named'] == 'noon' else (0, 0, 0)
+    if match['hour12'] is not None:
+        hour, minute, second, ampm = int(match['hour12']), 0, 0, match['ampm2']
+    elif match['hour'] is not None:
+        hour, ampm = int(match['hour']), match['ampm1']
+        minute, second = int(match['minute']), int(match['second'] or 0)
+    else:
+        return None
+
+    if ampm:
+        if not 1 <= hour <= 12:
+            raise TimeParseError("Hours must be between 1 and 12 with am/pm.")
+        hour = hour % 12 + (12 if ampm == 'p' else 0)
+    if hour > 23 or minute > 59 or second > 59:
+        raise TimeParseError("That is not a valid time of day.")
+    return (hour, minute, second)
+
+
+def _date_spec(match):
+    if match['iso_year']:
+        return ('date', int(match['iso_year']), int(match['iso_month']), int(match['iso_day']))
+    if match['month_a']:
+        year = match['year_a']
+        return ('date', int(year) if year else None, MONTHS[match['month_a']], int(match['day_a']))
+    if match['month_b']:
+        year = match['year_b']
+        return ('date', int(year) if year else None, MONTHS[match['month_b']], int(match['day_b']))
+    if match['day_word']:
+        return ('offset', DAY_WORDS[match['day_word']], match['day_word'] == 'tonight')
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_spec(text):
+    """Parse normalised input into a spec that does not depend on the current time.
+
+    Caching the spec rather than the resolved datetime keeps cache entries
+    valid forever; resolving against `now` and a zone is cheap.
+    """
+    match = _RELATIVE.fullmatch(text)
+    if match:
+        return ('relative', _duration_seconds(match['duration']))
+    match = _AGO.fullmatch(text)
+    if match:
+        return ('relative', -_duration_seconds(match['duration']))
+
+    if _ISO_INSTANT.fullmatch(text):
+        try:
+            return ('instant', datetime.datetime.fromisoformat(text.upper()))
+        except ValueError:
+            raise TimeParseError("That is not a valid ISO-8601 date.") from None
+
+    match = _DATE_FIRST.fullmatch(text) or _TIME_FIRST.fullmatch(text)
+    if not match:
+        raise TimeParseError(
+            "Unrecognised time. Try `2025-07-06 14:30`, `July 6 9pm`, `tomorrow 9am` or `in 2h30m`."
+        )
+    return ('local', _date_spec(match), _time_of_day(match))
+
+
+def _resolve(spec, zone, now):
+    kind = spec[0]
+    if kind == 'relative':
+        return now + datetime.timedelta(seconds=spec[1])
+    if kind == 'instant':
+        return spec[1]
+
+    _, date_spec, time_of_day = spec
+    local_now = now.astimezone(zone)
+    today = local_now.date()
+
+    if date_spec is None:
+        day = today
+    elif date_spec[0] == 'offset':
+        day = today + datetime.timedelta(days=date_spec[1])
+        if time_of_day is None:
+            # "tonight" means the evening; "tomorrow" alone means this time tomorrow
+            time_of_day = (20, 0, 0) if date_spec[2] else (local_now.hour, local_now.minute, local_now.second)
+    else:
+        _, year, month, day_of_month = date_spec
+        try:
+            day = datetime.date(year or today.year, month, day_of_month)
+            if year is None and day < today:
+                # A date without a year means its next occurrence
+                day = day.replace(year=today.year + 1)
+        except ValueError:
+            raise TimeParseError("That date does not exist.") from None
+
+    hour, minute, second = time_of_day or (0, 0, 0)
+    return datetime.datetime(day.year, day.month, day.day, hour, minute, second, tzinfo=zone)
+
+
+def parse_time(text, zone=DEFAULT_ZONE, now=None):
+    """Parse an absolute, relative or ISO-8601 time into an aware datetime.
+
+    Times without an explicit offset are read in `zone`. Date-only input
+    resolves to midnight and time-only input to today.
+    """
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+    spec = _parse_spec(_normalize(text))
+    return _resolve(spec, zone, now)
+
+
+def split_time(text, max_words=6):
+    """Split `tomorrow 9am water plants` into (datetime spec text, rest).
+
+    Tries the longest leading run of words first so `10 minutes` wins over
+    `10`. Returns (None, text) if no prefix parses.
+    """
+    words = text.split()
+    for count in range(min(max_words, len(words)), 0, -1):
+        head = ' '.join(words[:count])
+        try:
+            _parse_spec(_normalize(head))
+        except TimeParseError:
+            continue
+        return head, ' '.join(words[count:])
+    return None, text
+
+
+@functools.lru_cache(maxsize=1)
+def _zone_names():
+    return {name.lower(): name for name in zoneinfo.available_timezones()}
+
+
+def find_zone(name):
+    """Look up an IANA zone name case-insensitively, e.g. `europe/london`."""
+    canonical = _zone_names().get(name.strip().lower().replace(' ', '_'))
+    if canonical is None:
+        raise TimeParseError(f"Unknown time zone `{name}`. Use an IANA name such as `Europe/London`.")
+    return zoneinfo.ZoneInfo(canonical)
+
+
+class ZoneTable:
+    """Per-user time zone preferences, loaded once and kept resolved in memory."""
+
+    def __init__(self, path=TIMEZONES_FILE):
+        self.path = path
+        self._zones = None
+
+    def _load(self):
+        zones = {}
+        for user_id, name in load_json(self.path, {}).items():
+            try:
+                zones[int(user_id)] = zoneinfo.ZoneInfo(name)
+            except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+                continue
+        self._zones = zones
+
+    def get(self, user_id):
+        if self._zones is None:
+            self._load()
+        return self._zones.get(user_id, DEFAULT_ZONE)
+
+    def set(self, user_id, zone):
+        """Store a preference (None clears it). Returns the data to persist."""
+        if self._zones is None:
+            self._load()
+        if zone is None:
+            self._zones.pop(user_id, None)
+        else:
+            self._zones[user_id] = zone
+        return {str(uid): z.key for uid, z in self._zones.items()}
+
+    def save(self, snapshot):
+        save_json(self.path, snapshot)
+
+
+user_zones = ZoneTable()
@@ -0,0 +1,371 @@
+# utils/translate.py
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import math
+import re
+import time
+from collections import Counter, OrderedDict
+
+from utils.http import HTTPError, get_client
+from utils.storage import data_path, load_json, save_json
+
+logger = logging.getLogger(__name__)
+
+DICTIONARY_FILE = "assets/translations.json"
+SAMPLES_FILE = "assets/language_samples.json"
+CACHE_FILE = data_path("translations.json")
+CACHE_SIZE = 5000
+BATCH_WINDOW = 0.05  # Seconds to wait for more requests before calling the engine
+BATCH_SIZE = 32
+MAX_PHRASE_WORDS = 4
+
+LANGUAGES = {
+    'en': 'English', 'es': 'Spanish', 'fr': 'French', 'de': 'German',
+    'it': 'Italian', 'pt': 'Portuguese', 'nl': 'Dutch',
+}
+LANGUAGE_ALIASES = {
+    'español': 'es', 'espanol': 'es', 'français': 'fr', 'francais': 'fr', 'deutsch': 'de',
+    'italiano': 'it', 'português': 'pt', 'portugues': 'pt', 'nederlands': 'nl', 'dutch': 'nl',
+}
+
+
+class TranslationError(Exception):
+    """Raised for unsupported languages or when the engine fails."""
+
+
+def resolve_language(name):
+    """Map `es`, `Spanish` or `español` to a language code."""
+    name = name.strip().lower()
+    if name in LANGUAGES:
+        return name
+    for code, language in LANGUAGES.items():
+        if language.lower() == name:
+            return code
+    if name in LANGUAGE_ALIASES:
+        return LANGUAGE_ALIASES[name]
+    raise TranslationError(f"Unsupported language `{name}`. Try one of: {', '.join(LANGUAGES.values())}.")
+
+
+# ---- Language detection ----
+
+_NON_LETTERS = re.compile(r"[^\w']+|[\d_]+")
+
+
+def _trigrams(text):
+    """Character trigrams of each word padded with spaces, so word starts and ends count."""
+    grams = Counter()
+    for word in _NON_LETTERS.sub(' ', text.lower()).split():
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            grams[padded[i:i + 3]] += 1
+    return grams
+
+
+class LanguageDetector:
+    """Naive Bayes over character trigrams, trained on a short sample per language.
+
+    Each language keeps add-one-smoothed log probabilities, so scoring is one
+    dict lookup per distinct trigram of the input.
+    """
+
+    def __init__(self, samples):
+        self.profiles = {}
+        vocabulary = set()
+        counts = {}
+        for code, text in samples.items():
+            counts[code] = _trigrams(text)
+            vocabulary.update(counts[code])
+        for code, grams in counts.items():
+            total = sum(grams.values()) + len(vocabulary)
+            self.profiles[code] = (
+                {gram: math.log((count + 1) / total) for gram, count in grams.items()},
+                math.log(1 / total),
+            )
+
+    def scores(self, text):
+        grams = _trigrams(text)
+        return {
+            code: sum(count * table.get(gram, unseen) for gram, count in grams.items())
+            for code, (table, unseen) in self.profiles.items()
+        } if grams else {}
+
+    def detect(self, text):
+        """Return (language code, confidence 0-1), or (None, 0.0) for text with no letters."""
+        scores = self.scores(text)
+        if not scores:
+            return None, 0.0
+        best = max(scores, key=scores.get)
+        # Softmax over the log scores gives a rough posterior
+        total = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1 / total
+
+
+@functools.lru_cache(maxsize=1)
+def language_detector(path=SAMPLES_FILE):
+    with open(path, encoding='utf-8') as f:
+        return LanguageDetector(json.load(f))
+
+
+@functools.lru_cache(maxsize=4096)
+def detect_language(text):
+    return language_detector().detect(text)
+
+
+# ---- Engines ----
+
+class TranslationEngine:
+    """Interface for translation backends: one call translates a batch of texts."""
+
+    name = "engine"
+
+    async def translate_batch(self, texts, source, target):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+_WORDS = re.compile(r"([\w'-]+)")
+
+
+class DictionaryEngine(TranslationEngine):
+    """Offline phrase-by-phrase substitution from a JSON dictionary, for tests and demos.
+
+    Tables map English to each language; other pairs pivot through English.
+    The longest known phrase wins and unknown words are kept as they are.
+    """
+
+    name = "dictionary"
+
+    def __init__(self, path=DICTIONARY_FILE):
+        with open(path, encoding='utf-8') as f:
+            self.tables = {'en': {}}
+            self.tables.update({code: dict(table) for code, table in json.load(f).items()})
+        self.reverse = {
+            code: {foreign: english for english, foreign in reversed(table.items())}
+            for code, table in self.tables.items()
+        }
+        self.calls = 0
+
+    def _substitute(self, text, table):
+        if not table:
+            return text
+        parts = _WORDS.split(text)  # Words sit at odd indices, separators at even ones
+        output = [parts[0]]
+        i = 1
+        while i < len(parts):
+            for n in range(min(MAX_PHRASE_WORDS, (len(parts) - i + 1) // 2), 0, -1):
+                # Phrases may only span plain spaces
+                if any(parts[i + 2 * k + 1] != ' ' for k in range(n - 1)):
+                    continue
+                phrase = ' '.join(parts[i + 2 * k] for k in range(n)).lower()
+                replacement = table.get(phrase)
+                if replacement is not None:
+                    if parts[i][:1].isupper():
+                        replacement = replacement[:1].upper() + replacement[1:]
+                    output.append(replacement)
+                    output.append(parts[i + 2 * n - 1])
+                    i += 2 * n
+                    break
+            else:
+                output.append(parts[i])
+                output.append(parts[i + 1])
+                i += 2
+        return ''.join(output)
+
+    def translate_one(self, text, source, target):
+        if source not in self.tables or target not in self.tables:
+            raise TranslationError(f"The dictionary engine has no {LANGUAGES.get(source, source)} ↔ {LANGUAGES.get(target, target)} table.")
+        english = self._substitute(text, self.reverse[source])
+        return self._substitute(english, self.tables[target])
+
+    async def translate_batch(self, texts, source, target):
+        self.calls += 1
+        return [self.translate_one(text, source, target) for text in texts]
+
+
+class LibreTranslateEngine(TranslationEngine):
+    """A LibreTranslate server; one POST translates the whole batch (`q` as a list)."""
+
+    name = "libretranslate"
+
+    def __init__(self, url, api_key=None, client=None):
+        self.url = url.rstrip('/') + '/translate'
+        self.api_key = api_key
+        self.client = client or get_client()
+
+    async def translate_batch(self, texts, source, target):
+        payload = {'q': texts, 'source': source, 'target': target, 'format': 'text'}
+        if self.api_key:
+            payload['api_key'] = self.api_key
+        try:
+            # Translating is safe to repeat, so a POST may retry once
+            data = (await self.client.request('POST', self.url, json=payload, retries=1)).json()
+        except HTTPError as e:
+            raise TranslationError(f"Translation service unavailable ({e}).") from None
+        translated = data.get('translatedText')
+        if not isinstance(translated, list) or len(translated) != len(texts):
+            raise TranslationError("Translation service returned an unexpected response.")
+        return translated
+
+
+# ---- Batching and caching ----
+
+class TranslationBatcher:
+    """Collects concurrent requests per language pair and sends each window as one batch.
+
+    The first request for a pair opens a BATCH_WINDOW timer; everything that
+    arrives before it fires (up to BATCH_SIZE distinct texts) shares one
+    engine call, and duplicate texts share one slot.
+    """
+
+    def __init__(self, engine, window=BATCH_WINDOW, max_batch=BATCH_SIZE, track=None):
+        self.engine = engine
+        self.window = window
+        self.max_batch = max_batch
+        self.track = track or (lambda event, elapsed=None: None)
+        self._pending = {}  # (source, target) -> {text: future}
+        self._timers = {}
+        self._sending = set()
+
+    async def translate(self, text, source, target):
+        loop = asyncio.get_running_loop()
+        key = (source, target)
+        batch = self._pending.get(key)
+        if batch is None:
+            batch = self._pending[key] = {}
+            self._timers[key] = loop.call_later(self.window, self._flush, key)
+        future = batch.get(text)
+        if future is None:
+            future = batch[text] = loop.create_future()
+        if len(batch) >= self.max_batch:
+            self._flush(key)
+        return await asyncio.shield(future)
+
+    def _flush(self, key):
+        batch = self._pending.pop(key, None)
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if batch:
+            task = asyncio.ensure_future(self._send(key, batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, key, batch):
+        texts = list(batch)
+        start = time.perf_counter()
+        try:
+            results = await self.engine.translate_batch(texts, *key)
+        except Exception as e:
+            self.track('error')
+            logger.warning(f"Translation engine {self.engine.name} failed for a batch of {len(texts)}: {e}")
+            error = e if isinstance(e, TranslationError) else TranslationError("Translation failed.")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+                    # Callers that gave up never retrieve it; mark it seen
+                    future.exception()
+            return
+        finally:
+            self.track('upstream', time.perf_counter() - start)
+        for text, result in zip(texts, results):
+            future = batch[text]
+            if not future.done():
+                future.set_result(result)
+
+    async def drain(self):
+        for key in list(self._pending):
+            self._flush(key)
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
+
+
+class PhraseCache:
+    """Size-bounded LRU of translations keyed by (hash of text, target language).
+
+    Saved to disk as a list in LRU order, so eviction order survives a restart.
+    """
+
+    def __init__(self, path=CACHE_FILE, maxsize=CACHE_SIZE):
+        self.path = path
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.dirty = False
+
+    @staticmethod
+    def key(text, target):
+        return f"{target}:{hashlib.blake2b(text.encode('utf-8'), digest_size=12).hexdigest()}"
+
+    def load(self):
+        for key, source, translation in load_json(self.path, [])[-self.maxsize:]:
+            self._entries[key] = (source, translation)
+
+    def get(self, text, target):
+        key = self.key(text, target)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, text, target, source, translation):
+        key = self.key(text, target)
+        self._entries[key] = (source, translation)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        self.dirty = True
+
+    def snapshot(self):
+        """Return the data to persist and clear the dirty flag."""
+        self.dirty = False
+        return [[key, source, translation] for key, (source, translation) in self._entries.items()]
+
+    def save(self, snapshot):
+        save_json(self.path, snapshot)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class Translator:
+    """Detect, look up, batch and remember: the front end the commands use.
+
+    Events go to `tracker.track_service('translate', ...)` when a tracker is given.
+    """
+
+    def __init__(self, engine, tracker=None, cache=None):
+        self.engine = engine
+        self.tracker = tracker
+        self.cache = cache if cache is not None else PhraseCache()
+        self.batcher = TranslationBatcher(engine, track=self._track)
+
+    def _track(self, event, elapsed=None):
+        if self.tracker is not None:
+            self.tracker.track_service('translate', event, elapsed)
+
+    async def translate(self, text, target, source=None):
+        """Return (source code, confidence, translation); confidence is 1.0 when `source` is given."""
+        confidence = 1.0
+        if source is None:
+            source, confidence = detect_language(text)
+            if source is None:
+                raise TranslationError("There is nothing to translate in that text.")
+        if source == target:
+            return source, confidence, text
+
+        cached = self.cache.get(text, target)
+        if cached is not None:
+            self._track('hit')
+            return cached[0], confidence, cached[1]
+        self._track('miss')
+        translation = await self.batcher.translate(text, source, target)
+        self.cache.set(text, target, source, translation)
+        return source, confidence, translation
+
+    async def close(self):
+        await self.batcher.drain()
+        await self.engine.close()
@@ -0,0 +1,217 @@
+# utils/trivia.py
+import json
+import mmap
+import os
+import struct
+import zlib
+from array import array
+
+from utils.shuffle import ShuffleBag
+from utils.storage import data_path
+
+DEFAULT_SOURCE = "assets/trivia.jsonl"
+PACK_DIR = os.path.dirname(data_path("trivia", "default.tqp"))
+PACK_SUFFIX = ".tqp"
+
+MAGIC = b'TQP1'
+# magic, question count, categories offset, index offset
+HEADER = struct.Struct('<4sIQQ')
+# record offset, record length, category id, difficulty
+INDEX_ENTRY = struct.Struct('<QIHB')
+SEPARATOR = '\x1f'  # ASCII unit separator between a record's fields
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+LETTERS = 'ABCD'
+MIN_OPTIONS = 2
+MAX_OPTIONS = 4
+
+
+class TriviaError(ValueError):
+    """Raised for malformed packs or pack sources."""
+
+
+def _parse_source_line(line, number):
+    try:
+        entry = json.loads(line)
+        question = entry['question'].strip()
+        options = [str(option).strip() for option in entry['options']]
+        answer = entry['answer']
+        if isinstance(answer, str):
+            answer = LETTERS.index(answer.strip().upper()) if answer.strip().upper() in LETTERS else options.index(answer)
+        category = str(entry.get('category') or 'General').strip()
+        difficulty = DIFFICULTIES.index(str(entry.get('difficulty') or 'medium').strip().lower())
+        explanation = str(entry.get('explanation') or '').strip()
+    except (ValueError, KeyError, TypeError) as e:
+        raise TriviaError(f"Line {number}: {type(e).__name__}: {e}") from None
+    if not MIN_OPTIONS <= len(options) <= MAX_OPTIONS or not 0 <= answer < len(options):
+        raise TriviaError(f"Line {number}: needs {MIN_OPTIONS}-{MAX_OPTIONS} options and a valid answer.")
+    if any(SEPARATOR in field for field in (question, explanation, *options)):
+        raise TriviaError(f"Line {number}: contains a control character.")
+    return question, options, answer, explanation, category, difficulty
+
+
+def build_pack(source, destination):
+    """Compile a JSON-lines question file into a pack; returns the question count.
+
+    Each source line is `{"question", "options", "answer", "explanation",
+    "category", "difficulty"}`, with `answer` an index, letter or option
+    text. The pack is written to a temporary file and renamed into place.
+    """
+    categories = {}
+    index = bytearray()
+    temporary = destination + '.tmp'
+    try:
+        with open(source, encoding='utf-8') as f, open(temporary, 'wb') as out:
+            out.write(b'\0' * HEADER.size)
+            count = 0
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                question, options, answer, explanation, category, difficulty = _parse_source_line(line, number)
+                category_id = categories.setdefault(category, len(categories))
+                record = SEPARATOR.join((question, str(answer), explanation, *options)).encode('utf-8')
+                index += INDEX_ENTRY.pack(out.tell(), len(record), category_id, difficulty)
+                out.write(record)
+                count += 1
+            if not count:
+                raise TriviaError("The source has no questions.")
+            categories_offset = out.tell()
+            out.write('\n'.join(categories).encode('utf-8'))
+            index_offset = out.tell()
+            out.write(index)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, count, categories_offset, index_offset))
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    os.replace(temporary, destination)
+    return count
+
+
+class TriviaPack:
+    """A compiled pack, memory-mapped so question text stays on disk until asked for.
+
+    Opening reads only the header, category names and the fixed-size index,
+    from which per-(category, difficulty) id arrays are built; `question()`
+    decodes one record straight from the map.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path).removesuffix(PACK_SUFFIX)
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise TriviaError("The pack file is empty.") from None
+        try:
+            self._load_index()
+        except (struct.error, UnicodeDecodeError, TriviaError) as e:
+            self.close()
+            raise TriviaError(f"Corrupt trivia pack: {e}") from None
+
+    def _load_index(self):
+        magic, self.count, categories_offset, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or index_offset + self.count * INDEX_ENTRY.size > len(self._map):
+            raise TriviaError("bad header")
+        self.categories = self._map[categories_offset:index_offset].decode('utf-8').split('\n')
+        self._index_offset = index_offset
+
+        index = self._map[index_offset:index_offset + self.count * INDEX_ENTRY.size]
+        # Identifies the pack's contents, so ids saved elsewhere (e.g. in buttons) can be checked
+        self.tag = zlib.crc32(index) & 0xFFFFFF
+
+        groups = {}
+        # Only the id lists are kept; offsets are re-read from the map on demand
+        for question_id, (_, _, category_id, difficulty) in enumerate(INDEX_ENTRY.iter_unpack(index)):
+            groups.setdefault((category_id, difficulty), array('I')).append(question_id)
+        self._groups = groups
+        self._selections = {}
+
+    def __len__(self):
+        return self.count
+
+    def category_id(self, name):
+        """Case-insensitive category lookup; None if the pack has no such category."""
+        lowered = name.strip().lower()
+        for category_id, category in enumerate(self.categories):
+            if category.lower() == lowered:
+                return category_id
+        return None
+
+    def select(self, category_id=None, difficulty=None):
+        """Ids of the questions matching both filters (None means any), as an array."""
+        key = (category_id, difficulty)
+        selection = self._selections.get(key)
+        if selection is None:
+            if category_id is None and difficulty is None:
+                selection = range(self.count)
+            else:
+                selection = array('I')
+                for (group_category, group_difficulty), ids in sorted(self._groups.items()):
+                    if category_id in (None, group_category) and difficulty in (None, group_difficulty):
+                        selection.extend(ids)
+            self._selections[key] = selection
+        return selection
+
+    def question(self, question_id):
+        offset, length, category_id, difficulty = INDEX_ENTRY.unpack_from(
+            self._map, self._index_offset + question_id * INDEX_ENTRY.size
+        )
+        question, answer, explanation, *options = self._map[offset:offset + length].decode('utf-8').split(SEPARATOR)
+        return {
+            'id': question_id,
+            'question': question,
+            'options': options,
+            'answer': int(answer),
+            'explanation': explanation,
+            'category': self.categories[category_id],
+            'difficulty': DIFFICULTIES[difficulty],
+        }
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class TriviaBank:
+    """The active pack plus one shuffle bag per (channel, category, difficulty)."""
+
+    def __init__(self):
+        self.pack = None
+        self._bags = {}
+
+    def swap(self, pack):
+        """Install a new pack; bags restart since their ids refer to the old one."""
+        old, self.pack = self.pack, pack
+        self._bags = {}
+        if old is not None:
+            old.close()
+
+    def draw(self, channel_id, category_id=None, difficulty=None):
+        """Return (question, questions left in this channel's round), or (None, 0) if nothing matches."""
+        selection = self.pack.select(category_id, difficulty)
+        if not selection:
+            return None, 0
+        key = (channel_id, category_id, difficulty)
+        bag = self._bags.get(key)
+        if bag is None:
+            bag = self._bags[key] = ShuffleBag(len(selection))
+        return self.pack.question(selection[bag.draw()]), bag.remaining
+
+
+def pack_path(name):
+    return os.path.join(PACK_DIR, f"{name}{PACK_SUFFIX}")
+
+
+def open_default_pack():
+    """Open the default pack, compiling it from DEFAULT_SOURCE when missing or stale."""
+    path = pack_path('default')
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(DEFAULT_SOURCE):
+        build_pack(DEFAULT_SOURCE, path)
+    return TriviaPack(path)
+
+
+trivia_bank = TriviaBank()
@@ -0,0 +1,259 @@
+# utils/weather.py
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+
+from utils.http import HTTPError, get_client
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_FILE = "assets/weather_fixture.json"
+WEATHER_TTL = 10 * 60  # Upstream data only refreshes every 15 minutes or so
+GEOCODE_TTL = 24 * 60 * 60
+GEOCODE_MISS_TTL = 10 * 60
+CACHE_SIZE = 1024
+
+# WMO weather interpretation codes -> (condition, emoji)
+WEATHER_CODES = {
+    0: ("Clear", "☀️"), 1: ("Mostly Clear", "🌤️"), 2: ("Partly Cloudy", "⛅"), 3: ("Overcast", "☁️"),
+    45: ("Fog", "🌫️"), 48: ("Freezing Fog", "🌫️"),
+    51: ("Light Drizzle", "🌦️"), 53: ("Drizzle", "🌦️"), 55: ("Heavy Drizzle", "🌧️"),
+    56: ("Freezing Drizzle", "🌧️"), 57: ("Freezing Drizzle", "🌧️"),
+    61: ("Light Rain", "🌦️"), 63: ("Rain", "🌧️"), 65: ("Heavy Rain", "🌧️"),
+    66: ("Freezing Rain", "🌧️"), 67: ("Freezing Rain", "🌧️"),
+    71: ("Light Snow", "🌨️"), 73: ("Snow", "❄️"), 75: ("Heavy Snow", "❄️"), 77: ("Snow Grains", "🌨️"),
+    80: ("Rain Showers", "🌦️"), 81: ("Rain Showers", "🌧️"), 82: ("Violent Rain Showers", "⛈️"),
+    85: ("Snow Showers", "🌨️"), 86: ("Heavy Snow Showers", "❄️"),
+    95: ("Thunderstorm", "⛈️"), 96: ("Thunderstorm with Hail", "⛈️"), 99: ("Thunderstorm with Hail", "⛈️"),
+}
+
+_SPACES = re.compile(r'\s+')
+
+
+class WeatherError(Exception):
+    """Raised when a location is unknown or the provider cannot be reached."""
+
+
+def normalize_location(text):
+    """`  New   York, US ` -> `new york, us`, the key both caches use."""
+    return _SPACES.sub(' ', text.strip().lower())
+
+
+def describe(code):
+    """(condition, emoji) for a WMO weather code."""
+    return WEATHER_CODES.get(code, ("Unknown", "🌡️"))
+
+
+class WeatherProvider:
+    """Interface for weather backends.
+
+    `geocode` returns a location dict (name, country, latitude, longitude) or
+    None if the place is unknown; `current` returns a conditions dict
+    (temperature, humidity, wind_speed, code) for a location.
+    """
+
+    name = "provider"
+
+    async def geocode(self, query):
+        raise NotImplementedError
+
+    async def current(self, location):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class FixtureWeatherProvider(WeatherProvider):
+    """Serves canned data from a JSON file, for tests and offline development.
+
+    `delay` simulates upstream latency so coalescing can be exercised.
+    """
+
+    name = "fixture"
+
+    def __init__(self, path=FIXTURE_FILE, delay=0.0):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        self.locations = data['locations']
+        self.conditions = data['current']
+        self.delay = delay
+        self.calls = 0
+
+    async def geocode(self, query):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        name = query.partition(',')[0].strip()
+        location = self.locations.get(name)
+        return dict(location, key=name) if location else None
+
+    async def current(self, location):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        try:
+            return dict(self.conditions[location['key']])
+        except KeyError:
+            raise WeatherError(f"No fixture data for {location['name']}.") from None
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """Open-Meteo's free geocoding and forecast APIs (no key required), over the shared HTTP client."""
+
+    name = "open-meteo"
+    GEOCODE_URL = "https://geocoding-api.open-meteo.com/v1/search"
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+
+    def __init__(self, client=None):
+        self.client = client or get_client()
+
+    async def _get_json(self, url, params):
+        try:
+            return await self.client.get_json(url, params=params, cache=True)
+        except HTTPError as e:
+            raise WeatherError(f"Weather service unavailable ({e}).") from None
+
+    async def geocode(self, query):
+        name, _, hint = (part.strip() for part in query.partition(','))
+        data = await self._get_json(self.GEOCODE_URL, {'name': name, 'count': 5, 'format': 'json'})
+        results = data.get('results') or []
+        if hint:
+            # `paris, us` picks Paris, Texas over Paris, France
+            results = [
+                r for r in results
+                if hint in (r.get('country', '').lower(), r.get('country_code', '').lower(), r.get('admin1', '').lower())
+            ] or results
+        if not results:
+            return None
+        best = results[0]
+        return {
+            'name': best['name'],
+            'country': best.get('country', ''),
+            'latitude': best['latitude'],
+            'longitude': best['longitude'],
+        }
+
+    async def current(self, location):
+        data = await self._get_json(self.FORECAST_URL, {
+            'latitude': location['latitude'],
+            'longitude': location['longitude'],
+            'current': 'temperature_2m,relative_humidity_2m,wind_speed_10m,weather_code',
+        })
+        current = data.get('current')
+        if not current:
+            raise WeatherError("Weather service returned no current conditions.")
+        return {
+            'temperature': current['temperature_2m'],
+            'humidity': current['relative_humidity_2m'],
+            'wind_speed': current['wind_speed_10m'],
+            'code': current['weather_code'],
+        }
+
+
+PROVIDERS = {
+    FixtureWeatherProvider.name: FixtureWeatherProvider,
+    OpenMeteoProvider.name: OpenMeteoProvider,
+}
+
+
+class TTLCache:
+    """A size-bounded LRU whose entries expire `ttl` seconds after being stored."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        """Return (found, value); expired entries count as missing."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class WeatherService:
+    """Caching, coalescing front end for a WeatherProvider.
+
+    Place names resolve through a geocoding cache; conditions are cached per
+    resolved location for WEATHER_TTL, so `London` and `london, uk` share an
+    entry. Concurrent misses for the same key wait on a single upstream call.
+    Events go to `tracker.track_service('weather', ...)` when a tracker is given.
+    """
+
+    def __init__(self, provider, tracker=None):
+        self.provider = provider
+        self.tracker = tracker
+        self.geocodes = TTLCache()
+        self.reports = TTLCache()
+        self._inflight = {}
+
+    def _track(self, event, elapsed=None):
+        if self.tracker is not None:
+            self.tracker.track_service('weather', event, elapsed)
+
+    async def _single_flight(self, key, fetch):
+        """Run `fetch()` once per key at a time; concurrent callers share its result."""
+        task = self._inflight.get(key)
+        if task is not None:
+            self._track('coalesced')
+        else:
+            task = asyncio.ensure_future(self._timed(fetch))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shielded so one impatient caller cancelling does not cancel everyone else's request
+        return await asyncio.shield(task)
+
+    async def _timed(self, fetch):
+        start = time.perf_counter()
+        try:
+            return await fetch()
+        except Exception as e:
+            self._track('error')
+            logger.warning(f"Weather provider {self.provider.name} failed: {e}")
+            raise
+        finally:
+            self._track('upstream', time.perf_counter() - start)
+
+    async def locate(self, query):
+        key = normalize_location(query)
+        found, location = self.geocodes.get(key)
+        if not found:
+            location = await self._single_flight(('geocode', key), lambda: self.provider.geocode(key))
+            self.geocodes.set(key, location, GEOCODE_TTL if location else GEOCODE_MISS_TTL)
+        if location is None:
+            raise WeatherError(f"Couldn't find a place called `{query}`.")
+        return location
+
+    async def current(self, query):
+        """Return (location, conditions) for a place name."""
+        location = await self.locate(query)
+        key = (round(location['latitude'], 2), round(location['longitude'], 2))
+        found, report = self.reports.get(key)
+        if found:
+            self._track('hit')
+            return location, report
+        self._track('miss')
+        report = await self._single_flight(('current', key), lambda: self.provider.current(location))
+        self.reports.set(key, report, WEATHER_TTL)
+        return location, report
+
+    async def close(self):
+        await self.provider.close()